@@ -4,6 +4,8 @@ app = create_app()
 
 if __name__ == '__main__':
     print("🚀 Стартиране на QRWeaver...")
+    if app.config.get('QR_WARMUP_SECONDS') is not None:
+        print(f"🔥 Warm-up: {app.config['QR_WARMUP_SECONDS'] * 1000:.0f} ms")
     print("📍 Достъпен на: http://127.0.0.1:5000")
     print("📘 Facebook QR: http://127.0.0.1:5000/social/facebook")
     print("📷 Instagram QR: http://127.0.0.1:5000/social/instagram")
@@ -1,5 +1,25 @@
 from flask import Flask
 import os
+import tempfile
+
+
+def server_config():
+    """
+    Reads the settings of the production WSGI server (see ``gunicorn.conf.py``)
+    from the environment. ``create_app`` stores them in the app config as well;
+    they live here so the server can read them without building an app.
+
+    :return: ``WEB_BIND``, ``WEB_WORKERS``, ``WEB_THREADS``, ``WEB_TIMEOUT`` and
+        ``WEB_PRELOAD``.
+    :rtype: dict
+    """
+    return {
+        'WEB_BIND': os.environ.get('WEB_BIND', '0.0.0.0:8000'),
+        'WEB_WORKERS': int(os.environ.get('WEB_WORKERS', 0)) or os.cpu_count() or 1,
+        'WEB_THREADS': int(os.environ.get('WEB_THREADS', 4)),
+        'WEB_TIMEOUT': int(os.environ.get('WEB_TIMEOUT', 60)),
+        'WEB_PRELOAD': os.environ.get('WEB_PRELOAD', '1') != '0',
+    }
 
 
 def create_app():
@@ -19,6 +39,92 @@ def create_app():
                 static_folder='../static')
     app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY') or 'qrweaver-dev-key-2023'
     app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB
+    app.config['QR_WARMUP'] = os.environ.get('QR_WARMUP', '1') != '0'
+    app.config['QR_WARMUP_SIZES'] = (250, 300, 400)
+    app.config['QR_MATRIX_CACHE_ENTRIES'] = int(os.environ.get('QR_MATRIX_CACHE_ENTRIES', 4096))
+    app.config['RENDER_CACHE_MAX_BYTES'] = int(os.environ.get('RENDER_CACHE_MAX_BYTES', 64 * 1024 * 1024))
+    app.config['RENDER_CACHE_DIR'] = os.environ.get('RENDER_CACHE_DIR') or None
+    app.config['RENDER_CACHE_SPILL_MAX_BYTES'] = int(os.environ.get('RENDER_CACHE_SPILL_MAX_BYTES',
+                                                                    512 * 1024 * 1024))
+    app.config['BATCH_WORKERS'] = int(os.environ.get('BATCH_WORKERS', 0)) or os.cpu_count()
+    app.config['BATCH_MAX_ITEMS'] = int(os.environ.get('BATCH_MAX_ITEMS', 5000))
+    app.config['BATCH_STREAM_MAX_ITEMS'] = int(os.environ.get('BATCH_STREAM_MAX_ITEMS', 100000))
+    app.config['RENDER_WORKERS'] = int(os.environ.get('RENDER_WORKERS', os.cpu_count() or 1))
+    app.config['RENDER_MAX_PENDING'] = int(os.environ.get('RENDER_MAX_PENDING', 0)) or None
+    app.config['RENDER_TIMEOUT'] = float(os.environ.get('RENDER_TIMEOUT', 30))
+    app.config['METRICS_ENABLED'] = os.environ.get('METRICS_ENABLED', '1') != '0'
+    app.config['BATCH_MAX_IN_FLIGHT'] = int(os.environ.get('BATCH_MAX_IN_FLIGHT', 0)) or None
+    app.config.update(server_config())
+    app.config['RENDER_MAX_COST'] = float(os.environ.get('RENDER_MAX_COST', 40)) or None
+    app.config['RATE_LIMIT_CAPACITY'] = float(os.environ.get('RATE_LIMIT_CAPACITY', 200))
+    app.config['RATE_LIMIT_RATE'] = float(os.environ.get('RATE_LIMIT_RATE', 20))
+    app.config['RATE_LIMIT_PROCESSES'] = max(1, int(os.environ.get('RATE_LIMIT_PROCESSES', 1)))
+    app.config['PREVIEW_MAX_SIZE'] = int(os.environ.get('PREVIEW_MAX_SIZE', 300))
+    app.config['PREVIEW_TTL'] = int(os.environ.get('PREVIEW_TTL', 3600))
+    app.config['JOBS_DIR'] = os.environ.get('JOBS_DIR') or os.path.join(tempfile.gettempdir(), 'qrweaver-jobs')
+    app.config['JOBS_TTL'] = float(os.environ.get('JOBS_TTL', 3600))
+    app.config['JOBS_WORKERS'] = int(os.environ.get('JOBS_WORKERS', 0)) or os.cpu_count()
+    app.config['JOBS_MAX_ITEMS'] = int(os.environ.get('JOBS_MAX_ITEMS', 100000))
+
+    # Shared generator, warmed up before the first request is served
+    from app.utils.social_qr import get_shared_generator
+    qr_generator = get_shared_generator()
+    qr_generator.matrices.max_entries = app.config['QR_MATRIX_CACHE_ENTRIES']
+
+    app.config['QR_WARMUP_SECONDS'] = None
+    if app.config['QR_WARMUP']:
+        warmup_seconds = qr_generator.warm_up(app.config['QR_WARMUP_SIZES'])
+        app.config['QR_WARMUP_SECONDS'] = warmup_seconds
+        app.logger.info("QR generator warm-up finished in %.1f ms", warmup_seconds * 1000)
+
+    # Content-addressed cache of rendered PNGs, shared by the UI and the API
+    from app.services.render_cache import RenderCache
+    app.extensions['render_cache'] = RenderCache(
+        max_bytes=app.config['RENDER_CACHE_MAX_BYTES'],
+        spill_dir=app.config['RENDER_CACHE_DIR'],
+        spill_max_bytes=app.config['RENDER_CACHE_SPILL_MAX_BYTES']
+    )
+
+    # Signed tokens that let preview pages and downloads reuse the cached render
+    from app.services.preview_tokens import PreviewTokens
+    app.extensions['preview_tokens'] = PreviewTokens(app.config['SECRET_KEY'],
+                                                     max_age=app.config['PREVIEW_TTL'])
+
+    # Process pool for interactive renders, bounded so overload is shed with 503s
+    from app.services.render_pool import RenderPool
+    app.extensions['render_pool'] = RenderPool(
+        max_workers=app.config['RENDER_WORKERS'],
+        max_pending=app.config['RENDER_MAX_PENDING'],
+        timeout=app.config['RENDER_TIMEOUT'],
+        warmup_sizes=app.config['QR_WARMUP_SIZES'] if app.config['QR_WARMUP'] else ()
+    )
+
+    # Per-client render budget in QRService.estimate_cost units, split evenly
+    # between the server processes that each keep their own buckets
+    if app.config['RATE_LIMIT_CAPACITY'] > 0:
+        from app.services.rate_limit import TokenBucketLimiter
+        processes = app.config['RATE_LIMIT_PROCESSES']
+        app.extensions['rate_limiter'] = TokenBucketLimiter(
+            capacity=app.config['RATE_LIMIT_CAPACITY'] / processes,
+            rate=app.config['RATE_LIMIT_RATE'] / processes
+        )
+
+    # Process pool for batch generation, started on first use
+    from app.services.batch_service import BatchRenderer
+    app.extensions['batch_renderer'] = BatchRenderer(max_workers=app.config['BATCH_WORKERS'])
+
+    # SQLite-backed queue for asynchronous jobs; the runner thread starts on first submit
+    from app.services.job_queue import JobRunner, JobStore
+    app.extensions['job_runner'] = JobRunner(
+        JobStore(app.config['JOBS_DIR'], ttl=app.config['JOBS_TTL']),
+        max_workers=app.config['JOBS_WORKERS'],
+        max_in_flight=app.config['BATCH_MAX_IN_FLIGHT']
+    )
+
+    # Per-stage histograms for /metrics and Server-Timing headers
+    if app.config['METRICS_ENABLED']:
+        from app.services.metrics import Metrics
+        app.extensions['metrics'] = Metrics()
 
     # Register blueprints
     from app.routes import bp
@@ -0,0 +1,169 @@
+"""
+Offline bulk QR generation.
+
+Reads a CSV (with a header row) or JSONL file of generation specs, renders them
+on a pool of worker processes and writes one image per row to an output directory.
+Rows whose output file already exists are skipped, so an interrupted run can be
+restarted with the same arguments.
+
+Usage:
+    python -m app INPUT --output DIR [--workers N] [--format csv|jsonl]
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+
+from app.services.batch_service import BatchRenderer, unique_filename
+from app.services.qr_service import GENERATION_FIELDS, QRService
+from app.utils.file_utils import write_atomic
+from app.utils.image_encoder import COMPRESSION_LEVELS, OUTPUT_FORMATS
+from app.utils.social_qr import SocialQRGenerator
+
+BOOLEAN_FIELDS = ('use_shortlink', 'rounded_corners', 'colorful', 'palette')
+TRUE_VALUES = ('1', 'true', 'yes', 'y', 'on')
+
+
+def read_specs(path, input_format=None):
+    """
+    Reads generation specs from a CSV or JSONL file.
+
+    :param path: Path to the input file.
+    :type path: str
+    :param input_format: ``'csv'`` or ``'jsonl'``; guessed from the extension if omitted.
+    :type input_format: str | None
+    :return: A generator of specs, one per non-empty row.
+    :rtype: Iterator[dict]
+    """
+    if input_format is None:
+        input_format = 'jsonl' if path.lower().endswith(('.jsonl', '.ndjson')) else 'csv'
+
+    with open(path, newline='', encoding='utf-8') as fh:
+        if input_format == 'jsonl':
+            for line in fh:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            for row in csv.DictReader(fh):
+                yield _coerce_csv_row(row)
+
+
+def _coerce_csv_row(row):
+    spec = {}
+    for field in GENERATION_FIELDS:
+        value = (row.get(field) or '').strip()
+        if not value:
+            continue
+        if field in BOOLEAN_FIELDS:
+            spec[field] = value.lower() in TRUE_VALUES
+        else:
+            spec[field] = value
+    return spec
+
+
+def plan_outputs(specs, output_dir, defaults=None):
+    """
+    Assigns an output path to every spec and splits off the rows that are already
+    rendered. File names are deterministic for a given input, which is what makes
+    runs resumable.
+
+    :param specs: The generation specs in input order.
+    :type specs: Iterable[dict]
+    :param output_dir: Directory the images are written to.
+    :type output_dir: str
+    :param defaults: Options applied to every row that does not set them itself.
+    :type defaults: dict | None
+    :return: The ``(row, spec, path)`` triples to render, the number of skipped rows
+        and the ``(row, error)`` pairs for rows that could not be planned.
+    :rtype: tuple[list, int, list]
+    """
+    service = QRService()
+    used = set()
+    todo = []
+    skipped = 0
+    errors = []
+
+    for row, spec in enumerate(specs, start=1):
+        if defaults and isinstance(spec, dict):
+            spec = {**defaults, **spec}
+        try:
+            options = service.options_from_spec(spec)
+        except ValueError as e:
+            errors.append((row, str(e)))
+            continue
+
+        filename = unique_filename(
+            service.generate_filename(options['platform'], options['display_name'],
+                                      options['image_format']), used)
+        path = os.path.join(output_dir, filename)
+
+        if os.path.exists(path):
+            skipped += 1
+        else:
+            todo.append((row, spec, path))
+
+    return todo, skipped, errors
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m app',
+                                     description='Render social QR codes in bulk from CSV or JSONL.')
+    parser.add_argument('input', help='CSV (with header) or JSONL file of generation specs')
+    parser.add_argument('-o', '--output', required=True, help='directory for the rendered images')
+    parser.add_argument('-w', '--workers', type=int, default=None,
+                        help='worker processes (default: CPU count)')
+    parser.add_argument('--format', choices=('csv', 'jsonl'), default=None,
+                        help='input format (default: from the file extension)')
+    parser.add_argument('--image-format', choices=sorted(OUTPUT_FORMATS), default=None,
+                        help='output format for rows that do not set one (default: png)')
+    parser.add_argument('--compression', choices=sorted(COMPRESSION_LEVELS), default=None,
+                        help='encoder preset for rows that do not set one (default: default)')
+    parser.add_argument('--error-correction', choices=SocialQRGenerator.ERROR_CORRECTION_MODES,
+                        default=None,
+                        help='error-correction level for rows that do not set one (default: H)')
+    parser.add_argument('--palette', action='store_true',
+                        help='write palette-mode PNGs unless a row says otherwise')
+    args = parser.parse_args(argv)
+
+    defaults = {}
+    if args.image_format:
+        defaults['image_format'] = args.image_format
+    if args.compression:
+        defaults['compression'] = args.compression
+    if args.error_correction:
+        defaults['error_correction'] = args.error_correction
+    if args.palette:
+        defaults['palette'] = True
+
+    os.makedirs(args.output, exist_ok=True)
+
+    started = time.perf_counter()
+    todo, skipped, errors = plan_outputs(read_specs(args.input, args.format), args.output, defaults)
+
+    renderer = BatchRenderer(max_workers=args.workers)
+    rendered = 0
+    try:
+        results = renderer.render_iter(spec for _, spec, _ in todo)
+        for (row, _, path), result in zip(todo, results):
+            if not result['success']:
+                errors.append((row, result['error']))
+                continue
+
+            # An interrupted run never leaves a partial file that a resumed
+            # run would skip
+            write_atomic(path, [result['data']])
+            rendered += 1
+    finally:
+        renderer.shutdown()
+
+    elapsed = time.perf_counter() - started
+    for row, error in sorted(errors):
+        print(f"row {row}: {error}", file=sys.stderr)
+
+    rate = rendered / elapsed if elapsed else 0.0
+    print(f"rendered {rendered}, skipped {skipped}, failed {len(errors)} "
+          f"in {elapsed:.2f}s ({rate:.1f} QR/s, {renderer.max_workers} workers)")
+
+    return 1 if errors else 0
@@ -1,15 +1,172 @@
-from flask import Blueprint, render_template, request, send_file, flash, jsonify
+from flask import (Blueprint, render_template, request, send_file, flash, jsonify, current_app, Response, g,
+                   redirect, url_for, make_response)
 from io import BytesIO
 import base64
-from app.utils.social_qr import (
-    generate_facebook_qr,
-    generate_instagram_qr,
-    generate_linkedin_qr,
-    SocialQRGenerator
-)
+import time
+from urllib.parse import quote
+from app.services.batch_service import build_zip, estimate_batch_cost, result_payload, stream_ndjson, stream_zip
+from app.services.job_queue import DONE
+from app.services.metrics import server_timing
+from app.services.preview_tokens import InvalidPreviewToken
+from app.services.qr_service import QRService, RenderTooExpensive, _flag_option
+from app.services.rate_limit import RateLimited
+from app.services.render_pool import RenderOverloaded, generator_cache_stats
+from app.utils.image_encoder import FILE_EXTENSIONS, OUTPUT_FORMATS
+from app.utils.timing import StageTimer, stage
 
 bp = Blueprint('main', __name__)
-qr_generator = SocialQRGenerator()
+qr_service = QRService()
+
+
+def _render_cached(options):
+    """
+    Returns the encoded image for the options, serving repeats from the render cache.
+    Requests above ``RENDER_MAX_COST`` are refused; misses are charged to the
+    client's rate limit budget before rendering.
+    """
+    cost = qr_service.check_cost(options, current_app.config['RENDER_MAX_COST'])
+    render_cache = current_app.extensions['render_cache']
+    key = render_cache.make_key(options)
+    g.qr_platform = options['platform']
+
+    with stage('cache'):
+        entry = render_cache.get(key)
+    if entry is None:
+        _charge(cost)
+        render_pool = current_app.extensions['render_pool']
+        data, mimetype, shortlink, full_url = render_pool.render(options)
+        entry = render_cache.put(key, data, mimetype, shortlink, full_url)
+    return entry
+
+
+def _charge(cost):
+    """Charges the cost of a render to the client's token bucket, if rate limiting is on"""
+    limiter = current_app.extensions.get('rate_limiter')
+    if limiter is not None:
+        limiter.acquire(request.remote_addr or 'unknown', cost)
+
+
+def _load_preview(token, platform=None):
+    """
+    Returns the options of a preview token, optionally checking its platform.
+    The options are validated and cost-checked again like any other input: the
+    signature only proves the token was made with ``SECRET_KEY``.
+    """
+    spec = current_app.extensions['preview_tokens'].load(token)
+    try:
+        options = qr_service.options_from_spec(spec)
+        qr_service.check_cost(options, current_app.config['RENDER_MAX_COST'])
+    except ValueError as e:
+        raise InvalidPreviewToken("Preview is invalid, please generate it again") from e
+    if platform is not None and options['platform'] != platform:
+        raise InvalidPreviewToken("Preview does not belong to this page")
+    return options
+
+
+def _no_referrer(response):
+    """Keeps token URLs, which carry the profile URL and name, out of Referer headers"""
+    response.headers['Referrer-Policy'] = 'same-origin'
+    return response
+
+
+def _etag_for(options):
+    return current_app.extensions['render_cache'].make_key(options)
+
+
+def _header_safe(value):
+    """Percent-encodes anything that cannot travel in a latin-1 response header"""
+    return quote(value, safe=":/?#[]@!$&'()*+,;=%-._~")
+
+
+def _overloaded(error, as_json=True):
+    """
+    503 with Retry-After for renders the pool could not take on, or 429 for clients
+    over their rate limit
+    """
+    metrics = current_app.extensions.get('metrics')
+    if metrics is not None:
+        metrics.record_rejection(error.reason)
+
+    if as_json:
+        response = jsonify({'error': str(error)})
+    else:
+        response = current_app.response_class(f"Error: {error}", mimetype='text/plain')
+    response.status_code = 429 if isinstance(error, RateLimited) else 503
+    response.headers['Retry-After'] = str(error.retry_after)
+    return response
+
+
+def _too_expensive(error, as_json=True):
+    """413 for requests above the interactive cost limit"""
+    metrics = current_app.extensions.get('metrics')
+    if metrics is not None:
+        metrics.record_rejection('too_expensive')
+
+    if as_json:
+        return jsonify({'error': str(error), 'cost': round(error.cost, 2),
+                        'max_cost': error.max_cost}), 413
+    return f"Error: {error}", 413
+
+
+def _not_modified(etag):
+    response = current_app.response_class(status=304)
+    response.set_etag(etag)
+    return response
+
+
+@bp.before_request
+def _start_stage_timer():
+    if 'metrics' not in current_app.extensions:
+        return
+    g.request_started = time.perf_counter()
+    g.stage_timer = StageTimer().__enter__()
+
+
+@bp.after_request
+def _record_metrics(response):
+    timer = g.pop('stage_timer', None)
+    if timer is None:
+        return response
+    timer.__exit__(None, None, None)
+
+    elapsed = time.perf_counter() - g.request_started
+    current_app.extensions['metrics'].record_request(
+        request.endpoint or 'unknown', response.status_code, elapsed,
+        platform=g.get('qr_platform'), timer=timer if timer.stages else None)
+    if timer.stages:
+        response.headers['Server-Timing'] = server_timing(timer, elapsed)
+    return response
+
+
+@bp.teardown_request
+def _stop_stage_timer(exc):
+    # after_request is skipped for unhandled exceptions; never leak the timer
+    timer = g.pop('stage_timer', None)
+    if timer is not None:
+        timer.__exit__(None, None, None)
+
+
+@bp.route('/metrics')
+def metrics():
+    """Prometheus text-format metrics for this process"""
+    registry = current_app.extensions.get('metrics')
+    if registry is None:
+        return "Metrics are disabled", 404
+
+    # Renders use the matrix and asset caches of the pool's workers
+    render_pool = current_app.extensions['render_pool']
+    caches = render_pool.cache_stats(generator_cache_stats())
+    caches['render'] = current_app.extensions['render_cache'].stats()
+    pool = render_pool.stats()
+    gauges = {
+        'render_queue_depth': pool['pending'],
+        'render_queue_limit': pool['max_pending'],
+        'render_workers': pool['workers'],
+    }
+    for status, count in current_app.extensions['job_runner'].store.stats().items():
+        gauges[f'jobs_{status}'] = count
+    return Response(registry.render(caches, gauges),
+                    content_type='text/plain; version=0.0.4; charset=utf-8')
 
 
 @bp.route('/')
@@ -17,15 +174,38 @@ def index():
     return render_template('index.html')
 
 
-@bp.route('/social/facebook', methods=['GET', 'POST'])
-def facebook_qr():
+def _social_page(platform):
+    """
+    Shared GET/POST handler for the per-platform generator pages.
+
+    A successful POST renders the badge into the render cache and redirects to
+    ``GET ?preview=<token>`` (POST-redirect-GET). That page references the image
+    as ``/qr/<token>.png`` instead of inlining it, and its download form sends
+    the token back, so the previewed bytes are downloaded without rendering again.
+    """
+    template = f'social/{platform}.html'
+    form = request.form
     rounded_corners = False
     use_shortlink = False
     color_mode = 'color'
+    corner_radius = 40
+    qr_size = 300
+    error_correction = 'H'
+    token = request.args.get('preview')
+
+    def page(**context):
+        return render_template(template,
+                               form=form,
+                               rounded_corners=rounded_corners,
+                               use_shortlink=use_shortlink,
+                               color_mode=color_mode,
+                               corner_radius=corner_radius,
+                               qr_size=qr_size,
+                               error_correction=error_correction,
+                               **context)
 
-    if request.method == 'POST':
-        try:
-
+    try:
+        if request.method == 'POST':
             profile_url = request.form.get('profile_url', '').strip()
             display_name = request.form.get('display_name', '').strip()
             use_shortlink = 'use_shortlink' in request.form
@@ -34,284 +214,420 @@ def facebook_qr():
             qr_size = int(request.form.get('qr_size', 300))
             color_mode = (request.form.get('color_mode') or 'color').strip().lower()
             colorful = not color_mode.startswith('mono')
+            error_correction = request.form.get('error_correction') or 'H'
 
             if not profile_url or not display_name:
                 flash('Please fill in all fields!', 'error')
-                return render_template('social/facebook.html',
-                                       rounded_corners=rounded_corners,
-                                       use_shortlink=use_shortlink,
-                                       color_mode=color_mode)
+                return page()
+
+            errors = qr_service.validate_social_input(platform, profile_url, display_name)
+            if errors:
+                for error in errors:
+                    flash(error, 'error')
+                return page()
 
-            qr_image, shortlink, full_url = generate_facebook_qr(
+            options = qr_service.normalize_options(
+                platform=platform,
                 profile_url=profile_url,
                 display_name=display_name,
                 use_shortlink=use_shortlink,
                 rounded_corners=rounded_corners,
                 corner_radius=corner_radius,
                 qr_size=qr_size,
-                colorful=colorful
+                colorful=colorful,
+                error_correction=error_correction
             )
+            _render_cached(options)
+            token = current_app.extensions['preview_tokens'].issue(options)
+            return redirect(url_for(request.endpoint, preview=token), code=303)
+
+        if token:
+            options = _load_preview(token, platform)
+            form = {'profile_url': options['profile_url'], 'display_name': options['display_name']}
+            use_shortlink = options['use_shortlink']
+            rounded_corners = options['rounded_corners']
+            color_mode = 'color' if options['colorful'] else 'mono'
+            corner_radius = options['corner_radius'] if rounded_corners else 40
+            qr_size = options['qr_size']
+            error_correction = options['error_correction']
+
+            # Usually a cache hit: the POST that issued the token rendered it
+            entry = _render_cached(options)
+            return _no_referrer(make_response(page(qr_url=url_for('main.preview_image', token=token),
+                                                   preview_token=token,
+                                                   shortlink=entry.shortlink,
+                                                   full_url=entry.full_url,
+                                                   success=True)))
+
+    except (RenderOverloaded, RateLimited) as e:
+        if isinstance(e, RateLimited):
+            flash('Too many requests, please try again in a moment.', 'error')
+        else:
+            flash('The server is busy, please try again in a moment.', 'error')
+        response = _overloaded(e)
+        response.set_data(page())
+        response.mimetype = 'text/html'
+        return response
+    except InvalidPreviewToken as e:
+        flash(str(e), 'error')
+    except Exception as e:
+        flash(f'Generation error: {str(e)}', 'error')
 
-            # Convert to base64 for preview
-            img_io = BytesIO()
-            qr_image.save(img_io, 'PNG', quality=95)
-            img_io.seek(0)
-            qr_base64 = base64.b64encode(img_io.getvalue()).decode()
-
-            return render_template('social/facebook.html',
-                                   qr_image=qr_base64,
-                                   shortlink=shortlink,
-                                   full_url=full_url,
-                                   success=True,
-                                   rounded_corners=rounded_corners,
-                                   use_shortlink=use_shortlink,
-                                   color_mode=color_mode)
+    return page()
 
-        except Exception as e:
-            flash(f'Generation error: {str(e)}', 'error')
 
-    return render_template('social/facebook.html',
-                           rounded_corners=rounded_corners,
-                           use_shortlink=use_shortlink,
-                           color_mode=color_mode)
+@bp.route('/social/facebook', methods=['GET', 'POST'])
+def facebook_qr():
+    return _social_page('facebook')
 
 
 @bp.route('/social/instagram', methods=['GET', 'POST'])
 def instagram_qr():
-    rounded_corners = False
-    use_shortlink = False
-    color_mode = 'color'
+    return _social_page('instagram')
 
-    if request.method == 'POST':
-        try:
-            profile_url = request.form.get('profile_url', '').strip()
-            display_name = request.form.get('display_name', '').strip()
-            use_shortlink = 'use_shortlink' in request.form
-            rounded_corners = 'rounded_corners' in request.form
-            corner_radius = int(request.form.get('corner_radius', 40))
-            qr_size = int(request.form.get('qr_size', 300))
-            color_mode = (request.form.get('color_mode') or 'color').strip().lower()
-            colorful = not color_mode.startswith('mono')
-            if not profile_url or not display_name:
-                flash('Please fill in all fields!', 'error')
-                return render_template('social/instagram.html',
-                                       rounded_corners=rounded_corners,
-                                       use_shortlink=use_shortlink,
-                                       color_mode=color_mode)
 
-            qr_image, shortlink, full_url = generate_instagram_qr(
-                profile_url=profile_url,
-                display_name=display_name,
-                use_shortlink=use_shortlink,
-                rounded_corners=rounded_corners,
-                corner_radius=corner_radius,
-                qr_size=qr_size,
-                colorful=colorful
-            )
+@bp.route('/social/linkedin', methods=['GET', 'POST'])
+def linkedin_qr():
+    return _social_page('linkedin')
+
 
-            # Convert to base64 for preview
-            img_io = BytesIO()
-            qr_image.save(img_io, 'PNG', quality=95)
-            img_io.seek(0)
-            qr_base64 = base64.b64encode(img_io.getvalue()).decode()
+def _flag(value):
+    return (value or '').strip().lower() in ('1', 'true', 'on', 'yes')
 
-            return render_template('social/instagram.html',
-                                   qr_image=qr_base64,
-                                   shortlink=shortlink,
-                                   full_url=full_url,
-                                   success=True,
-                                   rounded_corners=rounded_corners,
-                                   use_shortlink=use_shortlink,
-                                   color_mode=color_mode)
 
-        except Exception as e:
-            flash(f'Generation error: {str(e)}', 'error')
+@bp.route('/api/preview')
+def api_preview():
+    """
+    Low-resolution preview for interactive tweaking: the badge is rendered at most
+    ``PREVIEW_MAX_SIZE`` pixels wide with the fast encoder preset, the corner radius
+    scaled to match. The full-size render is only produced on download.
+    """
+    try:
+        platform = request.args.get('platform')
+        if platform not in qr_service.supported_platforms:
+            return jsonify({'error': 'Invalid platform'}), 400
 
-    return render_template('social/instagram.html',
-                           rounded_corners=rounded_corners,
-                           use_shortlink=use_shortlink,
-                           color_mode=color_mode)
+        color_mode = (request.args.get('color_mode') or 'color').strip().lower()
+        options = qr_service.options_from_spec({
+            'platform': platform,
+            'profile_url': request.args.get('profile_url'),
+            'display_name': request.args.get('display_name'),
+            'use_shortlink': _flag(request.args.get('use_shortlink')),
+            'rounded_corners': _flag(request.args.get('rounded_corners')),
+            'corner_radius': request.args.get('corner_radius', 40),
+            'qr_size': request.args.get('qr_size', 300),
+            'colorful': not color_mode.startswith('mono'),
+            'error_correction': request.args.get('error_correction'),
+            'compression': 'fast',
+        })
 
+        # Validated at full size above, then scaled down
+        qr_size = options['qr_size']
+        preview_size = min(qr_size, current_app.config['PREVIEW_MAX_SIZE'])
+        options['corner_radius'] = options['corner_radius'] * preview_size // qr_size
+        options['qr_size'] = preview_size
+
+        etag = _etag_for(options)
+        if request.if_none_match.contains(etag):
+            return _not_modified(etag)
+
+        entry = _render_cached(options)
+        response = current_app.response_class(entry.data, mimetype=entry.mimetype)
+        response.headers['X-QR-Full-URL'] = _header_safe(entry.full_url)
+        if entry.shortlink:
+            response.headers['X-QR-Shortlink'] = _header_safe(entry.shortlink)
+        response.set_etag(entry.key)
+        response.cache_control.private = True
+        response.cache_control.max_age = 300
+        return response
+
+    except (RenderOverloaded, RateLimited) as e:
+        return _overloaded(e)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
 
-@bp.route('/social/linkedin', methods=['GET', 'POST'])
-def linkedin_qr():
-    rounded_corners = False
-    use_shortlink = False
-    color_mode = 'color'
 
-    if request.method == 'POST':
-        try:
-            profile_url = request.form.get('profile_url', '').strip()
-            display_name = request.form.get('display_name', '').strip()
-            use_shortlink = 'use_shortlink' in request.form
-            rounded_corners = 'rounded_corners' in request.form
-            corner_radius = int(request.form.get('corner_radius', 40))
-            qr_size = int(request.form.get('qr_size', 300))
+@bp.route('/qr/<token>.png')
+def preview_image(token):
+    """Serves a previewed image by its token, from the render cache"""
+    try:
+        options = _load_preview(token)
+        etag = _etag_for(options)
+        if request.if_none_match.contains(etag):
+            return _not_modified(etag)
+        entry = _render_cached(options)
+    except InvalidPreviewToken as e:
+        return f"Error: {str(e)}", 404
+    except (RenderOverloaded, RateLimited) as e:
+        return _overloaded(e, as_json=False)
+
+    response = current_app.response_class(entry.data, mimetype=entry.mimetype)
+    response.set_etag(entry.key)
+    response.cache_control.private = True
+    response.cache_control.max_age = current_app.extensions['preview_tokens'].max_age
+    return _no_referrer(response)
+
+
+@bp.route('/download/<platform>', methods=['POST'])
+def download_qr(platform):
+    try:
+        if platform not in qr_service.supported_platforms:
+            return "Invalid platform", 400
+
+        token = request.form.get('token')
+        if token:
+            # The previewed render, served from the render cache
+            options = _load_preview(token, platform)
+            display_name = options['display_name']
+        else:
             color_mode = (request.form.get('color_mode') or 'color').strip().lower()
-            colorful = not color_mode.startswith('mono')
+            options = qr_service.options_from_spec({
+                'platform': platform,
+                'profile_url': request.form.get('profile_url'),
+                'display_name': request.form.get('display_name'),
+                'use_shortlink': request.form.get('use_shortlink') == 'true',
+                'rounded_corners': request.form.get('rounded_corners') == 'true',
+                'corner_radius': request.form.get('corner_radius', 40),
+                'qr_size': request.form.get('qr_size', 300),
+                'colorful': not color_mode.startswith('mono'),
+                'error_correction': request.form.get('error_correction'),
+                'image_format': request.form.get('image_format'),
+                'compression': request.form.get('compression'),
+                'palette': request.form.get('palette') == 'true',
+            })
+            display_name = options['display_name']
+
+        etag = _etag_for(options)
+        if request.if_none_match.contains(etag):
+            return _not_modified(etag)
+
+        entry = _render_cached(options)
+        extension = FILE_EXTENSIONS[options['image_format']]
+        filename = f"qr_{platform}_{display_name.replace(' ', '_')}.{extension}"
+
+        response = send_file(
+            BytesIO(entry.data),
+            mimetype=entry.mimetype,
+            as_attachment=True,
+            download_name=filename,
+            etag=False
+        )
+        response.set_etag(entry.key)
+        return response
+
+    except (RenderOverloaded, RateLimited) as e:
+        return _overloaded(e, as_json=False)
+    except RenderTooExpensive as e:
+        return _too_expensive(e, as_json=False)
+    except ValueError as e:
+        return f"Error: {str(e)}", 400
+    except Exception as e:
+        return f"Error: {str(e)}", 500
 
-            if not profile_url or not display_name:
-                flash('Please fill in all fields!', 'error')
-                return render_template('social/linkedin.html',
-                                       rounded_corners=rounded_corners,
-                                       use_shortlink=use_shortlink,
-                                       color_mode=color_mode)
 
-            qr_image, shortlink, full_url = generate_linkedin_qr(
-                profile_url=profile_url,
-                display_name=display_name,
-                use_shortlink=use_shortlink,
-                rounded_corners=rounded_corners,
-                corner_radius=corner_radius,
-                qr_size=qr_size,
-                colorful=colorful
-            )
+@bp.route('/api/generate', methods=['POST'])
+def api_generate():
+    """API endpoint for QR generation, returning JSON or raw image bytes"""
+    try:
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            return jsonify({'error': 'Request body must be a JSON object'}), 400
 
-            # Convert to base64 for preview
-            img_io = BytesIO()
-            qr_image.save(img_io, 'PNG', quality=95)
-            img_io.seek(0)
-            qr_base64 = base64.b64encode(img_io.getvalue()).decode()
+        if data.get('platform') not in qr_service.supported_platforms:
+            return jsonify({'error': 'Invalid platform'}), 400
 
-            return render_template('social/linkedin.html',
-                                   qr_image=qr_base64,
-                                   shortlink=shortlink,
-                                   full_url=full_url,
-                                   success=True,
-                                   rounded_corners=rounded_corners,
-                                   use_shortlink=use_shortlink,
-                                   color_mode=color_mode)
+        # Same validation as batch items and jobs
+        options = qr_service.options_from_spec(data)
 
-        except Exception as e:
-            flash(f'Generation error: {str(e)}', 'error')
+        # Raw image on request, JSON with a data URL otherwise (and by default)
+        mimetype = OUTPUT_FORMATS[options['image_format']]
+        output = request.args.get('format') or data.get('format')
+        binary = output == 'binary' or (
+            output is None and
+            request.accept_mimetypes.best_match(['application/json', mimetype]) == mimetype
+        )
 
-    return render_template('social/linkedin.html',
-                           rounded_corners=rounded_corners,
-                           use_shortlink=use_shortlink,
-                           color_mode=color_mode)
+        etag = _etag_for(options)
+        if not binary:
+            etag = f"{etag}-json"
+        if request.if_none_match.contains(etag):
+            response = _not_modified(etag)
+            response.vary.add('Accept')
+            return response
+
+        entry = _render_cached(options)
+
+        if binary:
+            response = current_app.response_class(entry.data, mimetype=entry.mimetype)
+            response.headers['X-QR-Full-URL'] = _header_safe(entry.full_url)
+            if entry.shortlink:
+                response.headers['X-QR-Shortlink'] = _header_safe(entry.shortlink)
+        else:
+            qr_base64 = base64.b64encode(entry.data).decode()
+            response = jsonify({
+                'success': True,
+                'qr_image': f"data:{entry.mimetype};base64,{qr_base64}",
+                'shortlink': entry.shortlink,
+                'full_url': entry.full_url
+            })
+
+        response.set_etag(etag)
+        response.vary.add('Accept')
+        return response
+
+    except (RenderOverloaded, RateLimited) as e:
+        return _overloaded(e)
+    except RenderTooExpensive as e:
+        return _too_expensive(e)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
 
 
-@bp.route('/download/<platform>', methods=['POST'])
-def download_qr(platform):
+@bp.route('/api/generate/batch', methods=['POST'])
+def api_generate_batch():
+    """Batch API endpoint: renders a list of specs in parallel, as ZIP, JSON or NDJSON"""
     try:
-        profile_url = request.form.get('profile_url')
-        display_name = request.form.get('display_name')
-        use_shortlink = request.form.get('use_shortlink') == 'true'
-        rounded_corners = request.form.get('rounded_corners') == 'true'
-        corner_radius = int(request.form.get('corner_radius', 40))
-        qr_size = int(request.form.get('qr_size', 300))
-        color_mode = (request.form.get('color_mode') or 'color').strip().lower()
-        colorful = not color_mode.startswith('mono')
-
-        if platform == 'facebook':
-            qr_image, shortlink, full_url = generate_facebook_qr(
-                profile_url=profile_url,
-                display_name=display_name,
-                use_shortlink=use_shortlink,
-                rounded_corners=rounded_corners,
-                corner_radius=corner_radius,
-                qr_size=qr_size,
-                colorful=colorful
-            )
-        elif platform == 'instagram':
-            qr_image, shortlink, full_url = generate_instagram_qr(
-                profile_url=profile_url,
-                display_name=display_name,
-                use_shortlink=use_shortlink,
-                rounded_corners=rounded_corners,
-                corner_radius=corner_radius,
-                qr_size=qr_size,
-                colorful=colorful
-            )
-        elif platform == 'linkedin':
-            qr_image, shortlink, full_url = generate_linkedin_qr(
-                profile_url=profile_url,
-                display_name=display_name,
-                use_shortlink=use_shortlink,
-                rounded_corners=rounded_corners,
-                corner_radius=corner_radius,
-                qr_size=qr_size,
-                colorful=colorful
-            )
+        data = request.get_json(silent=True)
+        if isinstance(data, list):
+            items = data
+            output = request.args.get('format', 'zip')
+            stream = request.args.get('stream') in ('1', 'true')
+        elif isinstance(data, dict):
+            items = data.get('items')
+            output = data.get('format') or request.args.get('format', 'zip')
+            stream = (_flag_option('stream', data.get('stream', False))
+                      or request.args.get('stream') in ('1', 'true'))
         else:
-            return "Invalid platform", 400
+            return jsonify({'error': 'Request body must be a JSON array or object'}), 400
+
+        if not isinstance(items, list):
+            return jsonify({'error': 'Expected a list of items'}), 400
+        if output not in ('zip', 'json', 'ndjson'):
+            return jsonify({'error': 'Invalid format'}), 400
+
+        # NDJSON is always streamed; JSON is a single document and never is
+        stream = output == 'ndjson' or (stream and output == 'zip')
+        max_items = current_app.config['BATCH_STREAM_MAX_ITEMS' if stream else 'BATCH_MAX_ITEMS']
+        if len(items) > max_items:
+            return jsonify({'error': f"At most {max_items} items per batch"}), 413
+
+        _charge(estimate_batch_cost(items))
+        batch_renderer = current_app.extensions['batch_renderer']
+
+        if stream:
+            results = batch_renderer.render_iter(items, current_app.config['BATCH_MAX_IN_FLIGHT'])
+            if output == 'ndjson':
+                return Response(stream_ndjson(results), mimetype='application/x-ndjson')
+            return Response(stream_zip(results), mimetype='application/zip', headers={
+                'Content-Disposition': 'attachment; filename=qr_batch.zip'
+            })
 
-        img_io = BytesIO()
-        qr_image.save(img_io, 'PNG', quality=95)
-        img_io.seek(0)
+        results = batch_renderer.render(items)
 
-        filename = f"qr_{platform}_{display_name.replace(' ', '_')}.png"
+        if output == 'json':
+            return jsonify([result_payload(index, result) for index, result in enumerate(results)])
 
         return send_file(
-            img_io,
-            mimetype='image/png',
+            BytesIO(build_zip(results)),
+            mimetype='application/zip',
             as_attachment=True,
-            download_name=filename
+            download_name='qr_batch.zip'
         )
 
+    except RateLimited as e:
+        return _overloaded(e)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
-        return f"Error: {str(e)}", 500
+        return jsonify({'error': str(e)}), 500
 
 
-@bp.route('/api/generate', methods=['POST'])
-def api_generate():
-    """API endpoint for QR generation"""
+@bp.route('/api/jobs', methods=['POST'])
+def api_submit_job():
+    """Queues a spec or a list of specs for background rendering and returns its job id"""
     try:
-        data = request.get_json()
-        platform = data.get('platform')
-        profile_url = data.get('profile_url')
-        display_name = data.get('display_name')
-        use_shortlink = data.get('use_shortlink', False)
-        rounded_corners = data.get('rounded_corners', False)
-        corner_radius = data.get('corner_radius', 40)
-        qr_size = data.get('qr_size', 300)
-        colorful = data.get('colorful', True)
-
-        if platform == 'facebook':
-            qr_image, shortlink, full_url = generate_facebook_qr(
-                profile_url=profile_url,
-                display_name=display_name,
-                use_shortlink=use_shortlink,
-                rounded_corners=rounded_corners,
-                corner_radius=corner_radius,
-                qr_size=qr_size,
-                colorful=colorful
-            )
-        elif platform == 'instagram':
-            qr_image, shortlink, full_url = generate_instagram_qr(
-                profile_url=profile_url,
-                display_name=display_name,
-                use_shortlink=use_shortlink,
-                rounded_corners=rounded_corners,
-                corner_radius=corner_radius,
-                qr_size=qr_size,
-                colorful=colorful
-            )
-        elif platform == 'linkedin':
-            qr_image, shortlink, full_url = generate_linkedin_qr(
-                profile_url=profile_url,
-                display_name=display_name,
-                use_shortlink=use_shortlink,
-                rounded_corners=rounded_corners,
-                corner_radius=corner_radius,
-                qr_size=qr_size,
-                colorful=colorful
-            )
-        else:
-            return jsonify({'error': 'Invalid platform'}), 400
-
-        # Convert to base64
-        img_io = BytesIO()
-        qr_image.save(img_io, 'PNG')
-        img_io.seek(0)
-        qr_base64 = base64.b64encode(img_io.getvalue()).decode()
-
-        return jsonify({
-            'success': True,
-            'qr_image': f"data:image/png;base64,{qr_base64}",
-            'shortlink': shortlink,
-            'full_url': full_url
+        data = request.get_json(silent=True)
+        if not isinstance(data, (dict, list)):
+            return jsonify({'error': 'Request body must be a JSON array or object'}), 400
+        single = isinstance(data, dict) and 'items' not in data
+        items = [data] if single else (data if isinstance(data, list) else data.get('items'))
+
+        if not isinstance(items, list) or not items:
+            return jsonify({'error': 'Expected a spec or a non-empty list of items'}), 400
+        max_items = current_app.config['JOBS_MAX_ITEMS']
+        if len(items) > max_items:
+            return jsonify({'error': f"At most {max_items} items per job"}), 413
+
+        _charge(estimate_batch_cost(items))
+        runner = current_app.extensions['job_runner']
+        job_id = runner.store.submit(items, single)
+        runner.ensure_started()
+        runner.notify()
+
+        status_url = url_for('main.api_job_status', job_id=job_id)
+        response = jsonify({
+            'job_id': job_id,
+            'status': 'queued',
+            'status_url': status_url,
+            'result_url': url_for('main.api_job_result', job_id=job_id),
         })
+        response.status_code = 202
+        response.headers['Location'] = status_url
+        return response
 
+    except RateLimited as e:
+        return _overloaded(e)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
+
+
+@bp.route('/api/jobs/<job_id>')
+def api_job_status(job_id):
+    """Reports a job's state and progress"""
+    runner = current_app.extensions['job_runner']
+    # Jobs queued before a restart are picked up once someone polls
+    runner.ensure_started()
+    job = runner.store.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown or expired job'}), 404
+
+    payload = {
+        'job_id': job_id,
+        'status': job['status'],
+        'total': job['total'],
+        'completed': job['completed'],
+        'failed': job['failed'],
+        'created': job['created'],
+        'expires': job['expires'],
+    }
+    if job['status'] == DONE:
+        payload['result_url'] = url_for('main.api_job_result', job_id=job_id)
+        payload.update(job['result'] or {})
+    if job['error']:
+        payload['error'] = job['error']
+    return jsonify(payload)
+
+
+@bp.route('/api/jobs/<job_id>/result')
+def api_job_result(job_id):
+    """Sends a finished job's image or ZIP archive"""
+    store = current_app.extensions['job_runner'].store
+    job = store.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown or expired job'}), 404
+    if job['status'] != DONE:
+        response = jsonify({'error': f"Job is {job['status']}", 'status': job['status']})
+        response.status_code = 409
+        response.headers['Retry-After'] = '1'
+        return response
+
+    return send_file(
+        store.artifact_path(job),
+        mimetype=job['mimetype'],
+        as_attachment=True,
+        download_name=job['filename']
+    )
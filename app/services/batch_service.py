@@ -0,0 +1,273 @@
+import base64
+import json
+import os
+import zipfile
+from collections import deque
+from concurrent.futures.process import BrokenProcessPool
+
+from app.services.process_pool import LazyProcessPool
+from app.services.qr_service import QRService
+
+# Error of the items a dying worker took down with it
+WORKER_LOST = "Render worker exited unexpectedly"
+
+
+def render_spec(spec):
+    """
+    Validates and renders a single generation spec. Runs inside the worker
+    processes, so failures are returned as data instead of raised.
+
+    :param spec: A mapping with the same fields ``/api/generate`` reads.
+    :type spec: dict
+    :return: ``{'success': True, 'filename', 'data', 'mimetype', 'shortlink', 'full_url'}`` or
+        ``{'success': False, 'error'}``.
+    :rtype: dict
+    """
+    service = QRService()
+    try:
+        options = service.options_from_spec(spec)
+        data, mimetype, shortlink, full_url = service.render_image(options)
+        return {
+            'success': True,
+            'filename': service.generate_filename(options['platform'], options['display_name'],
+                                                  options['image_format']),
+            'data': data,
+            'mimetype': mimetype,
+            'shortlink': shortlink,
+            'full_url': full_url,
+        }
+
+    except Exception as e:
+        return {'success': False, 'error': str(e)}
+
+
+def estimate_batch_cost(specs):
+    """
+    Sums ``QRService.estimate_cost`` over generation specs. Specs that fail to
+    normalize cost nothing, since they are rejected without rendering.
+
+    :param specs: The generation specs.
+    :type specs: list[dict]
+    :rtype: float
+    """
+    service = QRService()
+    total = 0.0
+    for spec in specs:
+        try:
+            options = service.options_from_spec(spec)
+        except ValueError:
+            continue
+        total += service.estimate_cost(options)
+    return total
+
+
+class BatchRenderer:
+    """
+    Renders lists of generation specs on a pool of worker processes.
+
+    The pool is started on first use and sized to the machine's cores unless
+    ``max_workers`` is given; a forked child process starts its own pool rather
+    than using its parent's. Results keep the order of the submitted specs and
+    every item succeeds or fails on its own: if a worker dies, the items it took
+    down fail with ``WORKER_LOST`` and the rest run on a fresh pool.
+
+    :ivar max_workers: Number of worker processes.
+    :type max_workers: int
+    """
+
+    def __init__(self, max_workers=None):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self._pool = LazyProcessPool(self.max_workers)
+
+    @property
+    def executor(self):
+        return self._pool.executor
+
+    def render(self, specs):
+        """
+        Renders every spec in parallel.
+
+        :param specs: The generation specs.
+        :type specs: list[dict]
+        :return: One result per spec, as returned by ``render_spec``.
+        :rtype: list[dict]
+        """
+        if not specs:
+            return []
+
+        chunksize = max(1, len(specs) // (self.max_workers * 4))
+        executor = self._pool.executor
+        try:
+            return list(executor.map(render_spec, specs, chunksize=chunksize))
+        except BrokenProcessPool:
+            # The finished chunks are lost with the pool; redo the batch item by
+            # item, so only the items a dying worker takes down fail
+            self._pool.discard(executor)
+            return list(self.render_iter(specs))
+
+    def render_iter(self, specs, max_in_flight=None):
+        """
+        Renders specs lazily, yielding results in order as they finish. At most
+        ``max_in_flight`` specs are queued on the pool at any time, so memory stays
+        constant regardless of how many specs are consumed.
+
+        :param specs: Any iterable of generation specs.
+        :type specs: Iterable[dict]
+        :param max_in_flight: Upper bound for submitted but not yet yielded specs;
+            defaults to four per worker.
+        :type max_in_flight: int | None
+        :return: A generator of results, as returned by ``render_spec``.
+        :rtype: Iterator[dict]
+        """
+        max_in_flight = max_in_flight or self.max_workers * 4
+        pending = deque()
+
+        for spec in specs:
+            pending.append(self._submit(spec))
+            if len(pending) >= max_in_flight:
+                yield self._result(*pending.popleft())
+
+        while pending:
+            yield self._result(*pending.popleft())
+
+    def _submit(self, spec):
+        executor = self._pool.executor
+        try:
+            return executor, executor.submit(render_spec, spec)
+        except BrokenProcessPool:
+            # Broke since the last result was collected
+            self._pool.discard(executor)
+            executor = self._pool.executor
+            return executor, executor.submit(render_spec, spec)
+
+    def _result(self, executor, future):
+        try:
+            return future.result()
+        except BrokenProcessPool:
+            self._pool.discard(executor)
+            return {'success': False, 'error': WORKER_LOST}
+
+    def shutdown(self):
+        """Stops the worker processes, if they were started."""
+        self._pool.shutdown()
+
+
+def unique_filename(filename, used):
+    """
+    Returns ``filename`` or a numbered variant of it that is not in ``used``,
+    and records the result.
+
+    :param filename: The preferred file name.
+    :type filename: str
+    :param used: File names already taken; updated in place.
+    :type used: set[str]
+    :rtype: str
+    """
+    stem, dot, ext = filename.rpartition('.')
+    candidate = filename
+    counter = 2
+    while candidate in used:
+        candidate = f"{stem}_{counter}{dot}{ext}"
+        counter += 1
+    used.add(candidate)
+    return candidate
+
+
+class _ChunkWriter:
+    """Write-only, unseekable sink that lets ZipFile stream its output"""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def stream_zip(results):
+    """
+    Packs batch results into a ZIP archive, yielding the archive bytes as each
+    entry is written. Failed items are listed in ``errors.txt`` with their
+    position in the batch.
+
+    :param results: Any iterable of results, as produced by ``render_spec``.
+    :type results: Iterable[dict]
+    :return: A generator of archive chunks.
+    :rtype: Iterator[bytes]
+    """
+    sink = _ChunkWriter()
+    used = set()
+    errors = []
+
+    with zipfile.ZipFile(sink, 'w', zipfile.ZIP_STORED) as zf:
+        for index, result in enumerate(results):
+            if result['success']:
+                zf.writestr(unique_filename(result['filename'], used), result['data'])
+            else:
+                errors.append(f"{index}: {result['error']}")
+
+            chunk = sink.drain()
+            if chunk:
+                yield chunk
+
+        if errors:
+            zf.writestr('errors.txt', '\n'.join(errors) + '\n')
+
+    yield sink.drain()
+
+
+def build_zip(results):
+    """
+    Packs batch results into a ZIP archive in memory.
+
+    :param results: Results as returned by ``BatchRenderer.render``.
+    :type results: list[dict]
+    :return: The archive bytes.
+    :rtype: bytes
+    """
+    return b''.join(stream_zip(results))
+
+
+def result_payload(index, result):
+    """
+    Converts a batch result into its JSON representation.
+
+    :param index: Position of the item in the batch.
+    :type index: int
+    :param result: A result as returned by ``render_spec``.
+    :type result: dict
+    :rtype: dict
+    """
+    if not result['success']:
+        return {'index': index, 'success': False, 'error': result['error']}
+
+    qr_base64 = base64.b64encode(result['data']).decode()
+    return {
+        'index': index,
+        'success': True,
+        'filename': result['filename'],
+        'qr_image': f"data:{result['mimetype']};base64,{qr_base64}",
+        'shortlink': result['shortlink'],
+        'full_url': result['full_url']
+    }
+
+
+def stream_ndjson(results):
+    """
+    Serializes batch results as newline-delimited JSON, one line per item.
+
+    :param results: Any iterable of results, as produced by ``render_spec``.
+    :type results: Iterable[dict]
+    :return: A generator of encoded lines.
+    :rtype: Iterator[bytes]
+    """
+    for index, result in enumerate(results):
+        yield (json.dumps(result_payload(index, result)) + '\n').encode('utf-8')
@@ -0,0 +1,353 @@
+"""
+Asynchronous render jobs backed by a local SQLite queue.
+
+``JobStore`` keeps job state in ``jobs.sqlite3`` and finished artifacts as
+files next to it, so any process sharing the directory can submit, run and
+serve jobs. ``JobRunner`` is a background thread that claims queued jobs one at
+a time, renders them on a ``BatchRenderer`` process pool and removes jobs once
+their results have outlived the TTL.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+from app.services.batch_service import BatchRenderer, stream_zip
+from app.utils.file_utils import write_atomic
+
+# Job states
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    spec TEXT NOT NULL,
+    total INTEGER NOT NULL,
+    completed INTEGER NOT NULL DEFAULT 0,
+    failed INTEGER NOT NULL DEFAULT 0,
+    created REAL NOT NULL,
+    updated REAL NOT NULL,
+    expires REAL,
+    artifact TEXT,
+    mimetype TEXT,
+    filename TEXT,
+    result TEXT,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_status_created ON jobs (status, created);
+"""
+
+_FIELDS = ('id', 'status', 'kind', 'total', 'completed', 'failed', 'created', 'updated',
+           'expires', 'artifact', 'mimetype', 'filename', 'result', 'error')
+
+
+class JobStore:
+    """
+    SQLite job table plus an artifact directory.
+
+    A connection is opened per call, which keeps the store safe to use from any
+    thread or process; SQLite's own locking makes claiming a job atomic.
+
+    :ivar directory: Directory holding the database and the artifacts.
+    :type directory: str
+    :ivar ttl: Seconds finished jobs and their artifacts are kept.
+    :type ttl: float
+    """
+
+    def __init__(self, directory, ttl=3600):
+        self.directory = directory
+        self.ttl = ttl
+        self.artifact_dir = os.path.join(directory, 'artifacts')
+        os.makedirs(self.artifact_dir, exist_ok=True)
+        self._path = os.path.join(directory, 'jobs.sqlite3')
+
+        with self._connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.executescript(_SCHEMA)
+
+    def _connect(self):
+        conn = sqlite3.connect(self._path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        return _Connection(conn)
+
+    def submit(self, specs, single):
+        """
+        Queues a job.
+
+        :param specs: The generation specs.
+        :type specs: list[dict]
+        :param single: Whether the job is one spec whose artifact is the image itself,
+            rather than a ZIP archive.
+        :type single: bool
+        :return: The new job id.
+        :rtype: str
+        """
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                'INSERT INTO jobs (id, status, kind, spec, total, created, updated) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (job_id, QUEUED, 'single' if single else 'batch', json.dumps(specs),
+                 len(specs), now, now))
+        return job_id
+
+    def get(self, job_id):
+        """
+        Returns a job's state, or None if it does not exist or has expired.
+
+        :rtype: dict | None
+        """
+        with self._connect() as conn:
+            row = conn.execute(f'SELECT {", ".join(_FIELDS)} FROM jobs WHERE id = ?',
+                               (job_id,)).fetchone()
+        if row is None:
+            return None
+
+        job = dict(row)
+        if job['expires'] is not None and job['expires'] < time.time():
+            return None
+        job['result'] = json.loads(job['result']) if job['result'] else None
+        return job
+
+    def artifact_path(self, job):
+        return os.path.join(self.artifact_dir, job['artifact']) if job.get('artifact') else None
+
+    def claim(self):
+        """
+        Atomically moves the oldest queued job to ``running``.
+
+        :return: The job id and its specs, or None if the queue is empty.
+        :rtype: tuple[str, list[dict]] | None
+        """
+        with self._connect() as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            row = conn.execute('SELECT id, spec FROM jobs WHERE status = ? ORDER BY created LIMIT 1',
+                               (QUEUED,)).fetchone()
+            if row is None:
+                conn.execute('COMMIT')
+                return None
+            conn.execute('UPDATE jobs SET status = ?, updated = ? WHERE id = ?',
+                         (RUNNING, time.time(), row['id']))
+            conn.execute('COMMIT')
+        return row['id'], json.loads(row['spec'])
+
+    def progress(self, job_id, completed, failed):
+        with self._connect() as conn:
+            conn.execute('UPDATE jobs SET completed = ?, failed = ?, updated = ? WHERE id = ?',
+                         (completed, failed, time.time(), job_id))
+
+    def finish(self, job_id, artifact, mimetype, filename, result):
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                'UPDATE jobs SET status = ?, artifact = ?, mimetype = ?, filename = ?, result = ?, '
+                'updated = ?, expires = ? WHERE id = ?',
+                (DONE, artifact, mimetype, filename, json.dumps(result), now, now + self.ttl, job_id))
+
+    def fail(self, job_id, error):
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute('UPDATE jobs SET status = ?, error = ?, updated = ?, expires = ? WHERE id = ?',
+                         (FAILED, error, now, now + self.ttl, job_id))
+
+    def requeue_stale(self, older_than):
+        """
+        Returns ``running`` jobs not updated for ``older_than`` seconds to the queue,
+        e.g. after the process running them died.
+
+        :return: The number of requeued jobs.
+        :rtype: int
+        """
+        with self._connect() as conn:
+            cursor = conn.execute(
+                'UPDATE jobs SET status = ?, completed = 0, failed = 0 WHERE status = ? AND updated < ?',
+                (QUEUED, RUNNING, time.time() - older_than))
+            return cursor.rowcount
+
+    def purge_expired(self):
+        """
+        Deletes expired jobs and their artifacts, along with temp files that a
+        runner killed mid-write left behind for longer than the TTL.
+
+        :return: The number of deleted jobs.
+        :rtype: int
+        """
+        now = time.time()
+        with self._connect() as conn:
+            rows = conn.execute('SELECT id, artifact FROM jobs WHERE expires < ?', (now,)).fetchall()
+            conn.execute('DELETE FROM jobs WHERE expires < ?', (now,))
+
+        for row in rows:
+            if row['artifact']:
+                try:
+                    os.remove(os.path.join(self.artifact_dir, row['artifact']))
+                except FileNotFoundError:
+                    pass
+
+        for entry in os.scandir(self.artifact_dir):
+            try:
+                if entry.name.endswith('.part') and now - entry.stat().st_mtime > self.ttl:
+                    os.remove(entry.path)
+            except OSError:
+                pass
+        return len(rows)
+
+    def stats(self):
+        """
+        Returns the number of retained jobs per status.
+
+        :rtype: dict
+        """
+        with self._connect() as conn:
+            rows = conn.execute('SELECT status, COUNT(*) AS n FROM jobs GROUP BY status').fetchall()
+        counts = {status: 0 for status in (QUEUED, RUNNING, DONE, FAILED)}
+        counts.update({row['status']: row['n'] for row in rows})
+        return counts
+
+
+class _Connection:
+    """Closes the wrapped sqlite3 connection when the ``with`` block ends"""
+
+    def __init__(self, conn):
+        self._conn = conn
+
+    def __enter__(self):
+        return self._conn
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None and self._conn.in_transaction:
+            self._conn.execute('ROLLBACK')
+        self._conn.close()
+        return False
+
+
+class JobRunner:
+    """
+    Background thread that works through the job queue.
+
+    The thread is started by ``ensure_started``, which is safe to call repeatedly
+    and restarts the thread in a forked child process, where threads do not
+    survive. Jobs are rendered on their own ``BatchRenderer`` pool, so they never
+    compete with interactive renders for workers.
+
+    :ivar store: The job store to serve.
+    :type store: JobStore
+    :ivar poll_interval: Seconds to wait when the queue is empty.
+    :type poll_interval: float
+    """
+
+    PROGRESS_INTERVAL = 0.5
+
+    def __init__(self, store, max_workers=None, poll_interval=1.0, max_in_flight=None):
+        self.store = store
+        self.poll_interval = poll_interval
+        self.max_in_flight = max_in_flight
+        self.renderer = BatchRenderer(max_workers=max_workers)
+        self._thread = None
+        self._pid = None
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+
+    def ensure_started(self):
+        """Starts the worker thread in this process if it is not running."""
+        with self._lock:
+            if self._pid == os.getpid() and self._thread is not None and self._thread.is_alive():
+                return
+            # The renderer starts its own pool in a forked child
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='qr-job-runner', daemon=True)
+            self._thread.start()
+
+    def notify(self):
+        """Wakes the runner after a job was submitted."""
+        self._wake.set()
+
+    def _run(self):
+        last_purge = 0.0
+        while True:
+            now = time.time()
+            if now - last_purge > 60:
+                last_purge = now
+                self.store.requeue_stale(max(300.0, self.poll_interval * 10))
+                self.store.purge_expired()
+
+            claimed = self.store.claim()
+            if claimed is None:
+                self._wake.wait(self.poll_interval)
+                self._wake.clear()
+                continue
+
+            job_id, specs = claimed
+            try:
+                self.run_job(job_id, specs)
+            except Exception as e:
+                self.store.fail(job_id, str(e))
+
+    def run_job(self, job_id, specs):
+        """
+        Renders a claimed job and records its artifact.
+
+        :param job_id: The job id returned by ``JobStore.claim``.
+        :type job_id: str
+        :param specs: The job's generation specs.
+        :type specs: list[dict]
+        """
+        job = self.store.get(job_id)
+        results = self._tracked(job_id, self.renderer.render_iter(specs, self.max_in_flight))
+
+        if job['kind'] == 'single':
+            result, = results
+            if not result['success']:
+                self.store.fail(job_id, result['error'])
+                return
+
+            extension = result['filename'].rpartition('.')[2]
+            artifact = f"{job_id}.{extension}"
+            self._write(artifact, [result['data']])
+            self.store.finish(job_id, artifact, result['mimetype'], result['filename'], {
+                'shortlink': result['shortlink'],
+                'full_url': result['full_url'],
+            })
+            return
+
+        errors = []
+
+        def collect(iterable):
+            for index, result in enumerate(iterable):
+                if not result['success']:
+                    errors.append({'index': index, 'error': result['error']})
+                yield result
+
+        artifact = f"{job_id}.zip"
+        self._write(artifact, stream_zip(collect(results)))
+        self.store.finish(job_id, artifact, 'application/zip', 'qr_batch.zip', {'errors': errors})
+
+    def _tracked(self, job_id, results):
+        """Passes results through, recording progress at most every PROGRESS_INTERVAL"""
+        completed = failed = 0
+        last_update = time.monotonic()
+        for result in results:
+            completed += 1
+            failed += not result['success']
+            if time.monotonic() - last_update >= self.PROGRESS_INTERVAL:
+                self.store.progress(job_id, completed, failed)
+                last_update = time.monotonic()
+            yield result
+        self.store.progress(job_id, completed, failed)
+
+    def _write(self, artifact, chunks):
+        # A crash never leaves a truncated artifact behind, and a second runner
+        # handed the same stale job writes to its own temp file
+        write_atomic(os.path.join(self.store.artifact_dir, artifact), chunks)
+
+    def shutdown(self):
+        """Stops the render pool; the daemon thread ends with the process."""
+        self.renderer.shutdown()
@@ -0,0 +1,187 @@
+"""
+In-process request and render-stage metrics, exposed in the Prometheus text
+format.
+
+Each request to the blueprint runs under a ``StageTimer`` (see
+``app/utils/timing.py``). When it finishes, the stage timings are added to
+per-stage, per-platform histograms, and the request itself is counted by
+endpoint and status. Cache counters are read from the caches when
+``/metrics`` is scraped.
+"""
+import bisect
+import threading
+
+# Histogram bucket upper bounds in seconds
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+PREFIX = 'qrweaver'
+
+
+class Histogram:
+    """Cumulative-bucket histogram keyed by a tuple of label values"""
+
+    def __init__(self, name, help_text, label_names, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = tuple(buckets)
+        self._series = {}
+
+    def observe(self, labels, value):
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        series[0][bisect.bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for labels, (counts, total, count) in sorted(self._series.items()):
+            label_text = _labels(self.label_names, labels)
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                lines.append(f'{self.name}_bucket{_labels(self.label_names + ("le",), labels + (le,))} '
+                             f'{cumulative}')
+            lines.append(f"{self.name}_sum{label_text} {total!r}")
+            lines.append(f"{self.name}_count{label_text} {count}")
+        return lines
+
+
+class Counter:
+    """Monotonic counter keyed by a tuple of label values"""
+
+    def __init__(self, name, help_text, label_names):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self._values = {}
+
+    def inc(self, labels, amount=1):
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        for labels, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_labels(self.label_names, labels)} {value}")
+        return lines
+
+
+class Metrics:
+    """
+    Registry for the request and stage metrics of one application.
+
+    Recording is guarded by a single lock; an observation is a dictionary lookup
+    and a few integer updates, so contention is negligible next to a render.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self._lock = threading.Lock()
+        self.stage_seconds = Histogram(
+            f'{PREFIX}_stage_seconds', 'Time spent per render stage.', ('stage', 'platform'), buckets)
+        self.request_seconds = Histogram(
+            f'{PREFIX}_request_seconds', 'Request handling time.', ('endpoint',), buckets)
+        self.requests = Counter(
+            f'{PREFIX}_requests_total', 'Handled requests.', ('endpoint', 'status'))
+        self.stage_errors = Counter(
+            f'{PREFIX}_stage_errors_total', 'Renders that failed, by the stage that raised.',
+            ('stage', 'platform'))
+        self.rejections = Counter(
+            f'{PREFIX}_render_rejected_total', 'Renders turned away under overload.', ('reason',))
+
+    def record_request(self, endpoint, status, seconds, platform=None, timer=None):
+        """
+        Records one finished request.
+
+        :param endpoint: The Flask endpoint name, or ``"unknown"``.
+        :type endpoint: str
+        :param status: The HTTP status code.
+        :type status: int
+        :param seconds: The time spent handling the request.
+        :type seconds: float
+        :param platform: The platform that was rendered, if any.
+        :type platform: str | None
+        :param timer: The request's ``StageTimer``, if stages were recorded.
+        :type timer: app.utils.timing.StageTimer | None
+        """
+        platform = platform or 'none'
+        with self._lock:
+            self.request_seconds.observe((endpoint,), seconds)
+            self.requests.inc((endpoint, str(status)))
+            if timer is not None:
+                for stage, stage_seconds in timer.stages.items():
+                    self.stage_seconds.observe((stage, platform), stage_seconds)
+                if timer.failed_stage is not None:
+                    self.stage_errors.inc((timer.failed_stage, platform))
+
+    def record_rejection(self, reason):
+        """
+        Counts a render that was turned away.
+
+        :param reason: Why, e.g. ``"queue_full"`` or ``"timeout"``.
+        :type reason: str
+        """
+        with self._lock:
+            self.rejections.inc((reason,))
+
+    def render(self, caches=None, gauges=None):
+        """
+        Renders every metric in the Prometheus text exposition format.
+
+        :param caches: Cache name to ``stats()`` dictionary; their ``hits`` and
+            ``misses`` become counters and their ``entries`` a gauge.
+        :type caches: dict[str, dict] | None
+        :param gauges: Additional point-in-time values, by metric name without prefix.
+        :type gauges: dict[str, float] | None
+        :rtype: str
+        """
+        with self._lock:
+            lines = (self.request_seconds.render() + self.requests.render() +
+                     self.stage_seconds.render() + self.stage_errors.render() +
+                     self.rejections.render())
+
+        for metric, value in sorted((gauges or {}).items()):
+            name = f'{PREFIX}_{metric}'
+            lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name} {value}")
+
+        caches = caches or {}
+        for metric, kind, field in (('cache_hits_total', 'counter', 'hits'),
+                                    ('cache_misses_total', 'counter', 'misses'),
+                                    ('cache_entries', 'gauge', 'entries')):
+            name = f'{PREFIX}_{metric}'
+            lines.append(f"# TYPE {name} {kind}")
+            for cache, stats in sorted(caches.items()):
+                if field in stats:
+                    lines.append(f'{name}{_labels(("cache",), (cache,))} {stats[field]}')
+
+        return '\n'.join(lines) + '\n'
+
+
+def server_timing(timer, total=None):
+    """
+    Formats stage timings as a ``Server-Timing`` header value (milliseconds).
+
+    :param timer: The request's ``StageTimer``.
+    :type timer: app.utils.timing.StageTimer
+    :param total: Total request time in seconds, added as ``total``.
+    :type total: float | None
+    :rtype: str
+    """
+    entries = [f"{stage};dur={seconds * 1000:.3f}" for stage, seconds in timer.stages.items()]
+    if total is not None:
+        entries.append(f"total;dur={total * 1000:.3f}")
+    return ', '.join(entries)
+
+
+def _labels(names, values):
+    if not names:
+        return ''
+    pairs = ','.join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+    return '{' + pairs + '}'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
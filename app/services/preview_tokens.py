@@ -0,0 +1,52 @@
+from itsdangerous import BadSignature, URLSafeTimedSerializer
+
+
+class InvalidPreviewToken(ValueError):
+    """Raised for preview tokens that were tampered with or have expired"""
+
+
+class PreviewTokens:
+    """
+    Issues short-lived, signed tokens for rendered previews.
+
+    A token carries the normalized options of a render, signed with the app's
+    secret key. The image itself stays in the ``RenderCache`` under the key of
+    those options, so any server process can resolve a token and serve the stored
+    bytes, re-rendering only if the entry was evicted in the meantime.
+
+    Tokens are signed, not encrypted: anyone holding one can read the options,
+    including the profile URL and display name, and they end up in access logs
+    wherever the token is part of a URL. Loaded options must still be validated,
+    since anyone who knows the secret key can sign arbitrary ones.
+
+    :ivar max_age: Seconds a token stays valid.
+    :type max_age: int
+    """
+
+    def __init__(self, secret_key, max_age=3600):
+        self.max_age = max_age
+        self._serializer = URLSafeTimedSerializer(secret_key, salt='qr-preview')
+
+    def issue(self, options):
+        """
+        Creates a token for normalized options.
+
+        :param options: Options as returned by ``QRService.normalize_options``.
+        :type options: dict
+        :rtype: str
+        """
+        return self._serializer.dumps(options)
+
+    def load(self, token):
+        """
+        Returns the options a token was issued for.
+
+        :param token: A token returned by ``issue``.
+        :type token: str
+        :rtype: dict
+        :raises InvalidPreviewToken: If the token is invalid or has expired.
+        """
+        try:
+            return self._serializer.loads(token, max_age=self.max_age)
+        except BadSignature as e:
+            raise InvalidPreviewToken("Preview has expired, please generate it again") from e
@@ -0,0 +1,67 @@
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+
+class LazyProcessPool:
+    """
+    A ``ProcessPoolExecutor`` that is started on first use in the process that
+    uses it and replaced once it breaks.
+
+    A process forked from one that already had a pool starts its own instead of
+    sharing the parent's. When a worker dies, e.g. at the hands of the OOM killer,
+    the executor raises ``BrokenProcessPool`` for everything submitted to it;
+    ``discard`` drops such an executor so the next use starts a fresh one.
+
+    :ivar max_workers: Number of worker processes.
+    :type max_workers: int
+    """
+
+    def __init__(self, max_workers, initializer=None, initargs=()):
+        self.max_workers = max_workers
+        self.initializer = initializer
+        self.initargs = initargs
+        self.restarts = 0
+        self._executor = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    @property
+    def executor(self):
+        """The executor of this process, started if there is none yet."""
+        pid = os.getpid()
+        executor = self._executor
+        if executor is None or self._pid != pid:
+            with self._lock:
+                if self._executor is None or self._pid != pid:
+                    # After a fork the parent's pool belongs to the parent
+                    self._executor = ProcessPoolExecutor(max_workers=self.max_workers,
+                                                         initializer=self.initializer,
+                                                         initargs=self.initargs)
+                    self._pid = pid
+                executor = self._executor
+        return executor
+
+    def discard(self, executor):
+        """
+        Drops a broken executor, so the next use of ``executor`` starts a new one.
+        Does nothing if the pool was already replaced, e.g. by another thread that
+        saw the same failure.
+
+        :param executor: The executor that raised ``BrokenProcessPool``.
+        :type executor: concurrent.futures.ProcessPoolExecutor
+        """
+        with self._lock:
+            if self._executor is not executor:
+                return
+            self._executor = None
+            self.restarts += 1
+        # Reaps what is left of the old workers without waiting for them
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def shutdown(self):
+        """Stops the worker processes, if this process started them."""
+        with self._lock:
+            if self._executor is not None and self._pid == os.getpid():
+                self._executor.shutdown()
+            self._executor = None
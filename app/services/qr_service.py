@@ -1,3 +1,83 @@
+from app.utils.image_encoder import COMPRESSION_LEVELS, FILE_EXTENSIONS, OUTPUT_FORMATS, encode_image
+from app.utils.social_qr import SocialQRGenerator, get_shared_generator
+from app.utils.timing import stage
+
+# Fields of a generation spec, as read by the batch API, jobs and the CLI
+GENERATION_FIELDS = ('platform', 'profile_url', 'display_name', 'use_shortlink',
+                     'rounded_corners', 'corner_radius', 'qr_size', 'colorful',
+                     'error_correction', 'image_format', 'compression', 'palette')
+
+# Options that select the output encoding rather than what is rendered
+ENCODING_OPTIONS = ('image_format', 'compression', 'palette')
+
+# Accepted edge length of the QR code in pixels
+MIN_QR_SIZE = 150
+MAX_QR_SIZE = 4000
+
+# Cost model: pixel passes relative to compositing the badge once. Encoders are
+# weighted by their measured time per pixel against the compose stages.
+CORNER_PASSES = 0.25
+ENCODE_PASSES = {
+    ('png', 'fast'): 0.25,
+    ('png', 'default'): 0.6,
+    ('png', 'max'): 0.8,
+    ('webp', 'fast'): 0.0,
+    ('webp', 'default'): 11.0,
+    ('webp', 'max'): 17.0,
+}
+SVG_COST = 0.1
+# A 300 px PNG with default compression costs 1.0
+_UNIT_PIXEL_PASSES = 300 * (300 + SocialQRGenerator.TEXT_HEIGHT) * (1 + ENCODE_PASSES['png', 'default'])
+
+
+def _text_option(name, value, default):
+    """A stripped string option; None and empty strings give ``default``"""
+    if value is None:
+        return default
+    if not isinstance(value, str):
+        raise ValueError(f"{name} must be a string")
+    return value.strip() or default
+
+
+def _int_option(name, value):
+    """An integer option, also accepted as a decimal string (form and query fields)"""
+    if isinstance(value, str):
+        value = value.strip()
+        if value.lstrip('-').isdigit():
+            return int(value)
+    elif isinstance(value, int) and not isinstance(value, bool):
+        return value
+    elif isinstance(value, float) and value.is_integer():
+        return int(value)
+    raise ValueError(f"{name} must be an integer")
+
+
+def _flag_option(name, value):
+    """A boolean option; JSON 0/1 are accepted, strings are not"""
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, int) and value in (0, 1):
+        return bool(value)
+    raise ValueError(f"{name} must be true or false")
+
+
+class RenderTooExpensive(ValueError):
+    """
+    Raised when a request's estimated cost exceeds what is rendered interactively.
+
+    :ivar cost: The estimated cost.
+    :type cost: float
+    :ivar max_cost: The largest accepted cost.
+    :type max_cost: float
+    """
+
+    def __init__(self, cost, max_cost):
+        super().__init__(f"Request is too expensive to render interactively "
+                         f"(cost {cost:.1f}, limit {max_cost:.1f}); use /api/jobs instead")
+        self.cost = cost
+        self.max_cost = max_cost
+
+
 class QRService:
     """
     Handles QR code service functionalities, including validation of inputs specific
@@ -36,18 +116,17 @@ class QRService:
         if platform not in self.supported_platforms:
             errors.append(f"Unsupported platform: {platform}")
 
-        if not profile_url or not profile_url.strip():
+        if not isinstance(profile_url, str) or not profile_url.strip():
             errors.append("Profile URL is required")
 
-        if not display_name or not display_name.strip():
+        if not isinstance(display_name, str) or not display_name.strip():
             errors.append("Display name is required.")
-
-        if len(display_name) > 50:
+        elif len(display_name.strip()) > 50:
             errors.append("Name must be under 50 characters.")
 
         return errors
 
-    def generate_filename(self, platform, display_name):
+    def generate_filename(self, platform, display_name, image_format='png'):
         """
         Generates a filename for a QR code image by formatting the platform and display
         name into a standardized naming convention. This function ensures the filename
@@ -58,9 +137,187 @@ class QRService:
         :type platform: str
         :param display_name: The display name that identifies the content of the QR code.
         :type display_name: str
+        :param image_format: The output format, which determines the file extension.
+        :type image_format: str
         :return: A formatted filename for the QR code image.
         :rtype: str
         """
         clean_name = ''.join(c for c in display_name if c.isalnum() or c in (' ', '-', '_')).strip()
         clean_name = clean_name.replace(' ', '_')
-        return f"qr_{platform}_{clean_name}.png"
+        return f"qr_{platform}_{clean_name}.{FILE_EXTENSIONS.get(image_format, 'png')}"
+
+    def options_from_spec(self, spec):
+        """
+        Validates a generation spec and normalizes it, for the batch API, jobs and
+        the CLI. The required fields are checked first, so incomplete specs fail
+        with the same messages as the web forms.
+
+        :param spec: A mapping with any of the ``GENERATION_FIELDS``.
+        :type spec: dict
+        :return: Options as returned by ``normalize_options``.
+        :rtype: dict
+        :raises ValueError: If the spec is not a mapping, fails validation or holds
+            an invalid option.
+        """
+        if not isinstance(spec, dict):
+            raise ValueError("Each item must be a JSON object")
+
+        platform = spec.get('platform')
+        if isinstance(platform, str):
+            platform = platform.strip().lower()
+        errors = self.validate_social_input(platform, spec.get('profile_url'), spec.get('display_name'))
+        if errors:
+            raise ValueError('; '.join(errors))
+
+        return self.normalize_options(**{
+            field: spec[field] for field in GENERATION_FIELDS if field in spec
+        })
+
+    def normalize_options(self, platform, profile_url, display_name, use_shortlink=False,
+                          rounded_corners=False, corner_radius=40, qr_size=300, colorful=True,
+                          image_format='png', compression='default', palette=False,
+                          error_correction='H'):
+        """
+        Normalizes generation parameters into the canonical form used for rendering
+        and caching, so equivalent requests map to identical option dictionaries.
+        The corner radius is dropped when rounded corners are disabled, since it
+        has no effect on the output.
+
+        :param platform: The social media platform name.
+        :type platform: str
+        :param profile_url: The URL or handle of the user's profile.
+        :type profile_url: str
+        :param display_name: The text rendered under the QR code.
+        :type display_name: str
+        :param use_shortlink: Whether the QR code should encode the shortlink.
+        :type use_shortlink: bool
+        :param rounded_corners: Whether the final image gets rounded corners.
+        :type rounded_corners: bool
+        :param corner_radius: The corner radius in pixels.
+        :type corner_radius: int
+        :param qr_size: The edge length of the QR code in pixels.
+        :type qr_size: int
+        :param colorful: Whether platform colors are used instead of black.
+        :type colorful: bool
+        :param image_format: The output format, one of ``OUTPUT_FORMATS``.
+        :type image_format: str
+        :param compression: The encoder preset, one of ``COMPRESSION_LEVELS``.
+        :type compression: str
+        :param palette: Whether PNG output is quantized to palette mode.
+        :type palette: bool
+        :param error_correction: ``'L'``, ``'M'``, ``'Q'``, ``'H'`` or ``'auto'`` to
+            pick the lowest level that tolerates the logo.
+        :type error_correction: str
+        :return: The keyword arguments for ``SocialQRGenerator.generate_social_qr``
+            plus the ``ENCODING_OPTIONS``.
+        :rtype: dict
+        :raises ValueError: If an option has the wrong type, the output format,
+            compression preset or error correction level is unknown, or ``qr_size``
+            or ``corner_radius`` is out of range.
+        """
+        platform = _text_option('platform', platform, '').lower()
+        profile_url = _text_option('profile_url', profile_url, '')
+        display_name = _text_option('display_name', display_name, '')
+        image_format = _text_option('image_format', image_format, 'png').lower()
+        compression = _text_option('compression', compression, 'default').lower()
+        error_correction = _text_option('error_correction', error_correction, 'H')
+        error_correction = 'auto' if error_correction.lower() == 'auto' else error_correction.upper()
+        if image_format not in OUTPUT_FORMATS:
+            raise ValueError(f"Unsupported image format: {image_format}")
+        if compression not in COMPRESSION_LEVELS:
+            raise ValueError(f"Unsupported compression: {compression}")
+        if error_correction not in SocialQRGenerator.ERROR_CORRECTION_MODES:
+            raise ValueError(f"Unsupported error correction: {error_correction}")
+
+        qr_size = _int_option('qr_size', qr_size)
+        if not MIN_QR_SIZE <= qr_size <= MAX_QR_SIZE:
+            raise ValueError(f"QR size must be between {MIN_QR_SIZE} and {MAX_QR_SIZE} pixels")
+
+        rounded_corners = _flag_option('rounded_corners', rounded_corners)
+        corner_radius = _int_option('corner_radius', corner_radius) if rounded_corners else 0
+        if not 0 <= corner_radius <= qr_size // 2:
+            raise ValueError(f"Corner radius must be between 0 and {qr_size // 2} pixels")
+
+        return {
+            'platform': platform,
+            'profile_url': profile_url,
+            'display_name': display_name,
+            'use_shortlink': _flag_option('use_shortlink', use_shortlink),
+            'rounded_corners': rounded_corners,
+            'corner_radius': corner_radius,
+            'qr_size': qr_size,
+            'colorful': _flag_option('colorful', colorful),
+            'error_correction': error_correction,
+            'image_format': image_format,
+            'compression': compression,
+            'palette': _flag_option('palette', palette) and image_format == 'png',
+        }
+
+    def estimate_cost(self, options):
+        """
+        Estimates the rendering cost of normalized options: the output pixels times
+        the passes made over them by composition, rounded corners and the encoder,
+        in units of a default 300 px PNG. SVG output does not rasterize and has a
+        small constant cost.
+
+        :param options: Options as returned by ``normalize_options``.
+        :type options: dict
+        :rtype: float
+        """
+        image_format = options.get('image_format', 'png')
+        if image_format == 'svg':
+            return SVG_COST
+
+        qr_size = options['qr_size']
+        passes = 1 + ENCODE_PASSES[image_format, options.get('compression', 'default')]
+        if options['rounded_corners']:
+            passes += CORNER_PASSES
+        return qr_size * (qr_size + SocialQRGenerator.TEXT_HEIGHT) * passes / _UNIT_PIXEL_PASSES
+
+    def check_cost(self, options, max_cost):
+        """
+        Rejects options whose estimated cost exceeds ``max_cost``.
+
+        :param options: Options as returned by ``normalize_options``.
+        :type options: dict
+        :param max_cost: The largest accepted cost, or None for no limit.
+        :type max_cost: float | None
+        :return: The estimated cost.
+        :rtype: float
+        :raises RenderTooExpensive: If the cost is above the limit.
+        """
+        cost = self.estimate_cost(options)
+        if max_cost is not None and cost > max_cost:
+            raise RenderTooExpensive(cost, max_cost)
+        return cost
+
+    def render_image(self, options, generator=None):
+        """
+        Renders a QR code from normalized options and encodes it in the requested
+        output format.
+
+        :param options: Options as returned by ``normalize_options``.
+        :type options: dict
+        :param generator: The generator to render with; defaults to the shared one.
+        :type generator: SocialQRGenerator | None
+        :return: The encoded bytes, their mimetype, the shortlink (or None) and the
+            encoded URL.
+        :rtype: tuple[bytes, str, str | None, str]
+        """
+        if generator is None:
+            generator = get_shared_generator()
+
+        image_format = options.get('image_format', 'png')
+        render_options = {k: v for k, v in options.items() if k not in ENCODING_OPTIONS}
+
+        if image_format == 'svg':
+            document, shortlink, full_url = generator.generate_social_svg(**render_options)
+            return document.encode('utf-8'), OUTPUT_FORMATS['svg'], shortlink, full_url
+
+        qr_image, shortlink, full_url = generator.generate_social_qr(**render_options)
+        with stage('output'):
+            data = encode_image(qr_image,
+                                image_format=image_format,
+                                compression=options.get('compression', 'default'),
+                                palette=options.get('palette', False))
+        return data, OUTPUT_FORMATS[image_format], shortlink, full_url
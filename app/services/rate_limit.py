@@ -0,0 +1,86 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+
+
+class RateLimited(Exception):
+    """
+    Raised when a client has spent its render budget.
+
+    :ivar retry_after: Seconds until the client's budget covers the request.
+    :type retry_after: int
+    """
+
+    def __init__(self, message, retry_after=1):
+        super().__init__(message)
+        self.retry_after = retry_after
+        self.reason = 'rate_limited'
+
+
+class TokenBucketLimiter:
+    """
+    Per-client token buckets, charged in ``QRService.estimate_cost`` units.
+
+    Every client starts with ``capacity`` tokens and regains ``rate`` tokens per
+    second, up to ``capacity``. A request is admitted when the bucket holds its
+    cost; requests costing more than the whole bucket are admitted on a full
+    bucket and leave it in debt, so expensive batches are not refused outright but
+    pay for themselves before the client is served again. Buckets of the least
+    recently seen clients are dropped beyond ``max_clients``; a dropped client
+    simply starts over with a full bucket.
+
+    Buckets live in the process: with several server processes, give each one
+    its share of the budget (see ``RATE_LIMIT_PROCESSES``), so a client that is
+    spread over all of them gets about the configured budget in total.
+
+    :ivar capacity: Largest budget a client can accumulate.
+    :type capacity: float
+    :ivar rate: Tokens regained per second.
+    :type rate: float
+    """
+
+    def __init__(self, capacity, rate, max_clients=10000):
+        if capacity <= 0 or rate <= 0:
+            raise ValueError("Rate limit capacity and rate must be positive")
+        self.capacity = float(capacity)
+        self.rate = float(rate)
+        self.max_clients = max_clients
+        self.rejected = 0
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def acquire(self, client, cost):
+        """
+        Charges ``cost`` tokens to ``client``.
+
+        :param client: The client identifier, e.g. its address.
+        :type client: str
+        :param cost: The estimated cost of the request.
+        :type cost: float
+        :raises RateLimited: If the client's bucket does not cover the request.
+        """
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.pop(client, (self.capacity, now))
+            tokens = min(self.capacity, tokens + (now - updated) * self.rate)
+
+            required = min(cost, self.capacity)
+            if tokens < required:
+                self._buckets[client] = (tokens, now)
+                self.rejected += 1
+                retry_after = max(1, math.ceil((required - tokens) / self.rate))
+                raise RateLimited("Rate limit exceeded", retry_after)
+
+            self._buckets[client] = (tokens - cost, now)
+            while len(self._buckets) > self.max_clients:
+                self._buckets.popitem(last=False)
+
+    def stats(self):
+        """
+        Returns the number of tracked clients and rejected requests.
+
+        :rtype: dict
+        """
+        with self._lock:
+            return {'clients': len(self._buckets), 'rejected': self.rejected}
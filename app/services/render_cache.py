@@ -0,0 +1,257 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+from app.utils.file_utils import write_atomic
+
+# Bump whenever the rendered output changes, so spilled files from an older
+# renderer are never served.
+RENDER_VERSION = 7
+
+# Temp files of interrupted spills older than this are removed when pruning
+STALE_PART_SECONDS = 300
+
+CachedRender = namedtuple('CachedRender', ['key', 'data', 'mimetype', 'shortlink', 'full_url'])
+
+
+class RenderCache:
+    """
+    Content-addressed cache of rendered QR codes.
+
+    Entries are keyed by a hash of the normalized generation options and hold the
+    final encoded image together with the shortlink and full URL returned by the
+    generator. The in-memory store is an LRU bounded by the total number of image
+    bytes; when a spill directory is configured, evicted entries are written there
+    (outside the lock, so lookups never wait for the disk) and transparently
+    promoted back to memory on the next hit.
+
+    The spill directory is bounded by ``spill_max_bytes``: it is pruned when the
+    cache is created and again whenever this process has spilled another tenth of
+    the budget, deleting the least recently used files first. Pruning scans the
+    directory, so processes sharing it stay within the budget together.
+
+    :ivar max_bytes: Upper bound for the image bytes kept in memory.
+    :type max_bytes: int
+    :ivar spill_dir: Optional directory used for evicted entries.
+    :type spill_dir: str | None
+    :ivar spill_max_bytes: Upper bound for the size of the spill directory.
+    :type spill_max_bytes: int
+    """
+
+    def __init__(self, max_bytes=64 * 1024 * 1024, spill_dir=None, spill_max_bytes=512 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.spill_dir = spill_dir
+        self.spill_max_bytes = spill_max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self._spilled_since_prune = 0
+        self._prune_lock = threading.Lock()
+
+        if spill_dir:
+            os.makedirs(spill_dir, exist_ok=True)
+            self.prune_spill()
+
+    @staticmethod
+    def make_key(options):
+        """
+        Builds the cache key for a set of normalized generation options.
+
+        :param options: Options as returned by ``QRService.normalize_options``.
+        :type options: dict
+        :return: A hex SHA-256 digest, also used as the strong ETag of the image.
+        :rtype: str
+        """
+        payload = json.dumps({'v': RENDER_VERSION, 'options': options},
+                             sort_keys=True, separators=(',', ':'))
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        """
+        Looks up a rendered QR code, falling back to the spill directory.
+
+        :param key: The key produced by ``make_key``.
+        :type key: str
+        :return: The cached entry, or None on a miss.
+        :rtype: CachedRender | None
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+
+        entry = self._load_spilled(key)
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            evicted = self._store(entry)
+        self._spill_all(evicted)
+        return entry
+
+    def put(self, key, data, mimetype, shortlink, full_url):
+        """
+        Stores a freshly rendered QR code.
+
+        :param key: The key produced by ``make_key``.
+        :type key: str
+        :param data: The encoded image bytes.
+        :type data: bytes
+        :param mimetype: The mimetype of the encoded image.
+        :type mimetype: str
+        :param shortlink: The shortlink returned by the generator, if any.
+        :type shortlink: str | None
+        :param full_url: The URL encoded in the QR code.
+        :type full_url: str
+        :return: The stored entry.
+        :rtype: CachedRender
+        """
+        entry = CachedRender(key, data, mimetype, shortlink, full_url)
+        with self._lock:
+            evicted = self._store(entry)
+        self._spill_all(evicted)
+        return entry
+
+    def stats(self):
+        """
+        Returns a snapshot of the cache counters and memory usage.
+
+        :rtype: dict
+        """
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'entries': len(self._entries),
+                'bytes': self._size,
+                'max_bytes': self.max_bytes,
+            }
+
+    def _store(self, entry):
+        # Called with the lock held; returns the entries to spill once released
+        previous = self._entries.pop(entry.key, None)
+        if previous is not None:
+            self._size -= len(previous.data)
+
+        if len(entry.data) > self.max_bytes:
+            return [entry]
+
+        self._entries[entry.key] = entry
+        self._size += len(entry.data)
+
+        evicted = []
+        while self._size > self.max_bytes:
+            _, oldest = self._entries.popitem(last=False)
+            self._size -= len(oldest.data)
+            evicted.append(oldest)
+        return evicted
+
+    def _spill_paths(self, key):
+        return (os.path.join(self.spill_dir, f"{key}.img"),
+                os.path.join(self.spill_dir, f"{key}.json"))
+
+    def _spill_all(self, entries):
+        if not self.spill_dir or not entries:
+            return
+
+        written = 0
+        for entry in entries:
+            written += self._spill(entry)
+
+        with self._lock:
+            self._spilled_since_prune += written
+            due = self._spilled_since_prune >= self.spill_max_bytes // 10
+        if due:
+            self.prune_spill()
+
+    def _spill(self, entry):
+        data_path, meta_path = self._spill_paths(entry.key)
+        meta = json.dumps({'mimetype': entry.mimetype,
+                           'shortlink': entry.shortlink,
+                           'full_url': entry.full_url}).encode('utf-8')
+        try:
+            # The metadata goes last: readers open it first, so they never
+            # reach image bytes that are not completely on disk
+            write_atomic(data_path, [entry.data])
+            write_atomic(meta_path, [meta])
+        except OSError:
+            return 0
+        return len(entry.data) + len(meta)
+
+    def prune_spill(self):
+        """
+        Deletes the least recently used spilled entries until the spill directory
+        fits ``spill_max_bytes``, along with temp files left by interrupted spills.
+        Runs in one thread at a time; concurrent calls return right away.
+
+        :return: The size of the spill directory afterwards, in bytes.
+        :rtype: int | None
+        """
+        if not self.spill_dir or not self._prune_lock.acquire(blocking=False):
+            return None
+
+        try:
+            now = time.time()
+            spilled = {}
+            for item in os.scandir(self.spill_dir):
+                try:
+                    info = item.stat()
+                except OSError:
+                    continue
+                key, _, suffix = item.name.rpartition('.')
+                if suffix == 'part':
+                    if now - info.st_mtime > STALE_PART_SECONDS:
+                        _unlink(item.path)
+                    continue
+                if suffix in ('img', 'json'):
+                    size, mtime = spilled.get(key, (0, 0.0))
+                    spilled[key] = (size + info.st_size, max(mtime, info.st_mtime))
+
+            total = sum(size for size, _ in spilled.values())
+            for key, (size, _) in sorted(spilled.items(), key=lambda item: item[1][1]):
+                if total <= self.spill_max_bytes:
+                    break
+                data_path, meta_path = self._spill_paths(key)
+                # Metadata first, so readers see a miss rather than half an entry
+                _unlink(meta_path)
+                _unlink(data_path)
+                total -= size
+
+            with self._lock:
+                self._spilled_since_prune = 0
+            return total
+        finally:
+            self._prune_lock.release()
+
+    def _load_spilled(self, key):
+        if not self.spill_dir:
+            return None
+
+        data_path, meta_path = self._spill_paths(key)
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as fh:
+                meta = json.load(fh)
+            with open(data_path, 'rb') as fh:
+                data = fh.read()
+            # Pruning goes by modification time, so a hit counts as a use
+            os.utime(meta_path)
+        except (OSError, ValueError):
+            return None
+
+        return CachedRender(key, data, meta.get('mimetype', 'image/png'),
+                            meta.get('shortlink'), meta.get('full_url'))
+
+
+def _unlink(path):
+    try:
+        os.unlink(path)
+    except OSError:
+        pass
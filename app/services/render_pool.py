@@ -0,0 +1,269 @@
+import math
+import os
+import threading
+import time
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
+from app.services.process_pool import LazyProcessPool
+from app.services.qr_service import QRService
+from app.utils.social_qr import get_shared_generator
+from app.utils.timing import StageTimer, active_timer
+
+
+class RenderOverloaded(Exception):
+    """
+    Raised when a render cannot be accepted or did not finish in time.
+
+    :ivar retry_after: Suggested number of seconds before retrying.
+    :type retry_after: int
+    :ivar reason: ``'queue_full'``, ``'timeout'`` or ``'worker_lost'``.
+    :type reason: str
+    """
+
+    def __init__(self, message, retry_after=1, reason='queue_full'):
+        super().__init__(message)
+        self.retry_after = retry_after
+        self.reason = reason
+
+
+# Counters of the caches that live in whichever process renders
+CACHE_COUNTERS = ('hits', 'misses', 'evictions')
+
+
+def generator_cache_stats():
+    """
+    Returns the ``stats()`` of the shared generator's matrix and asset caches in
+    this process, by their ``/metrics`` name.
+
+    :rtype: dict[str, dict]
+    """
+    generator = get_shared_generator()
+    return {'qr_matrix': generator.matrices.stats(), 'assets': generator.assets.stats()}
+
+
+def render_options(options):
+    """
+    Renders normalized options in a worker process.
+
+    :param options: Options as returned by ``QRService.normalize_options``.
+    :type options: dict
+    :return: The ``QRService.render_image`` result, the stage timings and the
+        worker's pid with the cache usage of the render: counter increments plus
+        the entry count afterwards, per cache.
+    :rtype: tuple[tuple, dict[str, float], tuple[int, dict[str, dict]]]
+    """
+    before = generator_cache_stats()
+    timer = StageTimer()
+    try:
+        with timer:
+            result = QRService().render_image(options)
+    except Exception as e:
+        # Travels back with the pickled exception, for the caller's metrics
+        e.failed_stage = timer.failed_stage
+        raise
+
+    usage = {}
+    for cache, stats in generator_cache_stats().items():
+        usage[cache] = {field: stats[field] - before[cache][field]
+                        for field in CACHE_COUNTERS if field in stats}
+        if 'entries' in stats:
+            usage[cache]['entries'] = stats['entries']
+    return result, timer.stages, (os.getpid(), usage)
+
+
+def _warm_up_worker(sizes):
+    get_shared_generator().warm_up(sizes)
+
+
+class RenderPool:
+    """
+    Runs interactive renders on a pool of worker processes, so CPU-heavy renders
+    do not hold the GIL of the web process and page requests stay responsive.
+
+    At most ``max_pending`` renders are queued or running at once; further
+    requests are rejected immediately with ``RenderOverloaded`` instead of
+    waiting, and so are renders that take longer than ``timeout`` seconds. A
+    render that timed out keeps its slot until the worker has finished it. With
+    ``max_workers=0`` renders run inline on the request thread, still bounded
+    by ``max_pending``.
+
+    The matrix and asset caches used by renders live in the workers; their
+    counters come back with every result and are summed by ``cache_stats``.
+
+    The pool is started on first use in the process that uses it. A process
+    forked from one that already had a pool starts its own instead of sharing
+    the parent's. If a worker dies mid-render, that render is rejected with
+    ``RenderOverloaded`` and the next one starts a fresh pool.
+
+    :ivar max_workers: Number of worker processes; 0 renders inline.
+    :type max_workers: int
+    :ivar max_pending: Upper bound for queued plus running renders.
+    :type max_pending: int
+    :ivar timeout: Seconds a request waits for its render.
+    :type timeout: float
+    """
+
+    def __init__(self, max_workers=None, max_pending=None, timeout=30.0, warmup_sizes=()):
+        self.max_workers = (os.cpu_count() or 1) if max_workers is None else max_workers
+        self.max_pending = max_pending or max(1, self.max_workers) * 4
+        self.timeout = timeout
+        self.warmup_sizes = tuple(warmup_sizes)
+        self.rejected = 0
+        self.timed_out = 0
+        self.worker_lost = 0
+        self._pending = 0
+        self._avg_seconds = 0.05
+        self._worker_counters = {}
+        self._worker_entries = {}
+        self._pool = LazyProcessPool(self.max_workers, initializer=_warm_up_worker,
+                                     initargs=(self.warmup_sizes,))
+        self._lock = threading.Lock()
+
+    @property
+    def executor(self):
+        return self._pool.executor
+
+    def render(self, options):
+        """
+        Renders normalized options, waiting at most ``timeout`` seconds. Stage
+        timings from the worker are added to the caller's active ``StageTimer``,
+        with the time spent queued and transferring results as ``queue``.
+
+        :param options: Options as returned by ``QRService.normalize_options``.
+        :type options: dict
+        :return: The encoded bytes, mimetype, shortlink and encoded URL.
+        :rtype: tuple[bytes, str, str | None, str]
+        :raises RenderOverloaded: If the queue is full or the render timed out.
+        """
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self.rejected += 1
+                raise RenderOverloaded("Render queue is full", self.retry_after(), 'queue_full')
+            self._pending += 1
+
+        started = time.perf_counter()
+        try:
+            if self.max_workers == 0:
+                try:
+                    result, stages, _ = render_options(options)
+                finally:
+                    self._release()
+            else:
+                result, stages, (pid, usage) = self._render_on_pool(options)
+                self._merge_cache_usage(pid, usage)
+        except RenderOverloaded:
+            raise
+        except Exception as e:
+            timer = active_timer()
+            if timer is not None and timer.failed_stage is None:
+                timer.failed_stage = getattr(e, 'failed_stage', None)
+            raise
+
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self._avg_seconds = 0.9 * self._avg_seconds + 0.1 * elapsed
+
+        timer = active_timer()
+        if timer is not None:
+            for name, seconds in stages.items():
+                timer.add(name, seconds)
+            timer.add('queue', max(0.0, elapsed - sum(stages.values())))
+        return result
+
+    def _render_on_pool(self, options):
+        executor = self._pool.executor
+        try:
+            future = executor.submit(render_options, options)
+        except BrokenProcessPool:
+            self._release()
+            raise self._worker_lost(executor)
+        except BaseException:
+            self._release()
+            raise
+        # The slot is held until the worker is done, not until the caller stops
+        # waiting, so max_pending keeps counting renders that timed out
+        future.add_done_callback(self._release)
+
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            # Only a render that is still queued can be cancelled
+            future.cancel()
+            with self._lock:
+                self.timed_out += 1
+            raise RenderOverloaded("Render timed out", self.retry_after(), 'timeout')
+        except BrokenProcessPool:
+            raise self._worker_lost(executor)
+
+    def _worker_lost(self, executor):
+        # A worker died (e.g. OOM-killed) and took the executor with it; the
+        # next render starts a new pool instead of failing until restart
+        self._pool.discard(executor)
+        with self._lock:
+            self.worker_lost += 1
+        return RenderOverloaded("Render worker exited unexpectedly", self.retry_after(), 'worker_lost')
+
+    def _release(self, future=None):
+        with self._lock:
+            self._pending -= 1
+
+    def _merge_cache_usage(self, pid, usage):
+        with self._lock:
+            for cache, fields in usage.items():
+                counters = self._worker_counters.setdefault(cache, {})
+                for field, value in fields.items():
+                    if field == 'entries':
+                        self._worker_entries[cache, pid] = value
+                    else:
+                        counters[field] = counters.get(field, 0) + value
+
+    def cache_stats(self, local):
+        """
+        Adds the cache usage reported by the workers to this process's own cache
+        stats: counters are summed, ``entries`` is the sum of every worker's last
+        reported count.
+
+        :param local: Cache name to ``stats()`` dictionary of this process, e.g.
+            from ``generator_cache_stats``.
+        :type local: dict[str, dict]
+        :return: The merged stats, by cache name.
+        :rtype: dict[str, dict]
+        """
+        merged = {cache: dict(stats) for cache, stats in local.items()}
+        with self._lock:
+            for cache, counters in self._worker_counters.items():
+                stats = merged.setdefault(cache, {})
+                for field, value in counters.items():
+                    stats[field] = stats.get(field, 0) + value
+            for (cache, _), entries in self._worker_entries.items():
+                stats = merged.setdefault(cache, {})
+                stats['entries'] = stats.get('entries', 0) + entries
+        return merged
+
+    def retry_after(self):
+        """Seconds until the current queue is expected to drain, at least 1"""
+        workers = max(1, self.max_workers)
+        return max(1, math.ceil(self._pending * self._avg_seconds / workers))
+
+    def stats(self):
+        """
+        Returns a snapshot of the queue depth and rejection counters.
+
+        :rtype: dict
+        """
+        with self._lock:
+            return {
+                'pending': self._pending,
+                'max_pending': self.max_pending,
+                'workers': self.max_workers,
+                'rejected': self.rejected,
+                'timed_out': self.timed_out,
+                'worker_lost': self.worker_lost,
+                'pool_restarts': self._pool.restarts,
+                'avg_render_seconds': self._avg_seconds,
+            }
+
+    def shutdown(self):
+        """Stops the worker processes, if they were started."""
+        self._pool.shutdown()
@@ -0,0 +1,320 @@
+import threading
+from collections import OrderedDict, namedtuple
+from io import BytesIO
+
+from PIL import Image, ImageDraw, ImageFont
+
+# A rasterized line of text: its coverage mask, the mask's offset from the drawing
+# origin, the advance width used for centering and the font size actually used
+TextStrip = namedtuple('TextStrip', ['mask', 'offset', 'advance', 'size'])
+
+
+class AssetCache:
+    """
+    Process-wide cache for the static assets used while rendering social QR codes.
+
+    Platform logos and fonts are loaded from disk once and kept for the lifetime of
+    the process. Logo composites (the resized logo pasted on its white backdrop) are
+    keyed by ``(platform, logo_size)`` and kept in a bounded LRU, so the handful of
+    sizes served in practice stay hot while unusual sizes are evicted.
+
+    Cached images are shared between callers and must be treated as read-only.
+
+    Larger pre-rendered layers (badge templates, masks) are kept in a second LRU
+    bounded by their total pixel bytes, and rasterized text strips in a third one
+    bounded by ``max_text_strips``.
+
+    :ivar max_composites: Maximum number of logo composites kept in memory.
+    :type max_composites: int
+    :ivar max_layer_bytes: Upper bound for the pixel bytes of cached layers.
+    :type max_layer_bytes: int
+    :ivar max_text_strips: Maximum number of text strips kept in memory.
+    :type max_text_strips: int
+    :ivar hits: Number of lookups served from the cache.
+    :type hits: int
+    :ivar misses: Number of lookups that had to load or render the asset.
+    :type misses: int
+    """
+
+    LOGO_PADDING = 20
+    # Largest edge of logos embedded in vector output; plenty for print sizes
+    VECTOR_LOGO_SIZE = 256
+
+    def __init__(self, max_composites=32, max_layer_bytes=64 * 1024 * 1024, max_text_strips=4096):
+        self.max_composites = max_composites
+        self.max_layer_bytes = max_layer_bytes
+        self.max_text_strips = max_text_strips
+        self.hits = 0
+        self.misses = 0
+        self._logos = {}
+        self._logo_pngs = {}
+        self._fonts = {}
+        self._composites = OrderedDict()
+        self._layers = OrderedDict()
+        self._layer_bytes = 0
+        self._text_strips = OrderedDict()
+        self._lock = threading.RLock()
+
+    def get_logo(self, platform, logo_path, fallback):
+        """
+        Returns the source logo for a platform as an RGBA image, loading it on first use.
+
+        :param platform: The platform name the logo belongs to.
+        :type platform: str
+        :param logo_path: Path to the logo file, or None if the platform has no logo.
+        :type logo_path: pathlib.Path | None
+        :param fallback: Callable taking the platform name and returning a drawn logo,
+            used when the file is missing or cannot be decoded.
+        :type fallback: Callable[[str], PIL.Image.Image]
+        :return: The cached RGBA logo image.
+        :rtype: PIL.Image.Image
+        """
+        with self._lock:
+            logo = self._logos.get(platform)
+            if logo is not None:
+                self.hits += 1
+                return logo
+
+            self.misses += 1
+            try:
+                with Image.open(logo_path) as source:
+                    logo = source.convert('RGBA')
+            except Exception:
+                logo = fallback(platform).convert('RGBA')
+
+            self._logos[platform] = logo
+            return logo
+
+    def get_logo_png(self, platform, logo_path, fallback):
+        """
+        Returns the platform logo encoded as PNG, for embedding in vector output.
+        Logos larger than ``VECTOR_LOGO_SIZE`` are downscaled first. Encoded once
+        per platform.
+
+        :param platform: The platform name the logo belongs to.
+        :type platform: str
+        :param logo_path: Path to the logo file, or None if the platform has no logo.
+        :type logo_path: pathlib.Path | None
+        :param fallback: Callable producing a drawn logo when the file is unusable.
+        :type fallback: Callable[[str], PIL.Image.Image]
+        :return: The PNG bytes.
+        :rtype: bytes
+        """
+        with self._lock:
+            png = self._logo_pngs.get(platform)
+            if png is not None:
+                self.hits += 1
+                return png
+
+            self.misses += 1
+            logo = self.get_logo(platform, logo_path, fallback).copy()
+            logo.thumbnail((self.VECTOR_LOGO_SIZE, self.VECTOR_LOGO_SIZE))
+
+            img_io = BytesIO()
+            logo.save(img_io, 'PNG', optimize=True)
+            png = img_io.getvalue()
+
+            self._logo_pngs[platform] = png
+            return png
+
+    def get_font(self, name, size):
+        """
+        Returns a TrueType font, falling back to PIL's default font when it is not
+        installed. Failed lookups are cached too, so a missing font is only probed once.
+
+        :param name: The font file name, e.g. ``"arial.ttf"``.
+        :type name: str
+        :param size: The font size in points.
+        :type size: int
+        :return: The loaded font.
+        :rtype: PIL.ImageFont.FreeTypeFont | PIL.ImageFont.ImageFont
+        """
+        key = (name, size)
+        with self._lock:
+            font = self._fonts.get(key)
+            if font is not None:
+                self.hits += 1
+                return font
+
+            self.misses += 1
+            try:
+                font = ImageFont.truetype(name, size)
+            except Exception:
+                font = ImageFont.load_default()
+
+            self._fonts[key] = font
+            return font
+
+    def get_logo_composite(self, platform, logo_size, logo_path, fallback, resample):
+        """
+        Returns the platform logo resized to ``logo_size`` and centred on a white
+        backdrop that is ``LOGO_PADDING`` pixels larger, ready to paste onto a QR.
+
+        :param platform: The platform name the logo belongs to.
+        :type platform: str
+        :param logo_size: The edge length of the logo itself in pixels.
+        :type logo_size: int
+        :param logo_path: Path to the logo file, or None if the platform has no logo.
+        :type logo_path: pathlib.Path | None
+        :param fallback: Callable producing a drawn logo when the file is unusable.
+        :type fallback: Callable[[str], PIL.Image.Image]
+        :param resample: The PIL resampling filter used to resize the logo.
+        :return: The cached RGBA composite.
+        :rtype: PIL.Image.Image
+        """
+        key = (platform, logo_size)
+        with self._lock:
+            composite = self._composites.get(key)
+            if composite is not None:
+                self._composites.move_to_end(key)
+                self.hits += 1
+                return composite
+
+            self.misses += 1
+            logo_img = self.get_logo(platform, logo_path, fallback)
+            logo_img = logo_img.resize((logo_size, logo_size), resample)
+
+            logo_bg_size = logo_size + self.LOGO_PADDING
+            composite = Image.new('RGBA', (logo_bg_size, logo_bg_size), (255, 255, 255, 255))
+            logo_pos = ((logo_bg_size - logo_size) // 2, (logo_bg_size - logo_size) // 2)
+            composite.paste(logo_img, logo_pos, logo_img)
+
+            self._composites[key] = composite
+            while len(self._composites) > self.max_composites:
+                self._composites.popitem(last=False)
+            return composite
+
+    def get_layer(self, key, factory):
+        """
+        Returns a cached pre-rendered layer, building it with ``factory`` on a miss.
+        The value may be an image or a tuple of images (``None`` entries allowed);
+        its pixel bytes count towards ``max_layer_bytes``.
+
+        :param key: A hashable key that fully describes the layer.
+        :type key: tuple
+        :param factory: Zero-argument callable that renders the layer.
+        :type factory: Callable[[], object]
+        :return: The cached layer.
+        """
+        with self._lock:
+            entry = self._layers.get(key)
+            if entry is not None:
+                self._layers.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+
+            self.misses += 1
+
+        value = factory()
+        nbytes = _pixel_bytes(value)
+
+        with self._lock:
+            previous = self._layers.pop(key, None)
+            if previous is not None:
+                self._layer_bytes -= previous[1]
+
+            self._layers[key] = (value, nbytes)
+            self._layer_bytes += nbytes
+            while self._layer_bytes > self.max_layer_bytes and len(self._layers) > 1:
+                _, (_, evicted_bytes) = self._layers.popitem(last=False)
+                self._layer_bytes -= evicted_bytes
+            return value
+
+    def get_text_strip(self, text, font_name, size, max_width=None, min_size=None):
+        """
+        Returns a line of text rasterized into a coverage mask, so drawing it is a
+        single ``paste`` of the fill colour through the mask. The colour is not part
+        of the strip, so one strip serves every colour mode.
+
+        With ``max_width``, text wider than that is shrunk one point at a time down
+        to ``min_size``; the fitted size is found once per text and kept with the
+        strip.
+
+        :param text: The text to render.
+        :type text: str
+        :param font_name: The font file name, as for ``get_font``.
+        :type font_name: str
+        :param size: The preferred font size.
+        :type size: int
+        :param max_width: Widest advance allowed, in pixels.
+        :type max_width: int | None
+        :param min_size: Smallest font size to shrink to; defaults to half of ``size``.
+        :type min_size: int | None
+        :return: The cached strip.
+        :rtype: TextStrip
+        """
+        key = (text, font_name, size, max_width)
+        with self._lock:
+            strip = self._text_strips.get(key)
+            if strip is not None:
+                self._text_strips.move_to_end(key)
+                self.hits += 1
+                return strip
+
+            self.misses += 1
+
+        font = self.get_font(font_name, size)
+        advance = font.getlength(text)
+        if max_width is not None:
+            min_size = min_size or max(1, size // 2)
+            while advance > max_width and size > min_size:
+                size -= 1
+                font = self.get_font(font_name, size)
+                advance = font.getlength(text)
+
+        left, top, right, bottom = font.getbbox(text)
+        mask = Image.new('L', (max(1, right - left), max(1, bottom - top)), 0)
+        ImageDraw.Draw(mask).text((-left, -top), text, fill=255, font=font)
+        strip = TextStrip(mask, (left, top), advance, size)
+
+        with self._lock:
+            self._text_strips[key] = strip
+            self._text_strips.move_to_end(key)
+            while len(self._text_strips) > self.max_text_strips:
+                self._text_strips.popitem(last=False)
+            return strip
+
+    def stats(self):
+        """
+        Returns a snapshot of the cache counters and sizes.
+
+        :return: Hit/miss counters and the number of cached logos, fonts and composites.
+        :rtype: dict
+        """
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'logos': len(self._logos),
+                'fonts': len(self._fonts),
+                'composites': len(self._composites),
+                'max_composites': self.max_composites,
+                'layers': len(self._layers),
+                'layer_bytes': self._layer_bytes,
+                'text_strips': len(self._text_strips),
+            }
+
+    def clear(self):
+        """Drops every cached asset and resets the counters."""
+        with self._lock:
+            self._logos.clear()
+            self._logo_pngs.clear()
+            self._fonts.clear()
+            self._composites.clear()
+            self._layers.clear()
+            self._layer_bytes = 0
+            self._text_strips.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+def _pixel_bytes(value):
+    """Approximate memory held by an image or a tuple of images"""
+    if isinstance(value, tuple):
+        return sum(_pixel_bytes(item) for item in value)
+    if isinstance(value, Image.Image):
+        return value.width * value.height * len(value.getbands())
+    return 0
+
+
+asset_cache = AssetCache()
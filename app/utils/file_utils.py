@@ -0,0 +1,29 @@
+import os
+import tempfile
+
+
+def write_atomic(path, chunks):
+    """
+    Writes a file so that readers only ever see it complete: the chunks go to a
+    private temp file in the same directory, which then replaces ``path``. Each
+    writer gets its own temp file, so concurrent writers of the same path never
+    interleave; the last one to finish wins. On failure the temp file is removed.
+
+    :param path: The file to create or replace.
+    :type path: str
+    :param chunks: The content, as an iterable of bytes.
+    :type chunks: Iterable[bytes]
+    :raises OSError: If the file cannot be written.
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or '.', suffix='.part')
+    try:
+        with os.fdopen(fd, 'wb') as fh:
+            for chunk in chunks:
+                fh.write(chunk)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
@@ -0,0 +1,79 @@
+from io import BytesIO
+
+from PIL import Image
+
+# Output format -> mimetype
+OUTPUT_FORMATS = {
+    'png': 'image/png',
+    'webp': 'image/webp',
+    'svg': 'image/svg+xml',
+}
+
+FILE_EXTENSIONS = {
+    'png': 'png',
+    'webp': 'webp',
+    'svg': 'svg',
+}
+
+# Compression preset -> (PNG compress_level, WebP method)
+COMPRESSION_LEVELS = {
+    'fast': (1, 0),
+    'default': (6, 4),
+    'max': (9, 6),
+}
+
+
+def encode_image(image, image_format='png', compression='default', palette=False):
+    """
+    Encodes a rendered QR image for delivery.
+
+    PNG can be written in palette (P) mode, which suits QR badges well since they
+    only contain a handful of colours. WebP is always lossless so module edges stay
+    exact. SVG is not a raster encoding; it is produced directly by
+    ``SocialQRGenerator.generate_social_svg``.
+
+    :param image: The rendered image.
+    :type image: PIL.Image.Image
+    :param image_format: ``'png'`` or ``'webp'``.
+    :type image_format: str
+    :param compression: One of ``COMPRESSION_LEVELS``: ``'fast'`` for interactive use,
+        ``'max'`` for archival output.
+    :type compression: str
+    :param palette: Whether to quantize PNG output to an adaptive 256-colour palette.
+    :type palette: bool
+    :return: The encoded bytes.
+    :rtype: bytes
+    """
+    if image_format not in OUTPUT_FORMATS or image_format == 'svg':
+        raise ValueError(f"Unsupported image format: {image_format}")
+    if compression not in COMPRESSION_LEVELS:
+        raise ValueError(f"Unsupported compression: {compression}")
+
+    compress_level, webp_method = COMPRESSION_LEVELS[compression]
+    img_io = BytesIO()
+
+    if image_format == 'webp':
+        image.save(img_io, 'WEBP', lossless=True, method=webp_method)
+        return img_io.getvalue()
+
+    if palette:
+        image = quantize(image)
+    image.save(img_io, 'PNG', compress_level=compress_level, optimize=compression == 'max')
+    return img_io.getvalue()
+
+
+def quantize(image, colors=256):
+    """
+    Converts an RGB or RGBA image to palette mode, keeping transparency.
+
+    :param image: The image to quantize.
+    :type image: PIL.Image.Image
+    :param colors: Maximum palette size.
+    :type colors: int
+    :return: A ``P`` mode image.
+    :rtype: PIL.Image.Image
+    """
+    quantize_methods = getattr(Image, 'Quantize', Image)
+    dither = getattr(Image, 'Dither', Image).NONE
+    return image.quantize(colors=colors, method=quantize_methods.FASTOCTREE, dither=dither)
+
@@ -0,0 +1,157 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import qrcode
+
+
+class QRMatrixCache:
+    """
+    Process-wide cache of encoded QR module matrices.
+
+    Encoding (version search, Reed–Solomon and evaluating all eight mask patterns)
+    only depends on the payload, the error-correction level and the version, so
+    colour, size and corner variants of the same code share one entry. Matrices are
+    stored bit-packed, about one byte per eight modules, in an LRU bounded by entry
+    count.
+
+    :ivar max_entries: Maximum number of matrices kept in memory.
+    :type max_entries: int
+    :ivar hits: Number of lookups served from the cache.
+    :type hits: int
+    :ivar misses: Number of lookups that had to encode the payload.
+    :type misses: int
+    :ivar evictions: Number of matrices dropped to stay within ``max_entries``.
+    :type evictions: int
+    """
+
+    BORDER = 4
+
+    def __init__(self, max_entries=4096):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._packed_bytes = 0
+        self._lock = threading.Lock()
+
+    def get_modules(self, data, error_correction=qrcode.constants.ERROR_CORRECT_H, version=None):
+        """
+        Returns the module matrix for ``data``, including the ``BORDER`` module
+        quiet zone, encoding it on a miss.
+
+        :param data: The payload to encode.
+        :type data: str
+        :param error_correction: One of the ``qrcode.constants.ERROR_CORRECT_*`` levels.
+        :type error_correction: int
+        :param version: A fixed QR version, or None for the smallest that fits.
+        :type version: int | None
+        :return: A fresh boolean array, True for dark modules; safe to modify.
+        :rtype: numpy.ndarray
+        """
+        key = (data, error_correction, version)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+            else:
+                self.misses += 1
+
+        if entry is None:
+            modules = encode_modules(data, error_correction, self.BORDER, version)
+            entry = (np.packbits(modules), modules.shape[0])
+            self._store(key, entry)
+            return modules
+
+        packed, width = entry
+        return np.unpackbits(packed, count=width * width).reshape(width, width).astype(bool)
+
+    def _store(self, key, entry):
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._packed_bytes -= previous[0].nbytes
+
+            self._entries[key] = entry
+            self._packed_bytes += entry[0].nbytes
+            while len(self._entries) > self.max_entries:
+                _, (evicted, _) = self._entries.popitem(last=False)
+                self._packed_bytes -= evicted.nbytes
+                self.evictions += 1
+
+    def stats(self):
+        """
+        Returns a snapshot of the cache counters and sizes.
+
+        :return: Hit/miss/eviction counters, the entry count and the packed bytes held.
+        :rtype: dict
+        """
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'packed_bytes': self._packed_bytes,
+            }
+
+    def clear(self):
+        """Drops every cached matrix and resets the counters."""
+        with self._lock:
+            self._entries.clear()
+            self._packed_bytes = 0
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+
+def encode_modules(data, error_correction=qrcode.constants.ERROR_CORRECT_H, border=4,
+                   version=None):
+    """
+    Encodes ``data`` into a QR module matrix, by default using the smallest version
+    that fits.
+
+    :param data: The payload to encode.
+    :type data: str
+    :param error_correction: One of the ``qrcode.constants.ERROR_CORRECT_*`` levels.
+    :type error_correction: int
+    :param border: Quiet zone width in modules.
+    :type border: int
+    :param version: A fixed QR version, or None for the smallest that fits.
+    :type version: int | None
+    :return: Boolean array, True for dark modules.
+    :rtype: numpy.ndarray
+    :raises qrcode.exceptions.DataOverflowError: If the data does not fit ``version``.
+    """
+    qr = qrcode.QRCode(
+        version=version or 1,
+        error_correction=error_correction,
+        box_size=10,
+        border=border,
+    )
+    qr.add_data(data)
+    qr.make(fit=version is None)
+    return np.asarray(qr.get_matrix(), dtype=bool)
+
+
+def fit_version(data, error_correction=qrcode.constants.ERROR_CORRECT_H):
+    """
+    Returns the smallest QR version that holds ``data`` at a level, from the
+    payload's bit length alone, without encoding it.
+
+    :param data: The payload to encode.
+    :type data: str
+    :param error_correction: One of the ``qrcode.constants.ERROR_CORRECT_*`` levels.
+    :type error_correction: int
+    :rtype: int
+    :raises qrcode.exceptions.DataOverflowError: If the data does not fit any version.
+    """
+    qr = qrcode.QRCode(error_correction=error_correction)
+    qr.add_data(data)
+    return qr.best_fit()
+
+
+matrix_cache = QRMatrixCache()
@@ -0,0 +1,326 @@
+"""
+Scan verification for rendered QR codes.
+
+``verify_scan`` locates the symbol in a rendered image, samples every module,
+reads the format information and checks the sampled grid against a reference
+encoding of the expected payload. A code is reported as decodable when the
+format information is recoverable, the finder patterns are intact and every
+Reed-Solomon block has no more codeword errors than it can correct, i.e. any
+spec-compliant decoder that finds the symbol will read back exactly the expected
+payload. No third-party decoder is required.
+
+``decode_image`` additionally runs a real decoder when one of the optional
+backends (zxing-cpp, pyzbar or OpenCV) is installed.
+"""
+from collections import namedtuple
+from functools import lru_cache
+
+import numpy as np
+import qrcode
+from PIL import Image
+from qrcode import base as qr_base
+from qrcode import util as qr_util
+
+ScanReport = namedtuple('ScanReport', [
+    'decodable',
+    'version',
+    'error_correction',
+    'mask_pattern',
+    'module_errors',
+    'finder_errors',
+    'codeword_errors',
+    'worst_block_load',
+])
+
+# Error-correction levels in the order they appear in the format information
+ERROR_CORRECTION_LEVELS = (
+    qrcode.constants.ERROR_CORRECT_L,
+    qrcode.constants.ERROR_CORRECT_M,
+    qrcode.constants.ERROR_CORRECT_Q,
+    qrcode.constants.ERROR_CORRECT_H,
+)
+
+MAX_FORMAT_ERRORS = 3
+MAX_FINDER_ERRORS = 3
+
+
+def verify_scan(image, expected_data, region=None):
+    """
+    Checks whether a rendered QR code would decode to the expected payload.
+
+    :param image: The rendered image; transparent pixels are treated as white.
+    :type image: PIL.Image.Image
+    :param expected_data: The payload the QR code is supposed to carry.
+    :type expected_data: str
+    :param region: Optional ``(left, top, right, bottom)`` box containing the QR
+        code. Defaults to the top square of the image, where ``SocialQRGenerator``
+        places the code above its text section.
+    :type region: tuple[int, int, int, int] | None
+    :return: A report describing the sampled grid and whether it is decodable.
+    :rtype: ScanReport
+    """
+    grid = sample_grid(image, region)
+    failed = ScanReport(False, None, None, None, None, None, None, None)
+    if grid is None:
+        return failed
+
+    count = grid.shape[0]
+    version = (count - 17) // 4
+    format_info = _read_format_info(grid)
+    if format_info is None:
+        return failed._replace(version=version)
+    error_correction, mask_pattern = format_info
+
+    reference = qrcode.QRCode(version=version, error_correction=error_correction,
+                              border=0, mask_pattern=mask_pattern)
+    reference.add_data(expected_data)
+    try:
+        reference.make(fit=False)
+    except Exception:
+        return failed._replace(version=version, error_correction=error_correction,
+                               mask_pattern=mask_pattern)
+
+    expected = np.asarray(reference.modules, dtype=bool)
+    mismatched = grid != expected
+
+    finder_errors = sum(
+        int(mismatched[r:r + 7, c:c + 7].sum())
+        for r, c in ((0, 0), (count - 7, 0), (0, count - 7))
+    )
+
+    codeword_errors, worst_block_load = _block_errors(version, error_correction, mismatched)
+
+    decodable = finder_errors <= MAX_FINDER_ERRORS and worst_block_load <= 1.0
+    return ScanReport(decodable, version, error_correction, mask_pattern,
+                      int(mismatched.sum()), finder_errors, codeword_errors,
+                      worst_block_load)
+
+
+def occlusion_load(modules, error_correction, box):
+    """
+    Worst Reed-Solomon block load caused by covering a rectangle of modules with a
+    white backdrop, e.g. a logo: every dark module inside the box reads as light.
+    A load of 1.0 uses up the full correction capacity of at least one block.
+
+    :param modules: The symbol's module matrix without quiet zone, True for dark.
+    :type modules: numpy.ndarray
+    :param error_correction: One of the ``qrcode.constants.ERROR_CORRECT_*`` levels.
+    :type error_correction: int
+    :param box: ``(left, top, right, bottom)`` in symbol modules, right/bottom exclusive.
+    :type box: tuple[int, int, int, int]
+    :return: The highest errors-to-capacity ratio over all blocks.
+    :rtype: float
+    """
+    count = modules.shape[0]
+    left, top, right, bottom = (min(max(edge, 0), count) for edge in box)
+    covered = np.zeros((count, count), dtype=bool)
+    covered[top:bottom, left:right] = modules[top:bottom, left:right]
+    return _block_errors((count - 17) // 4, error_correction, covered)[1]
+
+
+def sample_grid(image, region=None):
+    """
+    Locates the QR symbol and samples the centre of every module.
+
+    The symbol bounds are taken from the dark pixels in the region, the module
+    pitch from the width of the top-left finder pattern (7 modules).
+
+    :param image: The rendered image.
+    :type image: PIL.Image.Image
+    :param region: Optional ``(left, top, right, bottom)`` box containing the code.
+    :type region: tuple[int, int, int, int] | None
+    :return: A boolean array of dark modules, or None if no symbol was found.
+    :rtype: numpy.ndarray | None
+    """
+    if region is None:
+        side = min(image.width, image.height)
+        region = (0, 0, side, side)
+
+    rgba = image.convert('RGBA').crop(region)
+    flattened = Image.new('RGBA', rgba.size, (255, 255, 255, 255))
+    flattened.alpha_composite(rgba)
+    dark = np.asarray(flattened.convert('L')) < 128
+
+    rows = np.flatnonzero(dark.any(axis=1))
+    cols = np.flatnonzero(dark.any(axis=0))
+    if rows.size == 0 or cols.size == 0:
+        return None
+
+    top, bottom = rows[0], rows[-1] + 1
+    left, right = cols[0], cols[-1] + 1
+
+    # Measure the finder half a module below its top edge, clear of any
+    # anti-aliased corner pixels
+    rough_px = _dark_run(dark[top, left:right])
+    probe_row = min(top + max(1, rough_px // 14), bottom - 1)
+    finder_px = _dark_run(dark[probe_row, left:right])
+    if finder_px == 0:
+        return None
+
+    estimated = (right - left) / (finder_px / 7)
+    version = int(round((estimated - 17) / 4))
+    if not 1 <= version <= 40:
+        return None
+    count = version * 4 + 17
+
+    xs = (left + (np.arange(count) + 0.5) * (right - left) / count).astype(int)
+    ys = (top + (np.arange(count) + 0.5) * (bottom - top) / count).astype(int)
+    return dark[np.ix_(ys, xs)]
+
+
+def decode_image(image):
+    """
+    Decodes a QR code with the first installed third-party decoder.
+
+    :param image: The image to decode.
+    :type image: PIL.Image.Image
+    :return: The decoded text, or None if nothing was decoded or no backend exists.
+    :rtype: str | None
+    """
+    backend = available_decoder()
+    if backend is None:
+        return None
+
+    flattened = Image.new('RGB', image.size, 'white')
+    flattened.paste(image, (0, 0), image.convert('RGBA'))
+
+    if backend == 'zxingcpp':
+        import zxingcpp
+        results = zxingcpp.read_barcodes(flattened)
+        return results[0].text if results else None
+
+    if backend == 'pyzbar':
+        from pyzbar import pyzbar
+        results = pyzbar.decode(flattened)
+        return results[0].data.decode('utf-8') if results else None
+
+    import cv2
+    text, _, _ = cv2.QRCodeDetector().detectAndDecode(np.asarray(flattened)[:, :, ::-1])
+    return text or None
+
+
+@lru_cache(maxsize=1)
+def available_decoder():
+    """Returns the name of the installed third-party decoder, or None"""
+    for module in ('zxingcpp', 'pyzbar', 'cv2'):
+        try:
+            __import__(module)
+        except ImportError:
+            continue
+        return module
+    return None
+
+
+def _dark_run(line):
+    """Length of the first run of dark pixels in a line"""
+    if not line.any():
+        return 0
+    start = int(np.argmax(line))
+    rest = line[start:]
+    return rest.size if rest.all() else int(np.argmin(rest))
+
+
+def _read_format_info(grid):
+    count = grid.shape[0]
+    first = 0
+    second = 0
+    for i in range(15):
+        if i < 6:
+            first |= int(grid[i, 8]) << i
+        elif i < 8:
+            first |= int(grid[i + 1, 8]) << i
+        else:
+            first |= int(grid[count - 15 + i, 8]) << i
+
+        if i < 8:
+            second |= int(grid[8, count - i - 1]) << i
+        elif i < 9:
+            second |= int(grid[8, 15 - i]) << i
+        else:
+            second |= int(grid[8, 15 - i - 1]) << i
+
+    best = None
+    best_distance = MAX_FORMAT_ERRORS + 1
+    for error_correction in ERROR_CORRECTION_LEVELS:
+        for mask_pattern in range(8):
+            bits = qr_util.BCH_type_info((error_correction << 3) | mask_pattern)
+            distance = min(bin(bits ^ first).count('1'), bin(bits ^ second).count('1'))
+            if distance < best_distance:
+                best = (error_correction, mask_pattern)
+                best_distance = distance
+    return best
+
+
+def _block_errors(version, error_correction, mismatched):
+    """Number of wrong codewords and the worst per-block load for a mismatch grid"""
+    rows, cols = _data_module_arrays(version)
+    owners, capacities = _codeword_owners(version, error_correction)
+
+    # Codeword index of every mismatched data module; remainder bits are ignored
+    bad_codewords = np.unique(np.flatnonzero(mismatched[rows, cols]) // 8)
+    bad_codewords = bad_codewords[bad_codewords < len(owners)]
+
+    block_errors = np.bincount(np.asarray(owners)[bad_codewords], minlength=len(capacities))
+    worst_block_load = max(
+        (errors / capacity if capacity else float(errors > 0))
+        for errors, capacity in zip(block_errors.tolist(), capacities)
+    )
+    return int(bad_codewords.size), worst_block_load
+
+
+@lru_cache(maxsize=40)
+def _data_module_arrays(version):
+    """Row and column index arrays of the data modules in placement order"""
+    order = np.asarray(_data_module_order(version))
+    return order[:, 0], order[:, 1]
+
+
+@lru_cache(maxsize=40)
+def _data_module_order(version):
+    """Positions of the data modules in placement order for a version"""
+    count = version * 4 + 17
+    template = qrcode.QRCode(version=version, border=0)
+    template.modules_count = count
+    template.modules = [[None] * count for _ in range(count)]
+    template.setup_position_probe_pattern(0, 0)
+    template.setup_position_probe_pattern(count - 7, 0)
+    template.setup_position_probe_pattern(0, count - 7)
+    template.setup_position_adjust_pattern()
+    template.setup_timing_pattern()
+    template.setup_type_info(True, 0)
+    if version >= 7:
+        template.setup_type_number(True)
+
+    order = []
+    row = count - 1
+    inc = -1
+    for col in range(count - 1, 0, -2):
+        if col <= 6:
+            col -= 1
+        while True:
+            for c in (col, col - 1):
+                if template.modules[row][c] is None:
+                    order.append((row, c))
+            row += inc
+            if row < 0 or row >= count:
+                row -= inc
+                inc = -inc
+                break
+    return tuple(order)
+
+
+@lru_cache(maxsize=160)
+def _codeword_owners(version, error_correction):
+    """Block index of every codeword in the interleaved stream, plus per-block capacity"""
+    blocks = qr_base.rs_blocks(version, error_correction)
+    data_counts = [block.data_count for block in blocks]
+    ec_counts = [block.total_count - block.data_count for block in blocks]
+
+    owners = []
+    for i in range(max(data_counts)):
+        owners.extend(b for b, n in enumerate(data_counts) if i < n)
+    for i in range(max(ec_counts)):
+        owners.extend(b for b, n in enumerate(ec_counts) if i < n)
+
+    capacities = tuple(n // 2 for n in ec_counts)
+    return tuple(owners), capacities
@@ -1,9 +1,21 @@
+import math
+import threading
+import time
+from collections import OrderedDict, namedtuple
 from pathlib import Path
+import numpy as np
 import qrcode
-from PIL import Image, ImageDraw, ImageFont
-from .style_utils import add_rounded_corners
+from PIL import Image, ImageDraw
+from . import svg_renderer as svg
+from .asset_cache import asset_cache
+from .qr_matrix_cache import fit_version, matrix_cache
+from .qr_verify import occlusion_load
+from .style_utils import get_rounded_mask
+from .timing import stage
 from .url_shortener import create_social_shortlink, get_full_url
 
+BadgeTemplate = namedtuple('BadgeTemplate', ['base', 'qr_mask', 'corner_mask'])
+
 
 class SocialQRGenerator:
     """
@@ -26,7 +38,47 @@ class SocialQRGenerator:
         "youtube": (255, 0, 0)  # YouTube red
     }
 
-    def __init__(self):
+    # Height of the name/shortlink/scan text area under the QR
+    TEXT_HEIGHT = 120
+    # Horizontal margin kept free when shrinking long names and shortlinks to fit
+    TEXT_MARGIN = 10
+    # (font file, preferred size, smallest size when shrinking to fit)
+    NAME_FONT = ("arialbd.ttf", 24, 14)
+    SHORTLINK_FONT = ("arial.ttf", 16, 11)
+    SCAN_FONT = ("arial.ttf", 14, 14)
+
+    ERROR_CORRECTION_LEVELS = {
+        "L": qrcode.constants.ERROR_CORRECT_L,
+        "M": qrcode.constants.ERROR_CORRECT_M,
+        "Q": qrcode.constants.ERROR_CORRECT_Q,
+        "H": qrcode.constants.ERROR_CORRECT_H,
+    }
+    # With the logo covering the center, fixed levels grow their version only while
+    # the worst Reed-Solomon block is loaded beyond FIXED_EC_MAX_LOAD of its capacity
+    # (undecodable). "auto" tries versions from the smallest that holds the payload,
+    # each with the most robust level that fits it; levels below H are taken when
+    # they keep the block load within AUTO_EC_MAX_LOAD, H as soon as it decodes.
+    ERROR_CORRECTION_MODES = tuple(ERROR_CORRECTION_LEVELS) + ("auto",)
+    AUTO_EC_MAX_LOAD = 0.8
+    FIXED_EC_MAX_LOAD = 1.0
+    EXTRA_VERSIONS = 4
+    # Encoding choices kept per (payload, mode, size, border)
+    EC_CHOICE_CACHE_SIZE = 4096
+
+    # "crisp" renders modules at an integer pixel size for the target qr_size;
+    # "smooth" is the original box_size 10 render followed by a LANCZOS resize
+    RENDER_MODES = ("crisp", "smooth")
+
+    def __init__(self, assets=None, render_mode="crisp", matrices=None):
+        if render_mode not in self.RENDER_MODES:
+            raise ValueError(f"Unknown render mode: {render_mode}")
+
+        self.assets = assets if assets is not None else asset_cache
+        self.matrices = matrices if matrices is not None else matrix_cache
+        self.render_mode = render_mode
+        self._ec_choices = OrderedDict()
+        self._ec_lock = threading.Lock()
+
         project_root = Path(__file__).resolve().parents[2]
         logos_root = project_root / "static" / "images" / "logos"
 
@@ -36,165 +88,359 @@ class SocialQRGenerator:
             "linkedin": logos_root / "linkedin_logo.png"
         }
 
+    def warm_up(self, sizes=(250, 300, 400), corner_radii=(40,)):
+        """
+        Preloads logos and fonts, resolves the resampling filter and renders one QR per
+        platform and size, so the first real request does not pay any of that cost.
+        Badge templates are also built for codes without shortlink and with each of
+        ``corner_radii``, and the logos are encoded for SVG output. Run before a
+        server forks its workers, this leaves all of them in memory shared
+        copy-on-write. Returns the elapsed time in seconds.
+        """
+        started = time.perf_counter()
+        _ = self._resample_filter
+
+        for platform in self.logo_paths:
+            self.assets.get_logo_png(platform, self.logo_paths.get(platform), self._create_fallback_logo)
+            for size in sizes:
+                self.generate_social_qr(platform, platform, "QRWeaver",
+                                        use_shortlink=True, qr_size=size)
+                for has_shortlink in (True, False):
+                    for corner_radius in (None,) + tuple(corner_radii):
+                        self._get_badge_template(platform, size, has_shortlink, corner_radius)
+
+        return time.perf_counter() - started
+
     def generate_social_qr(self, platform, profile_url, display_name,
                            use_shortlink=True, rounded_corners=False,
-                           corner_radius=40, qr_size=300, colorful=True):
+                           corner_radius=40, qr_size=300, colorful=True,
+                           error_correction="H"):
         """Main QR generation logic"""
         try:
             platform = platform.strip().lower()
+            with stage("payload"):
+                shortlink, qr_data = self._resolve_payload(platform, profile_url, use_shortlink)
+
+            with stage("template"):
+                template = self._get_badge_template(platform, qr_size, bool(shortlink),
+                                                    corner_radius if rounded_corners else None)
+            qr_image = self._create_base_qr(qr_data, platform, qr_size, colorful=colorful,
+                                            error_correction=error_correction)
+
+            # Compose the per-request layers onto a copy of the cached template:
+            # QR modules around the pre-placed logo, then name and shortlink
+            with stage("compose"):
+                final_image = template.base.copy()
+                final_image.paste(qr_image, (0, 0), template.qr_mask)
+            with stage("text"):
+                self._add_text_section(final_image, platform, display_name, shortlink, qr_size)
+
+            if template.corner_mask is not None:
+                with stage("corners"):
+                    final_image.putalpha(template.corner_mask)
 
-            # Create a shortlink or use full URL
-            if use_shortlink:
-                shortlink = create_social_shortlink(profile_url, platform)
-                qr_data = get_full_url(shortlink, platform)
-            else:
-                shortlink = None
-                qr_data = get_full_url(profile_url, platform)
+            return final_image, shortlink, qr_data
 
-            qr_image = self._create_base_qr(qr_data, platform, qr_size, colorful=colorful)
+        except Exception as e:
+            raise Exception(f"Error generating QR code: {str(e)}")
 
-            # Add logo and text section
-            qr_with_logo = self._add_logo(qr_image, platform, qr_size)
-            final_image = self._add_text_section(qr_with_logo, platform, display_name, shortlink, qr_size)
+    def generate_social_svg(self, platform, profile_url, display_name,
+                            use_shortlink=True, rounded_corners=False,
+                            corner_radius=40, qr_size=300, colorful=True,
+                            error_correction="H"):
+        """
+        Vector counterpart of generate_social_qr: same layout, returned as an SVG
+        document. Modules are emitted as merged path runs, the logo is embedded
+        once and the text and colour bar are vector elements.
+        """
+        try:
+            platform = platform.strip().lower()
+            with stage("payload"):
+                shortlink, qr_data = self._resolve_payload(platform, profile_url, use_shortlink)
+
+            total_height = qr_size + self.TEXT_HEIGHT
+            platform_color = self._get_platform_color(platform)
+
+            # QR modules, drawn in module units and scaled to qr_size; gradient codes
+            # carry the same extra quiet zone as the raster renderer
+            gradient_colors = self._gradient_colors(platform) if colorful else None
+            border = 4 if gradient_colors else 0
+            with stage("qr_encode"):
+                modules = self._get_modules(qr_data, error_correction, qr_size, border)
+            defs = ''
+            if gradient_colors:
+                modules = np.pad(modules, border)
+                defs = f'<defs>{svg.diagonal_pattern("qr-gradient", gradient_colors, origin=border)}</defs>'
+                fill = "url(#qr-gradient)"
+            else:
+                fill = svg.rgb(platform_color if colorful else (0, 0, 0))
+
+            scale = qr_size / modules.shape[0]
+            body = [
+                f'<g transform="scale({scale:.6f})">{defs}'
+                f'<path d="{svg.module_path(modules)}" fill="{fill}" shape-rendering="crispEdges"/></g>'
+            ]
+
+            # Logo on its white backdrop
+            logo_size = qr_size // 5
+            logo_bg_size = logo_size + self.assets.LOGO_PADDING
+            logo_bg_pos = (qr_size - logo_bg_size) // 2
+            logo_pos = logo_bg_pos + (logo_bg_size - logo_size) // 2
+            logo_png = self.assets.get_logo_png(platform, self.logo_paths.get(platform),
+                                                self._create_fallback_logo)
+            body.append(f'<rect x="{logo_bg_pos}" y="{logo_bg_pos}" width="{logo_bg_size}" '
+                        f'height="{logo_bg_size}" fill="#ffffff"/>')
+            body.append(svg.png_image(logo_png, logo_pos, logo_pos, logo_size, logo_size))
+
+            # Display name, shortlink and scan text
+            center = qr_size / 2
+            scan_text = self._get_scan_text(platform)
+            name_size = self._text_strip(display_name, self.NAME_FONT, qr_size).size
+            body.append(svg.text(display_name, center, qr_size + 15, name_size, platform_color, bold=True))
+            if shortlink:
+                shortlink_size = self._text_strip(shortlink, self.SHORTLINK_FONT, qr_size).size
+                body.append(svg.text(shortlink, center, qr_size + 50, shortlink_size, (51, 51, 51)))
+                body.append(svg.text(scan_text, center, qr_size + 80, 14, (102, 102, 102)))
+            else:
+                body.append(svg.text(scan_text, center, qr_size + 60, 14, (102, 102, 102)))
 
-            if rounded_corners:
-                final_image = add_rounded_corners(final_image, corner_radius)
+            # Platform color bar
+            bar_height = 6
+            body.append(f'<rect x="0" y="{total_height - bar_height}" width="{qr_size}" '
+                        f'height="{bar_height}" fill="{svg.rgb(platform_color)}"/>')
 
-            return final_image, shortlink, qr_data
+            document = svg.document(qr_size, total_height, ''.join(body),
+                                    corner_radius=corner_radius if rounded_corners else None)
+            return document, shortlink, qr_data
 
         except Exception as e:
             raise Exception(f"Error generating QR code: {str(e)}")
 
-    def _create_base_qr(self, data, platform, size, colorful=True):
-        """Creates a QR code image with optional platform color or gradient"""
-        qr = qrcode.QRCode(
-            version=1,
-            error_correction=qrcode.constants.ERROR_CORRECT_H,
-            box_size=10,
-            border=4,
-        )
-        qr.add_data(data)
-        qr.make(fit=True)
-
-        if colorful:
-            platform_colors = self.PLATFORM_COLORS.get(platform)
-            if platform == "instagram" and platform_colors and len(platform_colors) > 1:
-                return self._create_gradient_qr(qr, platform_colors, size)
-            fill_color = self._get_platform_color(platform)
+    def _resolve_payload(self, platform, profile_url, use_shortlink):
+        """Returns the shortlink (or None) and the URL to encode"""
+        if use_shortlink:
+            shortlink = create_social_shortlink(profile_url, platform)
+            return shortlink, get_full_url(shortlink, platform)
+        return None, get_full_url(profile_url, platform)
+
+    def _get_modules(self, data, error_correction="H", qr_size=300, border=0):
+        """
+        Returns the module matrix (with its 4-module quiet zone) for the data, at the
+        level and version chosen by ``_choose_encoding`` for this size; ``border`` is
+        any extra quiet zone added when rendering. The choice is cached, so repeats
+        cost one lookup here plus one in the matrix cache.
+        """
+        if error_correction not in self.ERROR_CORRECTION_MODES:
+            raise ValueError(f"Unknown error correction: {error_correction}")
+
+        key = (data, error_correction, qr_size, border)
+        with self._ec_lock:
+            choice = self._ec_choices.get(key)
+            if choice is not None:
+                self._ec_choices.move_to_end(key)
+
+        if choice is None:
+            choice = self._choose_encoding(data, error_correction, qr_size, border)
+            with self._ec_lock:
+                self._ec_choices[key] = choice
+                while len(self._ec_choices) > self.EC_CHOICE_CACHE_SIZE:
+                    self._ec_choices.popitem(last=False)
+
+        level, version = choice
+        return self.matrices.get_modules(data, level, version)
+
+    def _choose_encoding(self, data, error_correction, qr_size, border):
+        """
+        Picks the error-correction level and version for the data, returning the
+        version as None when it is the smallest that fits the level, so the matrix
+        cache entry is shared with plain encodes.
+
+        Versions are tried from the smallest that holds the payload at any candidate
+        level, each with the most robust candidate level that fits it; the version
+        only grows when the logo overloads that level. A level below the most robust
+        candidate must keep ``AUTO_EC_MAX_LOAD`` spare, so "auto" never settles for a
+        smaller but marginal code where H would still fit, and never ends up larger
+        than fixed H. If no version within ``EXTRA_VERSIONS`` of the fitted one
+        qualifies, the least loaded encoding is used.
+        """
+        if error_correction == "auto":
+            levels = tuple(self.ERROR_CORRECTION_LEVELS.values())
         else:
-            fill_color = (0, 0, 0)
+            levels = (self.ERROR_CORRECTION_LEVELS[error_correction],)
+
+        # Levels are ordered L to H, so the smallest fits come first
+        fits = [(level, fit_version(data, level)) for level in levels]
+        last = min(fits[-1][1] + self.EXTRA_VERSIONS, 40)
+
+        best = None
+        for version in range(fits[0][1], last + 1):
+            level, fitted = [fit for fit in fits if fit[1] <= version][-1]
+            pinned = None if version == fitted else version
+            modules = self.matrices.get_modules(data, level, pinned)
+            load = self._logo_load(modules, level, qr_size, border)
+            max_load = self.FIXED_EC_MAX_LOAD if level == levels[-1] else self.AUTO_EC_MAX_LOAD
+            if load <= max_load:
+                return level, pinned
+            if best is None or load < best[0]:
+                best = (load, level, pinned)
+        return best[1:]
+
+    def _logo_load(self, modules, level, qr_size, border):
+        """Worst Reed-Solomon block load from the logo backdrop covering the modules"""
+        quiet_zone = self.matrices.BORDER
+        count = modules.shape[0] + 2 * border
+        module_px = qr_size / count
+
+        # Every module the backdrop touches, even partially, counts as covered
+        logo_bg_size = qr_size // 5 + self.assets.LOGO_PADDING
+        start = (qr_size - logo_bg_size) // 2
+        offset = quiet_zone + border
+        first = int(start // module_px) - offset
+        last = math.ceil((start + logo_bg_size) / module_px) - offset
+
+        symbol = modules[quiet_zone:-quiet_zone, quiet_zone:-quiet_zone]
+        return occlusion_load(symbol, level, (first, first, last, last))
+
+    def _gradient_colors(self, platform):
+        """Returns the gradient palette for platforms that use one, else None"""
+        platform_colors = self.PLATFORM_COLORS.get(platform)
+        if platform == "instagram" and platform_colors and len(platform_colors) > 1:
+            return platform_colors
+        return None
+
+    def _create_base_qr(self, data, platform, size, colorful=True, error_correction="H"):
+        """Creates a QR code image with optional platform color or gradient"""
+        gradient_colors = self._gradient_colors(platform) if colorful else None
+        border = 4 if gradient_colors else 0
+        with stage("qr_encode"):
+            modules = self._get_modules(data, error_correction, size, border)
+
+        with stage("modules"):
+            if gradient_colors:
+                return self._create_gradient_qr(modules, gradient_colors, size, border)
+            if colorful:
+                fill_color = self._get_platform_color(platform)
+            else:
+                fill_color = (0, 0, 0)
 
-        return self._create_solid_qr(qr, fill_color, size)
+            return self._create_solid_qr(modules, fill_color, size)
 
-    def _create_solid_qr(self, qr, color, size):
+    def _create_solid_qr(self, modules, color, size):
         """Create solid color QR image"""
-        from qrcode.image.styledpil import StyledPilImage
-        from qrcode.image.styles.colormasks import SolidFillColorMask
-
         if not isinstance(color, tuple):
             color = tuple(color) if isinstance(color, (list, tuple)) else (0, 0, 0)
 
-        qr_img = qr.make_image(
-            image_factory=StyledPilImage,
-            color_mask=SolidFillColorMask(back_color=(255, 255, 255), front_color=color)
-        ).convert("RGBA")
+        index = modules.view(np.uint8)
+        palette = np.array([(255, 255, 255), color], dtype=np.uint8)
 
-        return qr_img.resize((size, size), self._resample_filter)
+        return self._render_modules(index, palette, size)
 
-    def _create_gradient_qr(self, qr, colors, size):
+    def _create_gradient_qr(self, modules, colors, size, border=4):
         """Create a gradient QR for Instagram"""
-        qr_modules = qr.get_matrix()
-        box_size = 10
-        border = 4
-        width = len(qr_modules) * box_size + 2 * border * box_size
-        qr_img = Image.new('RGBA', (width, width), (255, 255, 255, 255))
-        draw = ImageDraw.Draw(qr_img)
-
-        for y, row in enumerate(qr_modules):
-            for x, module in enumerate(row):
-                if module:
-                    color_index = (x + y) % len(colors)
-                    color = colors[color_index]
-                    x_pos = x * box_size + border * box_size
-                    y_pos = y * box_size + border * box_size
-                    draw.rectangle(
-                        [x_pos, y_pos, x_pos + box_size, y_pos + box_size],
-                        fill=color
-                    )
-
-        return qr_img.resize((size, size), self._resample_filter)
-
-    def _add_logo(self, qr_image, platform, qr_size):
-        """Adds the platform logo in the center of the QR"""
-        try:
-            logo_path = self.logo_paths.get(platform)
-            logo_img = Image.open(logo_path).convert('RGBA')
-        except:
-            logo_img = self._create_fallback_logo(platform)
-
-        logo_size = qr_size // 5
-        logo_img = logo_img.resize((logo_size, logo_size), self._resample_filter)
-
-        # White background behind the logo
-        logo_bg_size = logo_size + 20
-        logo_bg = Image.new('RGBA', (logo_bg_size, logo_bg_size), (255, 255, 255, 255))
-        logo_pos = ((logo_bg_size - logo_size) // 2, (logo_bg_size - logo_size) // 2)
-
-        if logo_img.mode == 'RGBA':
-            logo_bg.paste(logo_img, logo_pos, logo_img)
+        # Palette index per module: 0 is white, dark modules cycle through the
+        # gradient colors along the diagonal
+        ys, xs = np.indices(modules.shape)
+        color_index = (xs + ys) % len(colors) + 1
+        index = np.where(modules, color_index, 0).astype(np.uint8)
+        index = np.pad(index, border)
+
+        palette = np.array([(255, 255, 255)] + list(colors), dtype=np.uint8)
+
+        return self._render_modules(index, palette, size)
+
+    def _render_modules(self, index, palette, size):
+        """Expands a palette-index module array into a size x size RGB image"""
+        if self.render_mode == "smooth":
+            box_size = 10
+            resample = self._resample_filter
         else:
-            logo_bg.paste(logo_img, logo_pos)
+            # Largest whole number of pixels per module that fits, so every module
+            # has the same crisp edges; any residual is taken up by nearest-neighbour
+            box_size = max(1, size // index.shape[0])
+            resample = self._nearest_filter
+
+        pixels = palette[index.repeat(box_size, axis=0).repeat(box_size, axis=1)]
+        qr_img = Image.fromarray(pixels)
+
+        if qr_img.width != size:
+            qr_img = qr_img.resize((size, size), resample)
+        return qr_img
+
+    def _get_badge_template(self, platform, qr_size, has_shortlink, corner_radius):
+        """Returns the cached static layers for a badge layout"""
+        key = ("badge", platform, qr_size, has_shortlink, corner_radius)
+        return self.assets.get_layer(
+            key,
+            lambda: self._build_badge_template(platform, qr_size, has_shortlink, corner_radius)
+        )
 
-        qr_pos = ((qr_size - logo_bg_size) // 2, (qr_size - logo_bg_size) // 2)
-        qr_with_alpha = qr_image.convert('RGBA')
-        qr_with_alpha.paste(logo_bg, qr_pos, logo_bg)
+    def _build_badge_template(self, platform, qr_size, has_shortlink, corner_radius):
+        """
+        Pre-renders everything that does not depend on the profile: white canvas,
+        logo, scan text and color bar, plus the mask that keeps the QR modules off
+        the logo and, if requested, the rounded-corner alpha mask.
+        """
+        base = Image.new('RGB', (qr_size, qr_size + self.TEXT_HEIGHT), 'white')
+
+        logo_box = self._add_logo(base, platform, qr_size)
+        qr_mask = Image.new('L', (qr_size, qr_size), 255)
+        qr_mask.paste(0, logo_box)
+
+        self._add_branding(base, platform, has_shortlink, qr_size)
+
+        corner_mask = None
+        if corner_radius is not None:
+            corner_mask = get_rounded_mask(base.size, corner_radius)
+
+        return BadgeTemplate(base, qr_mask, corner_mask)
+
+    def _add_logo(self, canvas, platform, qr_size):
+        """Pastes the platform logo in the center of the QR area; returns its box"""
+        logo_bg = self.assets.get_logo_composite(
+            platform,
+            qr_size // 5,
+            self.logo_paths.get(platform),
+            self._create_fallback_logo,
+            self._resample_filter
+        )
+        logo_bg_size = logo_bg.width
 
-        return qr_with_alpha
+        qr_pos = ((qr_size - logo_bg_size) // 2, (qr_size - logo_bg_size) // 2)
+        canvas.paste(logo_bg, qr_pos, logo_bg)
 
-    def _add_text_section(self, qr_image, platform, display_name, shortlink, qr_size):
-        """Adds text and branding under the QR"""
-        text_height = 120
-        total_height = qr_size + text_height
-        final_img = Image.new('RGB', (qr_size, total_height), 'white')
-        final_img.paste(qr_image.convert('RGB'), (0, 0))
-        draw = ImageDraw.Draw(final_img)
+        return qr_pos + (qr_pos[0] + logo_bg_size, qr_pos[1] + logo_bg_size)
 
-        # Fonts
-        try:
-            font_large = ImageFont.truetype("arialbd.ttf", 24)
-            font_medium = ImageFont.truetype("arial.ttf", 16)
-            font_small = ImageFont.truetype("arial.ttf", 14)
-        except:
-            font_large = font_medium = font_small = ImageFont.load_default()
+    def _add_branding(self, canvas, platform, has_shortlink, qr_size):
+        """Draws the static scan text and platform color bar under the QR"""
+        scan_y = qr_size + (80 if has_shortlink else 60)
+        self._draw_centered(canvas, self._get_scan_text(platform), scan_y, self.SCAN_FONT,
+                            (102, 102, 102), qr_size)
 
-        platform_color = self._get_platform_color(platform)
+        # Platform color bar
+        draw = ImageDraw.Draw(canvas)
+        bar_height = 6
+        bar_y = canvas.height - bar_height
+        draw.rectangle([0, bar_y, qr_size, bar_y + bar_height], fill=self._get_platform_color(platform))
 
-        # Display name
-        name_width = draw.textlength(display_name, font=font_large)
-        name_x = (qr_size - name_width) // 2
-        draw.text((name_x, qr_size + 15), display_name, fill=platform_color, font=font_large)
+    def _add_text_section(self, canvas, platform, display_name, shortlink, qr_size):
+        """Draws the display name and shortlink under the QR from cached text strips"""
+        self._draw_centered(canvas, display_name, qr_size + 15, self.NAME_FONT,
+                            self._get_platform_color(platform), qr_size)
 
-        # Shortlink and scan text
-        scan_text = self._get_scan_text(platform)
         if shortlink:
-            shortlink_width = draw.textlength(shortlink, font=font_medium)
-            shortlink_x = (qr_size - shortlink_width) // 2
-            draw.text((shortlink_x, qr_size + 50), shortlink, fill=(51, 51, 51), font=font_medium)
+            self._draw_centered(canvas, shortlink, qr_size + 50, self.SHORTLINK_FONT,
+                                (51, 51, 51), qr_size)
 
-            scan_width = draw.textlength(scan_text, font=font_small)
-            scan_x = (qr_size - scan_width) // 2
-            draw.text((scan_x, qr_size + 80), scan_text, fill=(102, 102, 102), font=font_small)
-        else:
-            scan_width = draw.textlength(scan_text, font=font_small)
-            scan_x = (qr_size - scan_width) // 2
-            draw.text((scan_x, qr_size + 60), scan_text, fill=(102, 102, 102), font=font_small)
+    def _text_strip(self, text, font_spec, width):
+        """The cached strip for a line of text, shrunk to fit ``width`` minus the margins"""
+        font_name, size, min_size = font_spec
+        return self.assets.get_text_strip(text, font_name, size,
+                                          max_width=width - 2 * self.TEXT_MARGIN, min_size=min_size)
 
-        # Platform color bar
-        bar_height = 6
-        bar_y = total_height - bar_height
-        draw.rectangle([0, bar_y, qr_size, bar_y + bar_height], fill=platform_color)
-
-        return final_img
+    def _draw_centered(self, canvas, text, y, font_spec, fill, width):
+        strip = self._text_strip(text, font_spec, width)
+        x = (width - strip.advance) // 2
+        canvas.paste(fill, (int(x) + strip.offset[0], y + strip.offset[1]), strip.mask)
 
     def _get_scan_text(self, platform):
         texts = {
@@ -236,25 +482,48 @@ class SocialQRGenerator:
 
     @property
     def _resample_filter(self):
-        if not hasattr(self, "__resample_filter"):
+        resample = getattr(self, "_cached_resample_filter", None)
+        if resample is None:
             resampling = getattr(Image, "Resampling", None)
             if resampling is not None:
-                self.__resample_filter = resampling.LANCZOS
+                resample = resampling.LANCZOS
             else:
-                self.__resample_filter = Image.LANCZOS
-        return self.__resample_filter
+                resample = Image.LANCZOS
+            self._cached_resample_filter = resample
+        return resample
+
+    @property
+    def _nearest_filter(self):
+        resampling = getattr(Image, "Resampling", None)
+        if resampling is not None:
+            return resampling.NEAREST
+        return Image.NEAREST
+
+
+_shared_generator = None
+_shared_generator_lock = threading.Lock()
+
+
+def get_shared_generator():
+    """Returns the process-wide SocialQRGenerator, creating it on first use"""
+    global _shared_generator
+    if _shared_generator is None:
+        with _shared_generator_lock:
+            if _shared_generator is None:
+                _shared_generator = SocialQRGenerator()
+    return _shared_generator
 
 
 def generate_facebook_qr(profile_url, display_name, **kwargs):
-    generator = SocialQRGenerator()
+    generator = get_shared_generator()
     return generator.generate_social_qr("facebook", profile_url, display_name, **kwargs)
 
 
 def generate_instagram_qr(profile_url, display_name, **kwargs):
-    generator = SocialQRGenerator()
+    generator = get_shared_generator()
     return generator.generate_social_qr("instagram", profile_url, display_name, **kwargs)
 
 
 def generate_linkedin_qr(profile_url, display_name, **kwargs):
-    generator = SocialQRGenerator()
+    generator = get_shared_generator()
     return generator.generate_social_qr("linkedin", profile_url, display_name, **kwargs)
@@ -1,38 +1,140 @@
-from PIL import Image, ImageDraw
+import threading
+from collections import OrderedDict
 
+from PIL import Image, ImageChops, ImageDraw
 
-def add_rounded_corners(image, radius=40):
+# Pixel bytes of the masks kept by get_rounded_mask. Badges only use a handful
+# of (size, radius) pairs, but a large badge's mask is several MB on its own
+MASK_CACHE_MAX_BYTES = 8 * 1024 * 1024
+# Supersampling factor for anti-aliased corners
+ANTIALIAS_SCALE = 4
+# Pillow < 9.1 has the filters on Image itself
+_BOX_FILTER = getattr(Image, 'Resampling', Image).BOX
+
+_mask_cache = OrderedDict()
+_mask_bytes = 0
+_mask_lock = threading.Lock()
+
+
+def add_rounded_corners(image, radius=40, antialias=False, in_place=False):
     """
-    Adds rounded corners to an input image by creating a mask with the specified
-    corner radius and applying it to the image. The function ensures the output
-    image retains transparency.
+    Adds rounded corners to an input image by applying a cached corner mask to its
+    alpha channel. The function ensures the output image retains transparency.
+
+    Non-RGBA images are converted, which already yields a new image, so the mask is
+    applied to that copy. RGBA images are copied first unless ``in_place`` is set;
+    their existing transparency is kept.
 
     :param image: The input image to which rounded corners should be applied.
     :type image: PIL.Image.Image
     :param radius: The radius of the rounded corners. Default is 40.
     :type radius: int
-    :return: A new image with the same size as the input image, but with rounded
+    :param antialias: Whether to use supersampled, smooth corner edges.
+    :type antialias: bool
+    :param in_place: Modify an RGBA ``image`` instead of copying it.
+    :type in_place: bool
+    :return: An image with the same size as the input image, but with rounded
         corners and RGBA transparency.
     :rtype: PIL.Image.Image
     """
+    mask = get_rounded_mask(image.size, radius, antialias)
+
     if image.mode != 'RGBA':
         image = image.convert('RGBA')
+        image.putalpha(mask)
+        return image
+
+    if not in_place:
+        image = image.copy()
+    alpha = image.getchannel('A')
+    if alpha.getextrema() != (255, 255):
+        # Keep existing transparency inside the rounded area
+        mask = ImageChops.multiply(alpha, mask)
+    image.putalpha(mask)
+    return image
+
+
+def get_rounded_mask(size, radius=40, antialias=False):
+    """
+    Returns the rounded-corner mask for ``size`` and ``radius`` from a process-wide
+    LRU bounded by ``MASK_CACHE_MAX_BYTES``, creating it on first use. Masks larger
+    than the whole budget are returned without being cached. The mask is shared
+    and must not be modified.
+
+    :param size: The ``(width, height)`` of the mask.
+    :type size: tuple[int, int]
+    :param radius: The radius of the rounded corners. Default is 40.
+    :type radius: int
+    :param antialias: Whether to return the supersampled, smooth-edged variant.
+    :type antialias: bool
+    :return: The cached 'L' mode mask.
+    :rtype: PIL.Image.Image
+    """
+    global _mask_bytes
+
+    key = (tuple(size), radius, antialias)
+    with _mask_lock:
+        entry = _mask_cache.get(key)
+        if entry is not None:
+            _mask_cache.move_to_end(key)
+            return entry[0]
+
+    mask = create_rounded_mask(size, radius, antialias)
+    # 'L' mode: one byte per pixel
+    nbytes = mask.width * mask.height
+    if nbytes > MASK_CACHE_MAX_BYTES:
+        return mask
+
+    with _mask_lock:
+        previous = _mask_cache.pop(key, None)
+        if previous is not None:
+            _mask_bytes -= previous[1]
+        _mask_cache[key] = (mask, nbytes)
+        _mask_bytes += nbytes
+        while _mask_bytes > MASK_CACHE_MAX_BYTES:
+            _, (_, evicted_bytes) = _mask_cache.popitem(last=False)
+            _mask_bytes -= evicted_bytes
+    return mask
+
+
+def create_rounded_mask(size, radius=40, antialias=False):
+    """
+    Creates an 'L' mode mask that is opaque inside a rounded rectangle covering the
+    whole size and transparent in the corners.
 
-    # Create a mask with rounded corners
-    mask = Image.new('L', image.size, 0)
+    :param size: The ``(width, height)`` of the mask.
+    :type size: tuple[int, int]
+    :param radius: The radius of the rounded corners. Default is 40.
+    :type radius: int
+    :param antialias: Draw at ``ANTIALIAS_SCALE`` times the size and downsample, for
+        smooth corner edges.
+    :type antialias: bool
+    :return: The mask image.
+    :rtype: PIL.Image.Image
+    """
+    scale = ANTIALIAS_SCALE if antialias else 1
+    width, height = size
+
+    mask = Image.new('L', (width * scale, height * scale), 0)
     mask_draw = ImageDraw.Draw(mask)
+    mask_draw.rounded_rectangle([(0, 0), mask.size], radius=radius * scale, fill=255)
+
+    if antialias:
+        mask = mask.resize(size, _BOX_FILTER)
+    return mask
 
-    # Draw rounded rectangle on mask
-    mask_draw.rounded_rectangle([(0, 0), image.size], radius=radius, fill=255)
 
-    # Create result image with transparency
-    result = Image.new('RGBA', image.size, (0, 0, 0, 0))
-    result.paste(image, (0, 0), mask)
+def clear_mask_cache():
+    """Drops every cached corner mask."""
+    global _mask_bytes
 
-    return result
+    with _mask_lock:
+        _mask_cache.clear()
+        _mask_bytes = 0
 
 
-def apply_modern_frame(image, frame_color="#f8f9fa", padding=20, corner_radius=30):
+def apply_modern_frame(image, frame_color="#f8f9fa", padding=20, corner_radius=30,
+                       antialias=False):
     """
     Apply a modern styled frame with padding, color, and rounded corners to an image.
 
@@ -47,6 +149,7 @@ def apply_modern_frame(image, frame_color="#f8f9fa", padding=20, corner_radius=3
         Defaults to 20.
     :param corner_radius: The radius for the rounded corners of the frame.
         Defaults to 30.
+    :param antialias: Whether to use smooth corner edges. Defaults to False.
     :return: A new instance of the Image class with the frame applied.
     :rtype: Image
     """
@@ -54,11 +157,12 @@ def apply_modern_frame(image, frame_color="#f8f9fa", padding=20, corner_radius=3
     new_width = image.width + 2 * padding
     new_height = image.height + 2 * padding
 
-    # Create new image with background
-    framed = Image.new('RGB', (new_width, new_height), frame_color)
+    # Create the frame directly in RGBA so the corners can be cut without another copy
+    framed = Image.new('RGBA', (new_width, new_height), frame_color)
 
     # Paste original image centered
-    framed.paste(image, (padding, padding))
+    framed.paste(image.convert('RGB') if image.mode != 'RGB' else image, (padding, padding))
 
     # Apply rounded corners to the entire frame
-    return add_rounded_corners(framed, corner_radius)
+    framed.putalpha(get_rounded_mask(framed.size, corner_radius, antialias))
+    return framed
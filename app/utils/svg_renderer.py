@@ -0,0 +1,91 @@
+import base64
+from xml.sax.saxutils import escape
+
+import numpy as np
+
+
+def module_path(modules):
+    """
+    Builds an SVG path covering every dark module, merging horizontal runs of
+    adjacent modules into a single rectangle each. Coordinates are in modules.
+
+    :param modules: Boolean module matrix, True for dark modules.
+    :type modules: numpy.ndarray
+    :return: The path data for a ``<path d="...">`` element.
+    :rtype: str
+    """
+    padded = np.pad(modules.astype(np.int8), ((0, 0), (1, 1)))
+    edges = np.diff(padded, axis=1)
+
+    parts = []
+    for y, row in enumerate(edges):
+        starts = np.flatnonzero(row == 1)
+        ends = np.flatnonzero(row == -1)
+        for start, end in zip(starts, ends):
+            parts.append(f"M{start} {y}h{end - start}v1h{start - end}z")
+    return ''.join(parts)
+
+
+def diagonal_pattern(pattern_id, colors, origin=0):
+    """
+    Builds a tiling pattern reproducing the diagonal colour cycle
+    ``(x + y) % len(colors)``, one module per cell.
+
+    :param pattern_id: The element id used to reference the pattern.
+    :type pattern_id: str
+    :param colors: The RGB colours to cycle through.
+    :type colors: list[tuple[int, int, int]]
+    :param origin: Module offset of the colour cycle's (0, 0) cell.
+    :type origin: int
+    :return: A ``<pattern>`` element.
+    :rtype: str
+    """
+    count = len(colors)
+    cells = ''.join(
+        f'<rect x="{x}" y="{y}" width="1" height="1" fill="{rgb(colors[(x + y) % count])}"/>'
+        for y in range(count) for x in range(count)
+    )
+    return (f'<pattern id="{pattern_id}" patternUnits="userSpaceOnUse" '
+            f'x="{origin}" y="{origin}" width="{count}" height="{count}">{cells}</pattern>')
+
+
+def png_image(png, x, y, width, height):
+    """Embeds PNG bytes as an ``<image>`` element"""
+    png_base64 = base64.b64encode(png).decode()
+    return (f'<image x="{x}" y="{y}" width="{width}" height="{height}" '
+            f'xlink:href="data:image/png;base64,{png_base64}"/>')
+
+
+def text(value, x, y, size, color, bold=False):
+    """Centred text element; ``y`` is the top of the text like PIL's draw.text"""
+    weight = ' font-weight="bold"' if bold else ''
+    baseline = y + round(size * 0.9, 1)
+    return (f'<text x="{x}" y="{baseline}" font-family="Arial, Helvetica, sans-serif" '
+            f'font-size="{size}"{weight} fill="{rgb(color)}" text-anchor="middle">'
+            f'{escape(value)}</text>')
+
+
+def document(width, height, body, corner_radius=None):
+    """
+    Wraps elements in an SVG document with a white background, optionally clipped
+    to rounded corners.
+    """
+    radius = f' rx="{corner_radius}" ry="{corner_radius}"' if corner_radius else ''
+    clip_open = clip_close = defs = ''
+    if corner_radius:
+        defs = (f'<defs><clipPath id="badge-clip"><rect width="{width}" height="{height}"'
+                f'{radius}/></clipPath></defs>')
+        clip_open = '<g clip-path="url(#badge-clip)">'
+        clip_close = '</g>'
+
+    return (
+        f'<svg xmlns="http://www.w3.org/2000/svg" xmlns:xlink="http://www.w3.org/1999/xlink" '
+        f'width="{width}" height="{height}" viewBox="0 0 {width} {height}">'
+        f'{defs}{clip_open}<rect width="{width}" height="{height}" fill="#ffffff"/>'
+        f'{body}{clip_close}</svg>'
+    )
+
+
+def rgb(color):
+    """Formats an RGB tuple as a hex colour"""
+    return '#{:02x}{:02x}{:02x}'.format(*color[:3])
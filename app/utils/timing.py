@@ -0,0 +1,91 @@
+"""
+Per-stage timing for the render pipeline.
+
+Code that renders QR codes marks its stages with ``stage(name)``. Timings are
+only taken while a ``StageTimer`` is active on the current thread; otherwise
+``stage`` returns a shared no-op context manager, so instrumented code costs a
+thread-local lookup per stage.
+
+Example::
+
+    with StageTimer() as timer:
+        generator.generate_social_qr(...)
+    timer.stages  # {'payload': 0.00002, 'qr_encode': 0.004, ...}
+"""
+import threading
+import time
+from contextlib import nullcontext
+
+_local = threading.local()
+_NOOP = nullcontext()
+
+
+class StageTimer:
+    """
+    Collects the elapsed seconds per named stage while active. Stages entered more
+    than once are summed. Timers nest: the previous timer is restored on exit.
+
+    :ivar stages: Elapsed seconds per stage, in the order stages first ran.
+    :type stages: dict[str, float]
+    :ivar failed_stage: The innermost stage that raised, if any.
+    :type failed_stage: str | None
+    """
+
+    def __init__(self):
+        self.stages = {}
+        self.failed_stage = None
+        self._previous = None
+
+    def __enter__(self):
+        self._previous = getattr(_local, 'timer', None)
+        _local.timer = self
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        _local.timer = self._previous
+        self._previous = None
+        return False
+
+    def add(self, name, seconds):
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    @property
+    def total(self):
+        """Sum of all recorded stages in seconds"""
+        return sum(self.stages.values())
+
+
+class _Stage:
+    __slots__ = ('timer', 'name', 'started')
+
+    def __init__(self, timer, name):
+        self.timer = timer
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.timer.add(self.name, time.perf_counter() - self.started)
+        if exc_type is not None and self.timer.failed_stage is None:
+            self.timer.failed_stage = self.name
+        return False
+
+
+def stage(name):
+    """
+    Context manager timing a pipeline stage into the active ``StageTimer``, if any.
+
+    :param name: The stage name, e.g. ``"qr_encode"``.
+    :type name: str
+    """
+    timer = getattr(_local, 'timer', None)
+    if timer is None:
+        return _NOOP
+    return _Stage(timer, name)
+
+
+def active_timer():
+    """Returns the ``StageTimer`` active on this thread, or None"""
+    return getattr(_local, 'timer', None)
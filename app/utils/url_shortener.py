@@ -1,51 +1,172 @@
 import re
+from collections import namedtuple
+from functools import lru_cache
+from string import Formatter
+
+# A platform's shortlink rules. ``pattern`` matches profile URLs on any of the
+# platform's hosts, with the platform's path patterns folded in as alternatives
+# tried in order; ``templates`` maps the group number of each alternative to its
+# template, precompiled to a %-format and the names of the groups it uses. URLs on the host whose path matches
+# no alternative give ``empty``. Input that is not a URL on one of the hosts is
+# treated as a bare handle and substituted into the %-format ``handle``.
+PlatformRule = namedtuple('PlatformRule', ['name', 'pattern', 'templates', 'empty', 'handle'])
+
+SHORTLINK_CACHE_SIZE = 65536
+
+PLATFORM_RULES = {}
+
+
+def register_platform(name, hosts, paths, empty, handle):
+    """
+    Adds or replaces the shortlink rules of a platform.
+
+    :param name: The platform name, as passed to ``create_social_shortlink``.
+    :type name: str
+    :param hosts: Domains of the platform, e.g. ``("facebook.com", "fb.com")``;
+        subdomains such as ``www.`` or ``m.`` match too.
+    :type hosts: Iterable[str]
+    :param paths: ``(pattern, template)`` pairs. Patterns are matched against the
+        URL after the host, e.g. ``/in/jane?trk=x``, and tried in order; templates
+        are formatted with the pattern's named groups. Group names must be unique
+        across a platform's patterns.
+    :type paths: Iterable[tuple[str, str]]
+    :param empty: The shortlink for URLs on the host whose path matches no pattern.
+    :type empty: str
+    :param handle: Template for bare handles, formatted with ``handle``.
+    :type handle: str
+    """
+    paths = tuple(paths)
+    host_pattern = '|'.join(re.escape(host) for host in hosts)
+    alternatives = '|'.join(f'(?P<_path{i}>{pattern.lstrip("^")})'
+                            for i, (pattern, _) in enumerate(paths))
+    # One match decides host and path: the lookahead ends the host at a
+    # separator, the first alternative that matches the path wins. Scheme and
+    # subdomain labels are possessive, as a shorter run could never be
+    # followed by the separator; that keeps the engine from backtracking
+    # through them, and ASCII case folding is cheaper than Unicode folding
+    pattern = re.compile(rf'(?:[a-z]++://)?(?:[\w-]++\.)*?(?:{host_pattern})(?=[/?#]|$)(?:{alternatives})?',
+                         re.IGNORECASE | re.ASCII)
+    templates = {pattern.groupindex[f'_path{i}']: _compile_template(template)
+                 for i, (_, template) in enumerate(paths)}
+    handle_format, _ = _compile_template(handle)
+    PLATFORM_RULES[name] = PlatformRule(name, pattern, templates, empty, handle_format)
+    _shortlink.cache_clear()
+
+
+def _compile_template(template):
+    # 'x.com/{username}' -> ('x.com/%s', ('username',)), so a match is formatted
+    # with one %-operation instead of building its groupdict
+    parts = []
+    names = []
+    for literal, field, _, _ in Formatter().parse(template):
+        parts.append(literal.replace('%', '%%'))
+        if field is not None:
+            parts.append('%s')
+            names.append(field)
+    return ''.join(parts), tuple(names)
+
+
+@lru_cache(maxsize=SHORTLINK_CACHE_SIZE)
+def _shortlink(profile_url, platform):
+    rule = PLATFORM_RULES.get(platform)
+    if rule is None:
+        return profile_url
+    return _apply_rule(rule, profile_url)
+
+
+def _apply_rule(rule, profile_url):
+    # Every host has a dot, so most bare handles never reach the pattern
+    match = rule.pattern.match(profile_url) if '.' in profile_url else None
+    if match is None:
+        return rule.handle % profile_url.replace('@', '').replace('/', '')
+
+    # The alternative that matched is the last group to close
+    template = rule.templates.get(match.lastindex)
+    if template is None:
+        return rule.empty
+    fmt, names = template
+    return fmt % match.group(*names) if names else fmt
+
+
+# A path segment: anything up to the next separator
+_SEGMENT = r'[^/?#]+'
+
+register_platform(
+    'facebook', ('facebook.com', 'fb.com'),
+    paths=(
+        (r'^/profile\.php\?(?:[^#]*&)?id=(?P<id>\d+)', 'fb.com/{id}'),
+        (r'^/profile\.php', 'fb.com/profile'),
+        (rf'^/(?P<username>{_SEGMENT})', 'fb.com/{username}'),
+    ),
+    empty='fb.com',
+    handle='fb.com/{handle}',
+)
+register_platform(
+    'instagram', ('instagram.com',),
+    paths=((rf'^/@?(?P<username>{_SEGMENT})', 'instagram.com/{username}'),),
+    empty='instagram.com',
+    handle='instagram.com/{handle}',
+)
+register_platform(
+    'linkedin', ('linkedin.com',),
+    paths=(
+        (rf'^/in/(?P<username>{_SEGMENT})', 'linkedin.com/in/{username}'),
+        (rf'^/company/(?P<company>{_SEGMENT})', 'linkedin.com/company/{company}'),
+    ),
+    empty='linkedin.com',
+    handle='linkedin.com/in/{handle}',
+)
+register_platform(
+    'twitter', ('twitter.com', 'x.com'),
+    paths=((rf'^/@?(?P<username>{_SEGMENT})', 'x.com/{username}'),),
+    empty='x.com',
+    handle='x.com/{handle}',
+)
+register_platform(
+    'youtube', ('youtube.com',),
+    paths=(
+        (rf'^/(?P<handle>@{_SEGMENT})', 'youtube.com/{handle}'),
+        (rf'^/(?P<kind>channel|c|user)/(?P<name>{_SEGMENT})', 'youtube.com/{kind}/{name}'),
+    ),
+    empty='youtube.com',
+    handle='youtube.com/@{handle}',
+)
 
 
 def create_social_shortlink(profile_url, platform):
     """
     Generates a shortened or formatted social media URL based on the given profile URL and
-    specified platform. Cleans and parses the input URL and adjusts it for Facebook, Instagram,
-    or LinkedIn platforms. If the provided profile URL is already clean, it ensures proper
-    platform-specific formatting.
+    specified platform, using the rules in ``PLATFORM_RULES``. Full profile URLs on any of
+    the platform's hosts are reduced to their canonical short form; bare usernames and
+    handles are prefixed with the platform's short host. Results are memoized.
 
     :param profile_url: The profile URL to be shortened or formatted.
     :type profile_url: str
-    :param platform: The name of the social media platform. Acceptable values are 'facebook',
-        'instagram', or 'linkedin'.
+    :param platform: The name of the social media platform, e.g. 'facebook', 'instagram',
+        'linkedin', 'twitter' or 'youtube'.
     :type platform: str
-    :return: The formatted or shortened social media URL. If no matching platform rules are met,
+    :return: The formatted or shortened social media URL. For platforms without rules,
         the given profile URL remains unaltered.
     :rtype: str
     """
+    return _shortlink(profile_url.strip(), platform)
 
-    # Clean the profile URL
-    profile_url = profile_url.strip()
-
-    if platform == "facebook":
-        if "facebook.com" in profile_url:
-            if "/profile.php" in profile_url:
-                match = re.search(r'id=(\d+)', profile_url)
-                if match:
-                    return f"fb.com/{match.group(1)}"
-                return "fb.com/profile"
-            else:
-                username = profile_url.split("facebook.com/")[-1].split("/")[0].split("?")[0]
-                return f"fb.com/{username}" if username else "fb.com"
-        return f"fb.com/{profile_url.replace('@', '').replace('/', '')}"
-
-    elif platform == "instagram":
-        if "instagram.com" in profile_url:
-            username = profile_url.split("instagram.com/")[-1].split("/")[0].split("?")[0]
-            return f"instagram.com/{username}" if username else "instagram.com"
-        return f"instagram.com/{profile_url.replace('@', '').replace('/', '')}"
-
-    elif platform == "linkedin":
-        if "linkedin.com" in profile_url:
-            username = profile_url.split("linkedin.com/in/")[-1].split("/")[0].split("?")[0]
-            return f"linkedin.com/in/{username}" if username else "linkedin.com"
-        return f"linkedin.com/in/{profile_url.replace('@', '').replace('/', '')}"
-
-    return profile_url
+
+def normalize_many(profile_urls, platform):
+    """
+    Shortens many profile URLs of one platform, e.g. for directory imports, through
+    the same memo as ``create_social_shortlink``. This is a convenience, not a
+    faster path: URLs seen for the first time cost what a single call costs.
+
+    :param profile_urls: The profile URLs or handles.
+    :type profile_urls: Iterable[str]
+    :param platform: The name of the social media platform.
+    :type platform: str
+    :return: One shortlink per input, in order.
+    :rtype: list[str]
+    """
+    shortlink = _shortlink
+    return [shortlink(profile_url.strip(), platform) for profile_url in profile_urls]
 
 
 def get_full_url(shortlink, platform):
@@ -0,0 +1,93 @@
+"""
+Compares output encodings: encoded size and encode time per format, compression
+preset and palette mode, on badges rendered by SocialQRGenerator. SVG output is
+produced by the vector renderer, so its time covers the whole render.
+
+Usage:
+    python -m benchmarks.encoders [--repeat N] [--size 300] [--json]
+"""
+import argparse
+import json
+import statistics
+import time
+
+from app.utils.image_encoder import COMPRESSION_LEVELS, encode_image
+from app.utils.social_qr import SocialQRGenerator
+
+PLATFORMS = ("facebook", "instagram", "linkedin")
+
+VARIANTS = (
+    [('png', compression, False) for compression in COMPRESSION_LEVELS] +
+    [('png', compression, True) for compression in COMPRESSION_LEVELS] +
+    [('webp', compression, False) for compression in COMPRESSION_LEVELS]
+)
+
+
+def run(size, repeat):
+    generator = SocialQRGenerator()
+    images = {
+        platform: generator.generate_social_qr(platform, "https://example.com/jane.doe",
+                                               "Jane Doe", qr_size=size)[0]
+        for platform in PLATFORMS
+    }
+
+    results = []
+    for image_format, compression, palette in VARIANTS:
+        for platform, image in images.items():
+            timings = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                data = encode_image(image, image_format, compression, palette)
+                timings.append(time.perf_counter() - started)
+
+            results.append({
+                'image_format': image_format,
+                'compression': compression,
+                'palette': palette,
+                'platform': platform,
+                'qr_size': size,
+                'bytes': len(data),
+                'median_ms': round(statistics.median(timings) * 1000, 3),
+            })
+
+    for platform in PLATFORMS:
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            document = generator.generate_social_svg(platform, "https://example.com/jane.doe",
+                                                     "Jane Doe", qr_size=size)[0]
+            timings.append(time.perf_counter() - started)
+
+        results.append({
+            'image_format': 'svg',
+            'compression': '-',
+            'palette': False,
+            'platform': platform,
+            'qr_size': size,
+            'bytes': len(document.encode('utf-8')),
+            'median_ms': round(statistics.median(timings) * 1000, 3),
+        })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--size', type=int, default=300)
+    parser.add_argument('--json', action='store_true', help='emit machine-readable results')
+    args = parser.parse_args()
+
+    results = run(args.size, args.repeat)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'format':<6} {'compression':<11} {'palette':<7} {'platform':<10} {'bytes':>8} {'median ms':>10}")
+    for row in results:
+        print(f"{row['image_format']:<6} {row['compression']:<11} {str(row['palette']):<7} "
+              f"{row['platform']:<10} {row['bytes']:>8} {row['median_ms']:>10.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,132 @@
+"""
+Fixed H vs. adaptive ("auto") error correction: version, module size, encode
+time and the cached lookup time of a repeat render per payload, plus scan
+verification of every rendered code.
+
+Every code is checked with ``verify_scan`` (and a real decoder when one is
+installed). Failures of either mode make the script exit with status 1, so it
+doubles as a regression check.
+
+Usage:
+    python -m benchmarks.error_correction [--repeat N] [--sizes 250,300,400,800] [--json]
+"""
+import argparse
+import json
+import statistics
+import sys
+import time
+
+from app.utils.qr_matrix_cache import QRMatrixCache, encode_modules
+from app.utils.qr_verify import available_decoder, decode_image, verify_scan
+from app.utils.social_qr import SocialQRGenerator
+
+PLATFORMS = ("facebook", "instagram", "linkedin")
+MODES = ("H", "auto")
+
+PROFILE_URLS = (
+    "jd",
+    "jane.doe",
+    "https://www.linkedin.com/in/jane-doe-1234567",
+    "https://www.instagram.com/jane.doe.photography/",
+    "https://www.facebook.com/profile.php?id=100012345678901&sk=about",
+    "https://www.linkedin.com/in/jane-doe-1234567/?utm_source=share&utm_medium=member_desktop",
+)
+
+LEVEL_NAMES = {level: name for name, level in SocialQRGenerator.ERROR_CORRECTION_LEVELS.items()}
+
+
+def run(sizes, repeat):
+    results = []
+    for mode in MODES:
+        # Fresh matrix cache per mode so the choice is not influenced by earlier runs
+        generator = SocialQRGenerator(matrices=QRMatrixCache())
+
+        for platform in PLATFORMS:
+            for profile_url in PROFILE_URLS:
+                for size in sizes:
+                    image, _, qr_data = generator.generate_social_qr(
+                        platform, profile_url, "Jane Doe", use_shortlink=False,
+                        qr_size=size, error_correction=mode)
+
+                    report = verify_scan(image, qr_data, region=(0, 0, size, size))
+                    decoded = decode_image(image) if available_decoder() else None
+
+                    timings = []
+                    for _ in range(repeat):
+                        started = time.perf_counter()
+                        encode_modules(qr_data, report.error_correction, version=report.version)
+                        timings.append(time.perf_counter() - started)
+
+                    # The qr_encode stage of a repeat render: choice and matrix cached
+                    border = 4 if generator._gradient_colors(platform) else 0
+                    lookups = []
+                    for _ in range(repeat):
+                        started = time.perf_counter()
+                        generator._get_modules(qr_data, mode, size, border)
+                        lookups.append(time.perf_counter() - started)
+
+                    modules = report.version * 4 + 17 + 8 if report.version else None
+                    if modules and platform == "instagram":
+                        modules += 8
+                    results.append({
+                        'mode': mode,
+                        'platform': platform,
+                        'payload_length': len(qr_data),
+                        'qr_size': size,
+                        'level': LEVEL_NAMES.get(report.error_correction),
+                        'version': report.version,
+                        'module_px': round(size / modules, 2) if modules else None,
+                        'encode_ms': round(statistics.median(timings) * 1000, 3),
+                        'cached_us': round(statistics.median(lookups) * 1e6, 1),
+                        'verified': report.decodable,
+                        'worst_block_load': report.worst_block_load,
+                        'decoded': None if available_decoder() is None else decoded == qr_data,
+                    })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--sizes', default='250,300,400,800')
+    parser.add_argument('--json', action='store_true', help='emit machine-readable results')
+    args = parser.parse_args()
+
+    sizes = tuple(int(size) for size in args.sizes.split(','))
+    results = run(sizes, args.repeat)
+    failures = [row for row in results if not row['verified'] or row['decoded'] is False]
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(f"decoder backend: {available_decoder() or 'none (grid verification only)'}")
+        print(f"{'mode':<5} {'platform':<10} {'len':>4} {'size':>5} {'level':>5} {'ver':>4} "
+              f"{'module px':>10} {'encode ms':>10} {'cached us':>10} {'block load':>11} {'ok':>5}")
+        for row in results:
+            load = row['worst_block_load']
+            ok = row['verified'] and row['decoded'] is not False
+            print(f"{row['mode']:<5} {row['platform']:<10} {row['payload_length']:>4} "
+                  f"{row['qr_size']:>5} {str(row['level']):>5} {str(row['version']):>4} "
+                  f"{str(row['module_px']):>10} {row['encode_ms']:>10.3f} {row['cached_us']:>10.1f} "
+                  f"{'-' if load is None else f'{load:.2f}':>11} {str(ok):>5}")
+
+        for mode in MODES:
+            rows = [row for row in results if row['mode'] == mode]
+            levels = {}
+            for row in rows:
+                levels[row['level']] = levels.get(row['level'], 0) + 1
+            print(f"{mode}: levels {dict(sorted(levels.items()))}, "
+                  f"mean version {statistics.mean(row['version'] or 0 for row in rows):.2f}, "
+                  f"median encode {statistics.median(row['encode_ms'] for row in rows):.3f} ms, "
+                  f"median cached lookup {statistics.median(row['cached_us'] for row in rows):.1f} us")
+
+    for mode in MODES:
+        count = sum(row['mode'] == mode for row in failures)
+        if count:
+            print(f"{mode}: {count} code(s) failed verification", file=sys.stderr)
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
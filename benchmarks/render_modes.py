@@ -0,0 +1,76 @@
+"""
+Compares the "crisp" (integer module size) and "smooth" (box_size 10 + LANCZOS)
+render modes of SocialQRGenerator: per-render latency and scan verification.
+
+Usage:
+    python -m benchmarks.render_modes [--repeat N] [--sizes 250,300,400] [--json]
+"""
+import argparse
+import json
+import statistics
+import time
+
+from app.utils.qr_verify import available_decoder, decode_image, verify_scan
+from app.utils.social_qr import SocialQRGenerator
+
+PLATFORMS = ("facebook", "instagram", "linkedin")
+PROFILE_URL = "https://www.linkedin.com/in/jane-doe-1234567"
+
+
+def run(sizes, repeat):
+    results = []
+    for mode in SocialQRGenerator.RENDER_MODES:
+        generator = SocialQRGenerator(render_mode=mode)
+        generator.warm_up(sizes)
+
+        for platform in PLATFORMS:
+            for size in sizes:
+                timings = []
+                for _ in range(repeat):
+                    started = time.perf_counter()
+                    image, _, qr_data = generator.generate_social_qr(
+                        platform, PROFILE_URL, "Jane Doe", use_shortlink=False, qr_size=size)
+                    timings.append(time.perf_counter() - started)
+
+                report = verify_scan(image, qr_data)
+                decoded = decode_image(image)
+                results.append({
+                    'mode': mode,
+                    'platform': platform,
+                    'qr_size': size,
+                    'median_ms': round(statistics.median(timings) * 1000, 3),
+                    'verified': report.decodable,
+                    'module_errors': report.module_errors,
+                    'worst_block_load': report.worst_block_load,
+                    'decoded': None if available_decoder() is None else decoded == qr_data,
+                })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--sizes', default='250,300,400,800')
+    parser.add_argument('--json', action='store_true', help='emit machine-readable results')
+    args = parser.parse_args()
+
+    sizes = tuple(int(size) for size in args.sizes.split(','))
+    results = run(sizes, args.repeat)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"decoder backend: {available_decoder() or 'none (grid verification only)'}")
+    print(f"{'mode':<7} {'platform':<10} {'size':>5} {'median ms':>10} {'verified':>9} "
+          f"{'mod err':>8} {'block load':>11} {'decoded':>8}")
+    for row in results:
+        load = row['worst_block_load']
+        print(f"{row['mode']:<7} {row['platform']:<10} {row['qr_size']:>5} "
+              f"{row['median_ms']:>10.2f} {str(row['verified']):>9} "
+              f"{str(row['module_errors']):>8} "
+              f"{'-' if load is None else f'{load:.2f}':>11} {str(row['decoded']):>8}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+"""
+Micro-benchmark for rounded corners: time and Pillow image allocations per call,
+comparing the original per-call mask + canvas approach with the cached mask
+applied via putalpha.
+
+Allocations are read from Pillow's own counters (``Image.core.get_stats``), so
+they count every image buffer created in C, including temporary ones.
+
+Usage:
+    python -m benchmarks.rounded_corners [--repeat N] [--size 300x420] [--radius 40] [--json]
+"""
+import argparse
+import json
+import statistics
+import time
+
+from PIL import Image, ImageDraw
+
+from app.utils.style_utils import add_rounded_corners, apply_modern_frame, clear_mask_cache
+
+
+def uncached_rounded_corners(image, radius=40):
+    """The original implementation: new mask, new canvas and a paste on every call"""
+    if image.mode != 'RGBA':
+        image = image.convert('RGBA')
+
+    mask = Image.new('L', image.size, 0)
+    ImageDraw.Draw(mask).rounded_rectangle([(0, 0), image.size], radius=radius, fill=255)
+
+    result = Image.new('RGBA', image.size, (0, 0, 0, 0))
+    result.paste(image, (0, 0), mask)
+    return result
+
+
+def uncached_modern_frame(image, frame_color="#f8f9fa", padding=20, corner_radius=30):
+    """The original frame: an RGB canvas, then uncached rounded corners"""
+    framed = Image.new('RGB', (image.width + 2 * padding, image.height + 2 * padding),
+                       frame_color)
+    framed.paste(image, (padding, padding))
+    return uncached_rounded_corners(framed, corner_radius)
+
+
+def measure(label, func, repeat):
+    func()  # fill caches so only the steady state is measured
+
+    timings = []
+    Image.core.reset_stats()
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    stats = Image.core.get_stats()
+
+    return {
+        'variant': label,
+        'median_us': round(statistics.median(timings) * 1e6, 1),
+        'images_per_call': stats['new_count'] / repeat,
+        'blocks_per_call': stats['allocated_blocks'] / repeat,
+    }
+
+
+def run(size, radius, repeat):
+    rgb = Image.new('RGB', size, 'white')
+    rgba = Image.new('RGBA', size, 'white')
+    clear_mask_cache()
+
+    return [
+        measure('uncached, RGB input', lambda: uncached_rounded_corners(rgb, radius), repeat),
+        measure('cached, RGB input', lambda: add_rounded_corners(rgb, radius), repeat),
+        measure('uncached, RGBA input', lambda: uncached_rounded_corners(rgba, radius), repeat),
+        measure('cached, RGBA input', lambda: add_rounded_corners(rgba, radius), repeat),
+        measure('cached, RGBA in place',
+                lambda: add_rounded_corners(rgba, radius, in_place=True), repeat),
+        measure('cached, anti-aliased',
+                lambda: add_rounded_corners(rgb, radius, antialias=True), repeat),
+        measure('uncached frame', lambda: uncached_modern_frame(rgb), repeat),
+        measure('cached frame', lambda: apply_modern_frame(rgb), repeat),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=500)
+    parser.add_argument('--size', default='300x420')
+    parser.add_argument('--radius', type=int, default=40)
+    parser.add_argument('--json', action='store_true', help='emit machine-readable results')
+    args = parser.parse_args()
+
+    size = tuple(int(edge) for edge in args.size.lower().split('x'))
+    results = run(size, args.radius, args.repeat)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'variant':<24} {'median us':>10} {'images/call':>12} {'blocks/call':>12}")
+    for row in results:
+        print(f"{row['variant']:<24} {row['median_us']:>10.1f} "
+              f"{row['images_per_call']:>12.1f} {row['blocks_per_call']:>12.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,229 @@
+"""
+Scan-reliability and latency harness: renders a matrix of platforms, sizes and
+options through QRService/SocialQRGenerator, verifies that every output still
+scans and records per-stage latency and output size.
+
+Each configuration is rendered once to warm the caches, then ``--repeat`` times
+with a ``StageTimer`` active; stage timings are medians over those runs. The
+encoded output is decoded back from its bytes and checked with ``verify_scan``
+(plus a real decoder when one is installed).
+
+Results are written as JSON with ``--json PATH`` and can be compared with a
+previous run using ``--compare PATH``, e.g. between two commits:
+
+    python -m benchmarks.scan_reliability --json before.json
+    git checkout my-branch
+    python -m benchmarks.scan_reliability --compare before.json
+
+The script exits with status 1 if any code fails verification.
+
+Usage:
+    python -m benchmarks.scan_reliability [--repeat N] [--sizes 250,300,400]
+        [--render-modes crisp,smooth] [--error-correction H,auto]
+        [--json PATH] [--compare PATH] [--threshold 0.1]
+"""
+import argparse
+import itertools
+import json
+import platform as python_platform
+import statistics
+import subprocess
+import sys
+import time
+from io import BytesIO
+
+import numpy
+import PIL
+import qrcode
+from PIL import Image
+
+from app.services.qr_service import QRService
+from app.utils.qr_verify import available_decoder, decode_image, verify_scan
+from app.utils.social_qr import SocialQRGenerator
+from app.utils.timing import StageTimer
+
+PLATFORMS = ("facebook", "instagram", "linkedin")
+PROFILE_URL = "https://www.linkedin.com/in/jane-doe-1234567"
+DISPLAY_NAME = "Jane Doe"
+
+# Fields that identify a configuration when comparing runs
+CONFIG_FIELDS = ('platform', 'qr_size', 'render_mode', 'error_correction',
+                 'colorful', 'rounded_corners', 'use_shortlink')
+
+
+def configurations(sizes, render_modes, error_corrections):
+    for render_mode, platform, size, error_correction, colorful, rounded in itertools.product(
+            render_modes, PLATFORMS, sizes, error_corrections, (True, False), (False, True)):
+        yield {
+            'platform': platform,
+            'qr_size': size,
+            'render_mode': render_mode,
+            'error_correction': error_correction,
+            'colorful': colorful,
+            'rounded_corners': rounded,
+            'use_shortlink': False,
+        }
+
+
+def measure(service, generator, config, repeat):
+    options = service.normalize_options(
+        platform=config['platform'],
+        profile_url=PROFILE_URL,
+        display_name=DISPLAY_NAME,
+        use_shortlink=config['use_shortlink'],
+        rounded_corners=config['rounded_corners'],
+        qr_size=config['qr_size'],
+        colorful=config['colorful'],
+        error_correction=config['error_correction'],
+    )
+    data, _, _, full_url = service.render_image(options, generator)
+
+    totals = []
+    stages = {}
+    for _ in range(repeat):
+        with StageTimer() as timer:
+            started = time.perf_counter()
+            data, _, _, full_url = service.render_image(options, generator)
+            totals.append(time.perf_counter() - started)
+        for name, seconds in timer.stages.items():
+            stages.setdefault(name, []).append(seconds)
+
+    # Verify what a client actually receives: the encoded bytes
+    image = Image.open(BytesIO(data))
+    image.load()
+    size = config['qr_size']
+    report = verify_scan(image, full_url, region=(0, 0, size, size))
+    decoded = decode_image(image) if available_decoder() else None
+
+    return {
+        **config,
+        'total_ms': round(statistics.median(totals) * 1000, 3),
+        'stages_ms': {name: round(statistics.median(values) * 1000, 3)
+                      for name, values in stages.items()},
+        'bytes': len(data),
+        'version': report.version,
+        'verified': report.decodable,
+        'worst_block_load': report.worst_block_load,
+        'decoded': None if available_decoder() is None else decoded == full_url,
+    }
+
+
+def run(sizes, render_modes, error_corrections, repeat):
+    service = QRService()
+    generators = {mode: SocialQRGenerator(render_mode=mode) for mode in render_modes}
+    return [
+        measure(service, generators[config['render_mode']], config, repeat)
+        for config in configurations(sizes, render_modes, error_corrections)
+    ]
+
+
+def environment():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+
+    return {
+        'commit': commit,
+        'python': python_platform.python_version(),
+        'pillow': PIL.__version__,
+        'qrcode': getattr(qrcode, '__version__', None),
+        'numpy': numpy.__version__,
+        'decoder': available_decoder(),
+    }
+
+
+def passed(row):
+    return row['verified'] and row['decoded'] is not False
+
+
+def config_key(row):
+    return tuple(row[field] for field in CONFIG_FIELDS)
+
+
+def print_results(results):
+    stage_names = []
+    for row in results:
+        stage_names.extend(name for name in row['stages_ms'] if name not in stage_names)
+
+    header = (f"{'platform':<10} {'size':>5} {'mode':<6} {'ec':<4} {'color':<5} {'round':<5} "
+              f"{'total ms':>9} " + ' '.join(f"{name[:9]:>9}" for name in stage_names) +
+              f" {'bytes':>7} {'ver':>4} {'ok':>5}")
+    print(header)
+    for row in results:
+        stages = ' '.join(f"{row['stages_ms'].get(name, 0.0):>9.3f}" for name in stage_names)
+        print(f"{row['platform']:<10} {row['qr_size']:>5} {row['render_mode']:<6} "
+              f"{row['error_correction']:<4} {str(row['colorful']):<5} "
+              f"{str(row['rounded_corners']):<5} {row['total_ms']:>9.3f} {stages} "
+              f"{row['bytes']:>7} {str(row['version']):>4} {str(passed(row)):>5}")
+
+
+def compare(results, baseline, threshold):
+    """Prints configurations whose latency, size or scan result changed"""
+    previous = {config_key(row): row for row in baseline['results']}
+    ratios = []
+    changes = []
+
+    for row in results:
+        old = previous.get(config_key(row))
+        if old is None:
+            continue
+
+        ratio = row['total_ms'] / old['total_ms'] if old['total_ms'] else 1.0
+        ratios.append(ratio)
+        notes = []
+        if abs(ratio - 1) > threshold:
+            notes.append(f"total {old['total_ms']:.3f} -> {row['total_ms']:.3f} ms ({ratio:.2f}x)")
+        if row['bytes'] != old['bytes']:
+            notes.append(f"bytes {old['bytes']} -> {row['bytes']}")
+        if passed(row) != passed(old):
+            notes.append(f"scan {passed(old)} -> {passed(row)}")
+        if notes:
+            changes.append((row, notes))
+
+    print(f"\ncompared with {baseline['environment'].get('commit') or 'baseline'}: "
+          f"{len(ratios)} matching configurations")
+    for row, notes in changes:
+        label = ' '.join(str(row[field]) for field in CONFIG_FIELDS)
+        print(f"  {label}: {'; '.join(notes)}")
+    if ratios:
+        print(f"median latency ratio: {statistics.median(ratios):.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--sizes', default='250,300,400')
+    parser.add_argument('--render-modes', default=','.join(SocialQRGenerator.RENDER_MODES))
+    parser.add_argument('--error-correction', default='H,auto')
+    parser.add_argument('--json', metavar='PATH', help='write machine-readable results to PATH')
+    parser.add_argument('--compare', metavar='PATH', help='diff against a previous --json run')
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help='relative latency change reported by --compare (default: 0.1)')
+    args = parser.parse_args()
+
+    sizes = tuple(int(size) for size in args.sizes.split(','))
+    render_modes = tuple(args.render_modes.split(','))
+    error_corrections = tuple(args.error_correction.split(','))
+
+    results = run(sizes, render_modes, error_corrections, args.repeat)
+    print(f"decoder backend: {available_decoder() or 'none (grid verification only)'}")
+    print_results(results)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as fh:
+            json.dump({'environment': environment(), 'results': results}, fh, indent=2)
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as fh:
+            compare(results, json.load(fh), args.threshold)
+
+    failures = [row for row in results if not passed(row)]
+    if failures:
+        print(f"{len(failures)} configuration(s) failed scan verification", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,173 @@
+"""
+Shortlink normalizer benchmark and corpus check.
+
+First checks every entry of ``benchmarks/data/shortlink_corpus.jsonl`` (platform,
+profile URL and expected shortlink) against ``create_social_shortlink`` and
+``normalize_many``, then measures throughput on a synthetic directory import:
+the original if/elif implementation, ``create_social_shortlink`` with a cold and
+a warm memo, and ``normalize_many`` starting from a cold memo. A second table
+runs the original code and ``normalize_many`` (cold memo) over imports with a
+growing share of repeated URLs. The rule table is slower than the original on
+URLs it has not seen; only the memo makes up for that.
+
+The script exits with status 1 if any corpus entry does not match.
+
+Usage:
+    python -m benchmarks.shortlinks [--count N] [--unique FRACTION] [--json]
+"""
+import argparse
+import json
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+from app.utils import url_shortener
+from app.utils.url_shortener import create_social_shortlink, normalize_many
+
+CORPUS = Path(__file__).parent / 'data' / 'shortlink_corpus.jsonl'
+
+URL_SHAPES = {
+    'facebook': ('https://www.facebook.com/{name}', 'https://facebook.com/profile.php?id={number}',
+                 'facebook.com/{name}?ref=bookmarks', '@{name}'),
+    'instagram': ('https://www.instagram.com/{name}/', 'instagram.com/{name}?igsh=abc', '{name}'),
+    'linkedin': ('https://www.linkedin.com/in/{name}-{number}/', 'linkedin.com/in/{name}', '{name}'),
+}
+
+
+def legacy_shortlink(profile_url, platform):
+    """The original implementation, for comparison"""
+    profile_url = profile_url.strip()
+
+    if platform == "facebook":
+        if "facebook.com" in profile_url:
+            if "/profile.php" in profile_url:
+                match = re.search(r'id=(\d+)', profile_url)
+                if match:
+                    return f"fb.com/{match.group(1)}"
+                return "fb.com/profile"
+            username = profile_url.split("facebook.com/")[-1].split("/")[0].split("?")[0]
+            return f"fb.com/{username}" if username else "fb.com"
+        return f"fb.com/{profile_url.replace('@', '').replace('/', '')}"
+
+    elif platform == "instagram":
+        if "instagram.com" in profile_url:
+            username = profile_url.split("instagram.com/")[-1].split("/")[0].split("?")[0]
+            return f"instagram.com/{username}" if username else "instagram.com"
+        return f"instagram.com/{profile_url.replace('@', '').replace('/', '')}"
+
+    elif platform == "linkedin":
+        if "linkedin.com" in profile_url:
+            username = profile_url.split("linkedin.com/in/")[-1].split("/")[0].split("?")[0]
+            return f"linkedin.com/in/{username}" if username else "linkedin.com"
+        return f"linkedin.com/in/{profile_url.replace('@', '').replace('/', '')}"
+
+    return profile_url
+
+
+def check_corpus():
+    entries = [json.loads(line) for line in CORPUS.read_text(encoding='utf-8').splitlines() if line]
+    failures = []
+    for entry in entries:
+        single = create_social_shortlink(entry['profile_url'], entry['platform'])
+        batch = normalize_many([entry['profile_url']], entry['platform'])[0]
+        if single != entry['expected'] or batch != entry['expected']:
+            failures.append({**entry, 'got': single, 'got_batch': batch})
+    return len(entries), failures
+
+
+def directory(count, unique, seed=1):
+    """A synthetic import: ``count`` URLs per platform, ``unique`` of them distinct"""
+    rng = random.Random(seed)
+    distinct = max(1, int(count * unique))
+    batches = {}
+    for platform, shapes in URL_SHAPES.items():
+        pool = [rng.choice(shapes).format(name=f"user.{rng.randrange(10 ** 9)}",
+                                          number=rng.randrange(10 ** 12))
+                for _ in range(distinct)]
+        batches[platform] = [rng.choice(pool) for _ in range(count)]
+    return batches
+
+
+def throughput(label, func, batches):
+    total = sum(len(urls) for urls in batches.values())
+    started = time.perf_counter()
+    for platform, urls in batches.items():
+        func(urls, platform)
+    elapsed = time.perf_counter() - started
+    return {'variant': label, 'urls': total, 'seconds': round(elapsed, 4),
+            'urls_per_second': round(total / elapsed)}
+
+
+def _legacy(urls, platform):
+    return [legacy_shortlink(url, platform) for url in urls]
+
+
+def _single(urls, platform):
+    return [create_social_shortlink(url, platform) for url in urls]
+
+
+def run(count, unique):
+    batches = directory(count, unique)
+
+    url_shortener._shortlink.cache_clear()
+    results = [throughput('original if/elif', _legacy, batches),
+               throughput('single, cold memo', _single, batches),
+               throughput('single, warm memo', _single, batches)]
+    url_shortener._shortlink.cache_clear()
+    results.append(throughput('normalize_many, cold memo', normalize_many, batches))
+    url_shortener._shortlink.cache_clear()
+    return results
+
+
+def sweep(count, fractions=(1.0, 0.75, 0.5, 0.25, 0.1)):
+    """``normalize_many`` against the original code as the share of distinct URLs drops"""
+    rows = []
+    for unique in fractions:
+        batches = directory(count, unique)
+        legacy = throughput('original if/elif', _legacy, batches)
+        url_shortener._shortlink.cache_clear()
+        batch = throughput('normalize_many', normalize_many, batches)
+        rows.append({'unique': unique, 'original': legacy['urls_per_second'],
+                     'normalize_many': batch['urls_per_second'],
+                     'speedup': round(batch['urls_per_second'] / legacy['urls_per_second'], 2)})
+    url_shortener._shortlink.cache_clear()
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--count', type=int, default=50000, help='URLs per platform')
+    parser.add_argument('--unique', type=float, default=0.5,
+                        help='fraction of distinct URLs in the import (default: 0.5)')
+    parser.add_argument('--json', action='store_true', help='emit machine-readable results')
+    args = parser.parse_args()
+
+    checked, failures = check_corpus()
+    results = run(args.count, args.unique)
+    repeats = sweep(args.count)
+
+    if args.json:
+        print(json.dumps({'corpus': {'checked': checked, 'failures': failures},
+                          'throughput': results, 'repeats': repeats}, indent=2))
+    else:
+        print(f"corpus: {checked - len(failures)}/{checked} entries match")
+        for failure in failures:
+            print(f"  {failure['platform']} {failure['profile_url']!r}: expected "
+                  f"{failure['expected']!r}, got {failure['got']!r}")
+        print(f"\n{'variant':<26} {'urls':>8} {'seconds':>9} {'urls/s':>10}")
+        for row in results:
+            print(f"{row['variant']:<26} {row['urls']:>8} {row['seconds']:>9.4f} "
+                  f"{row['urls_per_second']:>10}")
+        print(f"\n{'distinct':>8} {'original/s':>11} {'normalize_many/s':>17} {'speedup':>8}")
+        for row in repeats:
+            print(f"{row['unique']:>8.2f} {row['original']:>11} {row['normalize_many']:>17} "
+                  f"{row['speedup']:>7.2f}x")
+
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,151 @@
+"""
+Startup benchmark for the production server: launches gunicorn with
+``gunicorn.conf.py`` with and without ``preload_app`` and reports the time until
+the first request is answered, the latency of the first render, and the
+resident (RSS) and proportional (PSS) memory of every worker, plus the PSS of
+the render-pool processes the workers started.
+
+With preload the warm-up runs once in the master and its pages are shared by the
+workers, so PSS (which splits shared pages between the processes using them)
+drops while RSS stays about the same. Memory figures need Linux ``/proc``.
+
+Usage:
+    python -m benchmarks.startup [--workers N] [--threads N] [--port 8765] [--json]
+"""
+import argparse
+import json
+import os
+import signal
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+RENDER_SPEC = {'platform': 'linkedin', 'profile_url': 'https://www.linkedin.com/in/jane-doe',
+               'display_name': 'Jane Doe', 'qr_size': 300, 'format': 'binary'}
+
+
+def wait_for_first_request(url, started, timeout):
+    """Polls ``url`` until it answers, returning the seconds since ``started``"""
+    while time.perf_counter() - started < timeout:
+        try:
+            with urllib.request.urlopen(url, timeout=1) as response:
+                response.read()
+                return time.perf_counter() - started
+        except (urllib.error.URLError, ConnectionError, OSError):
+            time.sleep(0.02)
+    raise TimeoutError(f"server did not answer {url} within {timeout} s")
+
+
+def first_render(base_url):
+    request = urllib.request.Request(f"{base_url}/api/generate", data=json.dumps(RENDER_SPEC).encode(),
+                                     headers={'Content-Type': 'application/json'})
+    started = time.perf_counter()
+    with urllib.request.urlopen(request, timeout=30) as response:
+        response.read()
+    return time.perf_counter() - started
+
+
+def child_pids(parent_pid):
+    pids = []
+    for entry in Path('/proc').iterdir():
+        if not entry.name.isdigit():
+            continue
+        try:
+            stat = (entry / 'stat').read_text()
+        except OSError:
+            continue
+        # The command name may contain spaces, so split after its closing paren
+        if int(stat.rsplit(')', 1)[1].split()[1]) == parent_pid:
+            pids.append(int(entry.name))
+    return sorted(pids)
+
+
+def memory_kib(pid):
+    """RSS and PSS of a process in KiB, from ``smaps_rollup``"""
+    values = {}
+    for line in Path(f'/proc/{pid}/smaps_rollup').read_text().splitlines():
+        key, _, rest = line.partition(':')
+        if key in ('Rss', 'Pss'):
+            values[key.lower()] = int(rest.split()[0])
+    return values
+
+
+def wait_for_workers(master_pid, count, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        pids = child_pids(master_pid)
+        if len(pids) >= count:
+            return pids
+        time.sleep(0.05)
+    return child_pids(master_pid)
+
+
+def run(preload, workers, threads, port, timeout=60):
+    env = dict(os.environ, WEB_PRELOAD='1' if preload else '0', WEB_WORKERS=str(workers),
+               WEB_THREADS=str(threads), WEB_BIND=f'127.0.0.1:{port}', RATE_LIMIT_CAPACITY='0')
+    env.setdefault('SECRET_KEY', 'startup-benchmark')
+    base_url = f'http://127.0.0.1:{port}'
+
+    started = time.perf_counter()
+    server = subprocess.Popen([sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'wsgi:app'],
+                              cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        ttfr = wait_for_first_request(f'{base_url}/', started, timeout)
+        render = first_render(base_url)
+        pids = wait_for_workers(server.pid, workers)
+        # Warm every worker the same way before measuring, as traffic would
+        for _ in range(workers * 4):
+            first_render(base_url)
+        memory = [memory_kib(pid) for pid in pids]
+        pools = [memory_kib(child) for pid in pids for child in child_pids(pid)]
+    finally:
+        server.send_signal(signal.SIGTERM)
+        server.wait(timeout=30)
+
+    return {
+        'variant': 'preload' if preload else 'no preload',
+        'workers': len(pids),
+        'time_to_first_request_s': round(ttfr, 3),
+        'first_render_ms': round(render * 1000, 1),
+        'worker_rss_mib': [round(m['rss'] / 1024, 1) for m in memory],
+        'worker_pss_mib': [round(m['pss'] / 1024, 1) for m in memory],
+        'total_pss_mib': round(sum(m['pss'] for m in memory) / 1024, 1),
+        'pool_processes': len(pools),
+        'pool_pss_mib': round(sum(m['pss'] for m in pools) / 1024, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--json', action='store_true', help='emit machine-readable results')
+    args = parser.parse_args()
+
+    if not Path('/proc/self/smaps_rollup').exists():
+        parser.error("memory figures need Linux /proc")
+
+    results = [run(preload, args.workers, args.threads, args.port) for preload in (False, True)]
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'variant':<12} {'workers':>7} {'first req s':>11} {'1st render ms':>13} "
+          f"{'RSS/worker MiB':>14} {'PSS/worker MiB':>14} {'PSS total MiB':>13} {'pool PSS MiB':>12}")
+    for row in results:
+        rss = sum(row['worker_rss_mib']) / max(1, row['workers'])
+        pss = sum(row['worker_pss_mib']) / max(1, row['workers'])
+        print(f"{row['variant']:<12} {row['workers']:>7} {row['time_to_first_request_s']:>11.3f} "
+              f"{row['first_render_ms']:>13.1f} {rss:>14.1f} {pss:>14.1f} {row['total_pss_mib']:>13.1f} "
+              f"{row['pool_pss_mib']:>12.1f}")
+
+
+if __name__ == '__main__':
+    main()
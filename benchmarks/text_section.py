@@ -0,0 +1,96 @@
+"""
+Micro-benchmark for the text section under the QR: time per call of the
+original per-request measure + draw with ``ImageDraw.text`` against the cached
+text strips pasted through their masks, for a repeating and a unique name.
+
+Pass ``--font PATH`` to measure with a specific TrueType font; by default the
+generator's own fonts are used (PIL's built-in font where Arial is missing).
+
+Usage:
+    python -m benchmarks.text_section [--repeat N] [--size 300] [--font PATH] [--json]
+"""
+import argparse
+import itertools
+import json
+import statistics
+import time
+
+from PIL import Image, ImageDraw
+
+from app.utils.asset_cache import AssetCache
+from app.utils.social_qr import SocialQRGenerator
+
+DISPLAY_NAME = "Jane Doe"
+SHORTLINK = "linkedin.com/in/jane-doe-1234567"
+
+
+def uncached_text_section(generator, canvas, display_name, shortlink, qr_size):
+    """The original implementation: measure and shape every line on every call"""
+    draw = ImageDraw.Draw(canvas)
+    font_name, size, _ = generator.NAME_FONT
+    font = generator.assets.get_font(font_name, size)
+    width = draw.textlength(display_name, font=font)
+    draw.text(((qr_size - width) // 2, qr_size + 15), display_name, fill=(34, 89, 130), font=font)
+
+    font_name, size, _ = generator.SHORTLINK_FONT
+    font = generator.assets.get_font(font_name, size)
+    width = draw.textlength(shortlink, font=font)
+    draw.text(((qr_size - width) // 2, qr_size + 50), shortlink, fill=(51, 51, 51), font=font)
+
+
+def measure(label, func, repeat):
+    func()  # fill caches so only the steady state is measured
+
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return {'variant': label, 'median_us': round(statistics.median(timings) * 1e6, 1)}
+
+
+def run(qr_size, repeat, font=None):
+    generator = SocialQRGenerator(assets=AssetCache())
+    if font:
+        generator.NAME_FONT = (font,) + generator.NAME_FONT[1:]
+        generator.SHORTLINK_FONT = (font,) + generator.SHORTLINK_FONT[1:]
+
+    canvas = Image.new('RGB', (qr_size, qr_size + generator.TEXT_HEIGHT), 'white')
+    counter = itertools.count()
+
+    return [
+        measure('uncached, repeated name',
+                lambda: uncached_text_section(generator, canvas, DISPLAY_NAME, SHORTLINK, qr_size),
+                repeat),
+        measure('strips, repeated name',
+                lambda: generator._add_text_section(canvas, 'linkedin', DISPLAY_NAME, SHORTLINK,
+                                                    qr_size),
+                repeat),
+        measure('strips, unique names',
+                lambda: generator._add_text_section(canvas, 'linkedin', f"User {next(counter)}",
+                                                    SHORTLINK, qr_size),
+                repeat),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=2000)
+    parser.add_argument('--size', type=int, default=300)
+    parser.add_argument('--font', help='TrueType font file to measure with')
+    parser.add_argument('--json', action='store_true', help='emit machine-readable results')
+    args = parser.parse_args()
+
+    results = run(args.size, args.repeat, args.font)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'variant':<24} {'median us':>10}")
+    for row in results:
+        print(f"{row['variant']:<24} {row['median_us']:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,35 @@
+"""
+Gunicorn settings for production serving:
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+With ``preload_app`` the app is created once in the master process. Its
+warm-up loads logos, fonts, badge templates, corner masks and text strips
+before the workers are forked, so every worker shares them copy-on-write.
+Pools and background threads (render pool, batch pool, job runner) start
+lazily in the process that first uses them, which is always a worker.
+
+Worker and thread counts come from ``app.server_config()`` (``WEB_*``
+environment variables), the same values ``create_app()`` exposes in its config.
+"""
+import gc
+
+from app import server_config
+
+_config = server_config()
+
+bind = _config['WEB_BIND']
+workers = _config['WEB_WORKERS']
+threads = _config['WEB_THREADS']
+worker_class = 'gthread'
+timeout = _config['WEB_TIMEOUT']
+preload_app = _config['WEB_PRELOAD']
+
+
+def when_ready(server):
+    # Runs in the master after the preloaded app was built and before any worker
+    # is forked. Freezing moves every object allocated so far out of the garbage
+    # collector's reach, so collections in the workers don't write to (and
+    # thereby copy) the pages they share with the master.
+    if preload_app:
+        gc.freeze()
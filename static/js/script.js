@@ -15,6 +15,9 @@ function initializeApp() {
 
     // Add smooth scrolling
     initializeSmoothScrolling();
+
+    // Low-resolution preview while the form is edited
+    initializeLivePreview();
 }
 
 function initializeForms() {
@@ -216,6 +219,84 @@ function initializeSmoothScrolling() {
     });
 }
 
+// Live preview
+const PREVIEW_DEBOUNCE_MS = 250;
+
+function initializeLivePreview() {
+    const form = document.querySelector('.qr-form[data-preview-url]');
+    const image = document.querySelector('.live-preview img') || document.querySelector('.qr-result .qr-image');
+    if (!form || !image) return;
+
+    const container = image.closest('.qr-preview');
+    let timer = null;
+    let controller = null;
+    let objectUrl = null;
+
+    const update = () => {
+        const fields = previewFields(form);
+        if (!fields.profile_url || !fields.display_name) return;
+
+        // Only the latest edit matters: cancel the request it supersedes
+        if (controller) controller.abort();
+        controller = new AbortController();
+
+        const params = new URLSearchParams({ platform: getCurrentPlatform(), ...fields });
+        fetch(`${form.dataset.previewUrl}?${params}`, { signal: controller.signal })
+            .then(res => {
+                if (!res.ok) throw new Error(`Preview failed with status ${res.status}`);
+                return res.blob();
+            })
+            .then(blob => {
+                if (objectUrl) URL.revokeObjectURL(objectUrl);
+                objectUrl = URL.createObjectURL(blob);
+                image.src = objectUrl;
+                image.classList.toggle('rounded', fields.rounded_corners === 'true');
+                container.hidden = false;
+                syncDownloadForm(fields);
+            })
+            .catch(err => {
+                if (err.name !== 'AbortError') console.error('Preview error:', err);
+            });
+    };
+
+    const schedule = () => {
+        clearTimeout(timer);
+        timer = setTimeout(update, PREVIEW_DEBOUNCE_MS);
+    };
+    form.addEventListener('input', schedule);
+    form.addEventListener('change', schedule);
+}
+
+function previewFields(form) {
+    const data = new FormData(form);
+    return {
+        profile_url: (data.get('profile_url') || '').trim(),
+        display_name: (data.get('display_name') || '').trim(),
+        use_shortlink: data.has('use_shortlink') ? 'true' : 'false',
+        rounded_corners: data.has('rounded_corners') ? 'true' : 'false',
+        corner_radius: data.get('corner_radius') || '40',
+        qr_size: data.get('qr_size') || '300',
+        color_mode: data.get('color_mode') || 'color',
+        error_correction: data.get('error_correction') || 'H'
+    };
+}
+
+function syncDownloadForm(fields) {
+    // After an edit the previewed token no longer matches: download renders the
+    // edited options at full quality instead
+    const form = document.querySelector('.download-form');
+    if (!form) return;
+
+    form.querySelectorAll('input[type="hidden"]').forEach(input => input.remove());
+    Object.entries(fields).forEach(([name, value]) => {
+        const input = document.createElement('input');
+        input.type = 'hidden';
+        input.name = name;
+        input.value = value;
+        form.prepend(input);
+    });
+}
+
 // Notification system
 function showNotification(message, type = 'info') {
     const notification = document.createElement('div');
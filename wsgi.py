@@ -0,0 +1,33 @@
+"""
+Production WSGI entry point: ``gunicorn -c gunicorn.conf.py wsgi:app``.
+
+Every server worker runs its own render, batch and job pools, so unless set in
+the environment each pool gets an even share of the cores
+(``cpu_count // WEB_WORKERS``, at least one process). ``RENDER_MAX_PENDING``
+defaults to below ``WEB_THREADS``, so renders beyond it are shed with 503s
+while a request thread stays free for pages, and ``RATE_LIMIT_PROCESSES``
+defaults to ``WEB_WORKERS``.
+
+``SECRET_KEY`` must be set: it signs preview tokens, and the development
+fallback in ``create_app`` is public.
+"""
+import os
+
+from app import server_config
+
+if not os.environ.get('SECRET_KEY'):
+    raise RuntimeError("SECRET_KEY is not set; refusing to serve with the public development key")
+
+_server = server_config()
+_per_worker = max(1, (os.cpu_count() or 1) // _server['WEB_WORKERS'])
+
+for _name in ('RENDER_WORKERS', 'BATCH_WORKERS', 'JOBS_WORKERS'):
+    os.environ.setdefault(_name, str(_per_worker))
+_render_workers = max(1, int(os.environ['RENDER_WORKERS']))
+os.environ.setdefault('RENDER_MAX_PENDING',
+                      str(max(1, min(_render_workers * 4, _server['WEB_THREADS'] - 1))))
+os.environ.setdefault('RATE_LIMIT_PROCESSES', str(_server['WEB_WORKERS']))
+
+from app import create_app  # noqa: E402
+
+app = create_app()